@@ -0,0 +1,44 @@
+import os
+import gc
+import time
+import tracemalloc
+
+
+def setup(settings_module='tests.settings'):
+    """ Configure django with the test settings, benchmarks are run as scripts """
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', settings_module)
+    import django
+    django.setup()
+
+
+def measure(func, repeat=5):
+    """
+    Run ``func`` ``repeat`` times and return the median latency (ms),
+    the number and time (ms) of database queries of the last run and
+    the peak of memory allocated (KiB) during the last run.
+    """
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    timings = []
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+
+    gc.collect()
+    tracemalloc.start()
+    with CaptureQueriesContext(connection) as queries:
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'latency_ms': round(timings[len(timings) // 2] * 1000, 3),
+        'queries': len(queries),
+        'query_time_ms': round(sum(float(q['time']) for q in queries.captured_queries) * 1000, 3),
+        'memory_kib': round(peak / 1024, 1),
+    }
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""
+Format a money column (report table with repeated amounts) and a number to
+words column with the previous recursive implementations, the rewritten
+functions called per cell and ``format_column``.
+
+    $ python -m benchmarks.bench_formatters
+"""
+import random
+import re
+import timeit
+from decimal import Decimal
+
+from benchmarks import setup
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.test.utils import override_settings  # noqa: E402
+from django.utils.formats import number_format  # noqa: E402
+from django.utils.html import format_html  # noqa: E402
+
+from django_websites.utils import text  # noqa: E402
+from django_websites.utils.formatters import get_formatter  # noqa: E402
+
+
+# Implementations replaced by django_websites.utils.text, kept as baseline
+def legacy_get_money(value, use_l10n=True):
+    if settings.USE_L10N and use_l10n:
+        try:
+            if not isinstance(value, (float, Decimal)):
+                value = int(value)
+        except (TypeError, ValueError):
+            return legacy_get_money(value, False)
+        else:
+            return number_format(value, decimal_pos=2, force_grouping=True)
+    orig = str(value)
+    new = re.sub(r"^(-?\d+)(\d{3})", r'\g<1>,\g<2>', orig)
+    if orig == new:
+        return new
+    else:
+        return legacy_get_money(new, use_l10n)
+
+
+def legacy_format_money(number):
+    text = '<div align="right">{}</div>'
+    return format_html(text.format(legacy_get_money(number)))
+
+
+def legacy_number_to_text_id(nilai):
+    huruf = ["", "satu", "dua", "tiga", "empat", "lima",
+             "enam", "tujuh", "delapan", "sembilan", "sepuluh", "sebelas"]
+    nilai = int(nilai)
+    if nilai == 0:
+        return ""
+    elif nilai < 12 and nilai != 0:
+        return "" + huruf[nilai]
+    elif nilai < 20:
+        return legacy_number_to_text_id(nilai - 10) + " belas "
+    elif nilai < 100:
+        return legacy_number_to_text_id(nilai / 10) + " puluh " + legacy_number_to_text_id(nilai % 10)
+    elif nilai < 200:
+        return "seratus " + legacy_number_to_text_id(nilai - 100)
+    elif nilai < 1000:
+        return legacy_number_to_text_id(nilai / 100) + " ratus " + legacy_number_to_text_id(nilai % 100)
+    elif nilai < 2000:
+        return "seribu " + legacy_number_to_text_id(nilai - 1000)
+    elif nilai < 1000000:
+        return legacy_number_to_text_id(nilai / 1000) + " ribu " + legacy_number_to_text_id(nilai % 1000)
+    elif nilai < 1000000000:
+        return legacy_number_to_text_id(nilai / 1000000) + " juta " + legacy_number_to_text_id(nilai % 1000000)
+    elif nilai < 1000000000000:
+        return legacy_number_to_text_id(nilai / 1000000000) + " milyar " + legacy_number_to_text_id(nilai % 1000000000)
+    else:
+        return legacy_number_to_text_id(nilai / 1000000000000) + " trilyun " + legacy_number_to_text_id(nilai % 1000000000000)
+
+
+def make_amounts(cells, distinct):
+    amounts = [Decimal(random.randrange(1, 10 ** 9)) / 100 for _ in range(distinct)]
+    return [random.choice(amounts) for _ in range(cells)]
+
+
+def row(name, cells, legacy, per_cell, column, number=5):
+    old = min(timeit.repeat(legacy, number=1, repeat=number))
+    new = min(timeit.repeat(per_cell, number=1, repeat=number))
+    batch = min(timeit.repeat(column, number=1, repeat=number))
+    print('%-22s %10.1fms %10.1fms %10.1fms %7.1fx' % (
+        name, old * 1000, new * 1000, batch * 1000, old / batch))
+
+
+def main(cells=20000):
+    random.seed(0)
+    print('%-22s %12s %12s %12s %8s' % ('column', 'legacy', 'per cell', 'column', 'speedup'))
+    for use_l10n in (False, True):
+        with override_settings(USE_L10N=use_l10n):
+            for distinct in (100, cells):
+                values = make_amounts(cells, distinct)
+                formatter = get_formatter('format_money')
+                row(
+                    'money l10n=%s n=%s' % (use_l10n, distinct), cells,
+                    lambda: [legacy_format_money(v) for v in values],
+                    lambda: [text.format_money(v) for v in values],
+                    lambda: (formatter.clear(), formatter.format_column(values)),
+                )
+    numbers = [random.randrange(0, 10 ** 13) for _ in range(cells)]
+    formatter = get_formatter('text_id')
+    row(
+        'text_id', cells,
+        lambda: [legacy_number_to_text_id(v) for v in numbers],
+        lambda: [text.number_to_text_id(v) for v in numbers],
+        lambda: (formatter.clear(), formatter.format_column(numbers)),
+    )
+
+
+if __name__ == '__main__':
+    main()
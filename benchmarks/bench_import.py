@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+Import throughput of ``CSVImporter`` (rows per second and peak memory) for
+growing CSV files, against saving one ModelForm per row.
+
+    $ python -m benchmarks.bench_import
+"""
+import io
+import time
+import tracemalloc
+
+from benchmarks import setup
+
+setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.forms import modelform_factory  # noqa: E402
+
+from django_websites.importer import CSVImporter  # noqa: E402
+from tests.models import Person  # noqa: E402
+from tests.sites import PersonSite  # noqa: E402
+
+
+def make_csv(rows):
+    lines = ['name,gender,privacy,nation,religion']
+    for i in range(rows):
+        lines.append('Person %s,%s,anyone,ID,-' % (i, 'LP'[i % 2]))
+    return io.BytesIO('\n'.join(lines).encode('utf-8'))
+
+
+def per_row_save(form_class, fileobj):
+    importer = CSVImporter(Person, form_class)
+    for line, row in importer.read_rows(fileobj):
+        form = form_class(data=row)
+        if form.is_valid():
+            form.save()
+
+
+def run(func, rows):
+    """ Return rows per second, timed without tracemalloc, and the peak KiB """
+    Person.objects.all().delete()
+    fileobj = make_csv(rows)
+    start = time.perf_counter()
+    func(fileobj)
+    duration = time.perf_counter() - start
+
+    Person.objects.all().delete()
+    fileobj.seek(0)
+    tracemalloc.start()
+    func(fileobj)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return rows / duration, peak / 1024
+
+
+def main():
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    form_class = modelform_factory(Person, fields=PersonSite.fields)
+    importer = CSVImporter(Person, form_class)
+    print('%-8s %14s %12s %14s %12s' % ('rows', 'per row/s', 'peak KiB', 'chunked/s', 'peak KiB'))
+    for rows in (1000, 5000, 20000):
+        old, old_peak = run(lambda fileobj: per_row_save(form_class, fileobj), rows)
+        new, new_peak = run(importer.run, rows)
+        print('%-8s %14.0f %12.0f %14.0f %12.0f' % (rows, old, old_peak, new, new_peak))
+
+
+if __name__ == '__main__':
+    main()
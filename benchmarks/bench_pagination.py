@@ -0,0 +1,65 @@
+#!/usr/bin/env python
+"""
+Compare the per-link ``replace_param`` tag against ``PageLinks`` for a full
+pagination bar (first, previous, 7 page window, next, last).
+
+    $ python -m benchmarks.bench_pagination
+"""
+import timeit
+
+from benchmarks import setup
+
+setup()
+
+from django.core.paginator import Paginator  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+from django_websites.pagination import PageLinks  # noqa: E402
+from django_websites.templatetags.pagination_tags import (  # noqa: E402
+    replace_param, proper_paginate
+)
+
+
+def make_query(params):
+    query = ['page=50']
+    for i in range(params):
+        query.append('filter_%s=value-%s' % (i, i))
+        query.append('empty_%s=' % i)
+    return '&'.join(query)
+
+
+def with_replace_param(context, page_obj):
+    paginator = page_obj.paginator
+    links = [
+        replace_param(context, page=1),
+        replace_param(context, page=page_obj.previous_page_number()),
+    ]
+    for i in proper_paginate(paginator, page_obj.number):
+        links.append(replace_param(context, page=i))
+    links.append(replace_param(context, page=page_obj.next_page_number()))
+    links.append(replace_param(context, page=paginator.num_pages))
+    return links
+
+
+def with_page_links(context, page_obj):
+    links = PageLinks(context['request'].GET, page_obj)
+    result = [links.first, links.previous]
+    result.extend(page['url'] for page in links.pages)
+    result.extend([links.next, links.last])
+    return result
+
+
+def main(number=2000):
+    factory = RequestFactory()
+    page_obj = Paginator(range(1000), 10).page(50)
+    print('%-8s %16s %16s %8s' % ('params', 'replace_param', 'page_links', 'speedup'))
+    for params in (0, 5, 20, 50):
+        context = {'request': factory.get('/things/?' + make_query(params))}
+        old = timeit.timeit(lambda: with_replace_param(context, page_obj), number=number)
+        new = timeit.timeit(lambda: with_page_links(context, page_obj), number=number)
+        print('%-8s %14.1fus %14.1fus %7.1fx' % (
+            params, old / number * 1e6, new / number * 1e6, old / new))
+
+
+if __name__ == '__main__':
+    main()
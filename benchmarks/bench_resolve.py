@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Compare URL resolving of a flat list of per-site regex patterns with the
+per-site prefix groups of the registry using path converters.
+
+    $ python -m benchmarks.bench_resolve
+"""
+import timeit
+import uuid
+
+from benchmarks import setup
+
+setup()
+
+from django.conf.urls import url, include  # noqa: E402
+from django.urls.resolvers import RegexPattern, URLResolver  # noqa: E402
+
+from django_websites.registry import SiteRegistry  # noqa: E402
+from tests.sites import PersonSite, WorkingSite, VolunteerSite  # noqa: E402
+
+
+def get_site_classes(routing):
+    return [
+        type(site_class.__name__, (site_class,), {'url_routing': routing})
+        for site_class in (PersonSite, WorkingSite, VolunteerSite)
+    ]
+
+
+def flat_resolver(namespaces):
+    patterns = []
+    for namespace in namespaces:
+        sites = [site_class(namespace) for site_class in get_site_classes('regex')]
+        patterns.append(url(r'^%s/' % namespace, include([
+            url('', include(site.get_urls())) for site in sites
+        ])))
+    return URLResolver(RegexPattern(r'^/'), patterns)
+
+
+def grouped_resolver(namespaces):
+    registry = SiteRegistry()
+    for namespace in namespaces:
+        for site_class in get_site_classes('path'):
+            registry.add_site(site_class, namespace)
+    return URLResolver(RegexPattern(r'^/'), registry.urls)
+
+
+def main(sizes=(1, 10, 50), number=2000):
+    pk = uuid.uuid4()
+    print('%-10s %14s %14s %8s' % ('sites', 'flat regex', 'grouped path', 'speedup'))
+    for size in sizes:
+        namespaces = ['site%s' % i for i in range(size)]
+        paths = [
+            '/%s/volunteer/edit/%s/' % (namespaces[-1], pk),
+            '/%s/person/' % namespaces[len(namespaces) // 2],
+        ]
+        flat, grouped = flat_resolver(namespaces), grouped_resolver(namespaces)
+        for path in paths:
+            flat.resolve(path)
+            grouped.resolve(path)
+        old = timeit.timeit(lambda: [flat.resolve(p) for p in paths], number=number) / number
+        new = timeit.timeit(lambda: [grouped.resolve(p) for p in paths], number=number) / number
+        print('%-10s %12.1fus %12.1fus %7.1fx' % (
+            size * 3, old / len(paths) * 1e6, new / len(paths) * 1e6, old / new))
+
+
+if __name__ == '__main__':
+    main()
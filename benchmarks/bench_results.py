@@ -0,0 +1,48 @@
+#!/usr/bin/env python
+"""
+Render a results table of list_display columns through template variable
+resolution per cell, against the precomputed rows of ``ResultsTable``.
+
+    $ python -m benchmarks.bench_results
+"""
+import timeit
+
+from benchmarks import setup
+
+setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.template import Context, Template  # noqa: E402
+
+from django_websites.registry import registry  # noqa: E402
+from django_websites.results import ResultsTable  # noqa: E402
+from tests.models import Working  # noqa: E402
+from tests.sites import WorkingSite  # noqa: E402
+
+PER_CELL = Template(
+    '{% for obj in objects %}<tr><td>{{ obj.name }}</td><td>{{ obj.person.name }}</td>'
+    '<td>{{ obj.get_employment_display }}</td><td>{{ obj.date_start }}</td></tr>{% endfor %}'
+)
+ROWS = Template(
+    '{% for obj, cells in results.html_rows %}<tr>{{ cells }}</tr>{% endfor %}'
+)
+
+
+def main(number=20):
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    call_command('generate_sites_data', 500, related=1, verbosity=0)
+    modelsite = registry.get_modelsite(WorkingSite, 'people')
+    print('%-8s %14s %14s %8s' % ('rows', 'per cell', 'results', 'speedup'))
+    for rows in (15, 100, 500):
+        objects = list(Working.objects.select_related('person')[:rows])
+        old = timeit.timeit(
+            lambda: PER_CELL.render(Context({'objects': objects})), number=number)
+        new = timeit.timeit(
+            lambda: ROWS.render(Context({'results': ResultsTable(modelsite, objects)})),
+            number=number)
+        print('%-8s %12.2fms %12.2fms %7.1fx' % (
+            rows, old / number * 1000, new / number * 1000, old / new))
+
+
+if __name__ == '__main__':
+    main()
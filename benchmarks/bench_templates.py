@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+"""
+Render the index page of 100 rows with the Django templates and with the
+Jinja2 templates (requires jinja2).
+
+    $ python -m benchmarks.bench_templates
+"""
+from unittest import mock
+
+from benchmarks import setup, measure
+
+setup()
+
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from django_websites.registry import registry  # noqa: E402
+from tests.sites import WorkingSite  # noqa: E402
+
+ENGINES = [('django', None), ('jinja2', 'jinja2')]
+
+
+def expect(response):
+    if response.status_code != 200:
+        raise AssertionError('Expected status 200, got %s' % response.status_code)
+    return response
+
+
+def main(repeat=20):
+    settings.ALLOWED_HOSTS = ['testserver']
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    call_command('generate_sites_data', 500, related=1, verbosity=0)
+    user = get_user_model().objects.create_superuser('bench', 'bench@example.com', 'bench')
+    client = Client()
+    client.force_login(user)
+    modelsite = registry.get_modelsite(WorkingSite, 'people')
+    print('%-8s %-10s %12s %8s' % ('engine', 'page', 'latency', 'queries'))
+    for name, engine in ENGINES:
+        with mock.patch.multiple(modelsite, template_engine=engine, list_per_page=100):
+            for page, params in (('full', {}), ('fragment', {'fragment': 1})):
+                result = measure(lambda: expect(client.get('/people/working/', params)), repeat)
+                print('%-8s %-10s %10.2fms %8s' % (
+                    name, page, result['latency_ms'], result['queries']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Compare ``reverse()`` with the URL templates of ``SiteURLHelper.get_url``
+for the inspect/edit/delete links of an index page.
+
+    $ python -m benchmarks.bench_urls
+"""
+import timeit
+import uuid
+
+from benchmarks import setup
+
+setup()
+
+from django.contrib.admin.utils import quote  # noqa: E402
+from django.urls import reverse  # noqa: E402
+
+from django_websites.registry import registry  # noqa: E402
+from tests.sites import PersonSite  # noqa: E402
+
+
+def main(links=300, number=20):
+    url_helper = registry.get_modelsite(PersonSite, 'people').url_helper
+    pks = [quote(str(uuid.uuid4())) for _ in range(links // 3)]
+    url_names = [url_helper.get_url_name(action) for action in ('inspect', 'edit', 'delete')]
+
+    def with_reverse():
+        for pk in pks:
+            for url_name in url_names:
+                reverse(url_name, args=[pk])
+
+    def with_templates():
+        for pk in pks:
+            for action in ('inspect', 'edit', 'delete'):
+                url_helper.get_url(action, True, pk)
+
+    with_templates()
+    old = timeit.timeit(with_reverse, number=number) / number
+    new = timeit.timeit(with_templates, number=number) / number
+    print('%s links per page' % links)
+    print('reverse()        %8.2fms  %10.0f urls/s' % (old * 1000, links / old))
+    print('url templates    %8.2fms  %10.0f urls/s' % (new * 1000, links / new))
+    print('speedup          %8.1fx' % (old / new))
+
+
+if __name__ == '__main__':
+    main()
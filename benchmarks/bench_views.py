@@ -0,0 +1,153 @@
+#!/usr/bin/env python
+"""
+Measure latency, query count and allocated memory of the ModelSite views
+against the test settings' SQLite database filled with synthetic rows.
+
+    $ python -m benchmarks.bench_views --rows 5000
+    $ python -m benchmarks.bench_views --rows 5000 --compare benchmarks/results/abc1234.json
+
+Results are stored as JSON (by default in benchmarks/results/<commit>.json)
+so runs can be compared across commits.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import sys
+from datetime import datetime
+
+from benchmarks import setup, measure
+
+setup()
+
+import django  # noqa: E402
+from django.conf import settings  # noqa: E402
+from django.contrib.auth import get_user_model  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+from django.test import Client  # noqa: E402
+
+from tests.models import Person, Working  # noqa: E402
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), 'results')
+
+
+def get_commit():
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def expect(response, status):
+    if response.status_code != status:
+        raise AssertionError('Expected status %s, got %s' % (status, response.status_code))
+    return response
+
+
+def person_data(**kwargs):
+    data = {
+        'name': 'Benchmark Person', 'pid': '1234', 'gender': 'P',
+        'date_of_birth': '1990-01-01', 'place_of_birth': 'Jakarta',
+        'privacy': 'anyone', 'nickname': 'bench', 'about_me': '',
+        'religion': 'Islam', 'nation': 'Indonesia',
+    }
+    data.update(kwargs)
+    return data
+
+
+def get_cases(client):
+    person = Person.objects.order_by('name', 'id')[0]
+    working = Working.objects.order_by('id')[0]
+    deletable = iter(Person.objects.order_by('-name').values_list('pk', flat=True)[:100])
+    counter = itertools.count()
+    last_page = -(-Person.objects.count() // 15)
+
+    return [
+        ('person_index_first', lambda: expect(
+            client.get('/people/person/'), 200)),
+        ('person_index_deep', lambda: expect(
+            client.get('/people/person/', {'page': last_page}), 200)),
+        ('person_index_filtered', lambda: expect(
+            client.get('/people/person/', {'gender': 'P', 'privacy': 'anyone', 'nation': 'Indonesia'}), 200)),
+        ('working_index_first', lambda: expect(
+            client.get('/people/working/'), 200)),
+        ('person_inspect', lambda: expect(
+            client.get('/people/person/inspect/%s/' % person.pk), 200)),
+        ('working_inspect', lambda: expect(
+            client.get('/people/working/inspect/%s/' % working.pk), 200)),
+        ('person_create_post', lambda: expect(
+            client.post('/people/person/create/', person_data(name='Created %s' % next(counter))), 302)),
+        ('person_edit_post', lambda: expect(
+            client.post('/people/person/edit/%s/' % person.pk, person_data(name=person.name)), 302)),
+        ('person_delete_post', lambda: expect(
+            client.post('/people/person/delete/%s/' % next(deletable)), 302)),
+    ]
+
+
+def compare(results, previous):
+    print('\nCompared with %s (%s rows):' % (previous['meta']['commit'], previous['meta']['rows']))
+    print('%-24s %12s %10s %12s' % ('case', 'latency', 'queries', 'memory'))
+    for name, metrics in results.items():
+        old = previous['results'].get(name)
+        if not old:
+            continue
+        print('%-24s %+11.1f%% %+10d %+11.1f%%' % (
+            name,
+            (metrics['latency_ms'] / old['latency_ms'] - 1) * 100,
+            metrics['queries'] - old['queries'],
+            (metrics['memory_kib'] / old['memory_kib'] - 1) * 100,
+        ))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawTextHelpFormatter)
+    parser.add_argument('--rows', type=int, default=2000, help='Number of persons to generate.')
+    parser.add_argument('--repeat', type=int, default=7, help='Runs per case, the median is kept.')
+    parser.add_argument('--output', help='Path of the JSON result file.')
+    parser.add_argument('--compare', help='JSON result file of a previous run.')
+    args = parser.parse_args(argv)
+
+    settings.ALLOWED_HOSTS = ['testserver']
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    call_command('generate_sites_data', args.rows, verbosity=0)
+    user = get_user_model().objects.create_superuser('bench', 'bench@example.com', 'bench')
+    client = Client()
+    client.force_login(user)
+
+    results = {}
+    print('%-24s %12s %8s %12s %12s' % ('case', 'latency', 'queries', 'query time', 'memory'))
+    for name, func in get_cases(client):
+        metrics = measure(func, repeat=args.repeat)
+        results[name] = metrics
+        print('%-24s %10.2fms %8d %10.2fms %9.1fKiB' % (
+            name, metrics['latency_ms'], metrics['queries'],
+            metrics['query_time_ms'], metrics['memory_kib']))
+
+    commit = get_commit()
+    output = args.output or os.path.join(RESULTS_DIR, '%s.json' % commit)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as fh:
+        json.dump({
+            'meta': {
+                'commit': commit,
+                'rows': args.rows,
+                'repeat': args.repeat,
+                'date': datetime.now().isoformat(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+            },
+            'results': results,
+        }, fh, indent=2)
+    print('\nResults written to %s' % output)
+
+    if args.compare:
+        with open(args.compare) as fh:
+            compare(results, json.load(fh))
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
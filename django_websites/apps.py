@@ -5,3 +5,9 @@ class AppConfig(AppConfigBase):
     name = 'django_websites'
     label = 'django_websites'
     verbose_name = 'Django Website'
+
+    def ready(self):
+        from .registry import autodiscover
+        from .menu import connect_signals
+        autodiscover()
+        connect_signals()
@@ -0,0 +1,188 @@
+"""
+Static asset bundles of the ModelSite views.
+
+The extra CSS and JS of a view (``index_view_extra_css``...) are concatenated
+once per process into files named after the hash of their content and
+served by ``bundle_view`` with far future cache headers: changing a source
+file changes the URL. Absolute URLs (``https://``, ``//``, ``/``) are not
+bundled, they are linked as they are and the static files between them are
+bundled separately so everything still loads in the declared order. The
+relative ``url()`` and ``@import`` references of the stylesheets are
+rewritten to their static URLs as the bundle lives elsewhere.
+
+The bundle URL is routed by ``registry.urls``.
+"""
+import hashlib
+import posixpath
+import re
+import threading
+
+from django import forms
+from django.contrib.staticfiles import finders
+from django.core.exceptions import ImproperlyConfigured
+from django.http import Http404, HttpResponse, HttpResponseNotModified
+from django.templatetags.static import static
+from django.urls import NoReverseMatch, reverse
+from django.utils.cache import patch_cache_control
+
+BUNDLE_URL_NAME = 'websites_bundle'
+# Views with their own media, see ModelSite.get_media
+ACTIONS = ('index', 'form', 'inspect')
+CONTENT_TYPES = {
+    'css': 'text/css; charset=utf-8',
+    'js': 'application/javascript; charset=utf-8',
+}
+SEPARATORS = {
+    'css': b'\n',
+    'js': b'\n;\n',
+}
+MAX_AGE = 365 * 24 * 60 * 60
+# url(...) and @import "..." references of a stylesheet
+CSS_URL_RE = re.compile(
+    r'''(?P<start>url\(\s*(?P<quote>['"]?)|@import\s+(?P<import_quote>['"]))'''
+    r'''(?P<url>[^'"()\s]+)''')
+
+bundles = {}
+state = {'built': False}
+lock = threading.Lock()
+
+
+class Bundle:
+    def __init__(self, kind, content):
+        self.kind = kind
+        self.content = content
+        self.name = '%s.%s' % (hashlib.sha256(content).hexdigest()[:20], kind)
+
+    @property
+    def content_type(self):
+        return CONTENT_TYPES[self.kind]
+
+    @property
+    def url(self):
+        try:
+            return reverse(BUNDLE_URL_NAME, args=[self.name])
+        except NoReverseMatch:
+            raise ImproperlyConfigured(
+                "'%s' is not routed, include registry.urls without a namespace." % BUNDLE_URL_NAME)
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.name)
+
+
+def is_external(path):
+    return path.startswith(('http://', 'https://', '/'))
+
+
+def read_static(path):
+    full_path = finders.find(path)
+    if full_path is None:
+        raise ImproperlyConfigured("Static file '%s' could not be found." % path)
+    with open(full_path, 'rb') as f:
+        return f.read()
+
+
+def is_relative_reference(url):
+    return not (url.startswith(('/', '#', 'data:')) or '://' in url)
+
+
+def rewrite_css_urls(path, content):
+    """ Point the relative references of the stylesheet ``path`` to their static URLs """
+    directory = posixpath.dirname(path)
+
+    def rewrite(match):
+        url = match.group('url')
+        if not is_relative_reference(url):
+            return match.group(0)
+        name, suffix = re.match(r'([^?#]*)(.*)', url).groups()
+        target = posixpath.normpath(posixpath.join(directory, name))
+        return match.group('start') + static(target) + suffix
+
+    return CSS_URL_RE.sub(rewrite, content.decode('utf-8')).encode('utf-8')
+
+
+def read_bundled(kind, path):
+    content = read_static(path)
+    if kind == 'css':
+        content = rewrite_css_urls(path, content)
+    return content
+
+
+def build_bundle(kind, paths):
+    """ Return the ``Bundle`` of the static files ``paths``, or None """
+    paths = [path for path in paths if not is_external(path)]
+    if not paths:
+        return None
+    content = SEPARATORS[kind].join(read_bundled(kind, path) for path in paths)
+    bundle = Bundle(kind, content)
+    with lock:
+        return bundles.setdefault(bundle.name, bundle)
+
+
+def build_urls(kind, paths):
+    """ URLs of ``paths`` in order, each run of static files replaced by its bundle """
+    urls = []
+    run = []
+    for path in list(paths) + [None]:
+        if path is not None and not is_external(path):
+            run.append(path)
+            continue
+        if run:
+            urls.append(build_bundle(kind, run).url)
+            run = []
+        if path is not None:
+            urls.append(path)
+    return urls
+
+
+def build_media(css, js):
+    """ ``forms.Media`` of the ``css`` and ``js`` paths, the static ones bundled """
+    css_urls = build_urls('css', css)
+    return forms.Media(css={'all': css_urls} if css_urls else {}, js=build_urls('js', js))
+
+
+def build_site_media(modelsite, action):
+    return build_media(
+        getattr(modelsite, 'get_%s_view_extra_css' % action)(),
+        getattr(modelsite, 'get_%s_view_extra_js' % action)(),
+    )
+
+
+def build_site_bundles(modelsite):
+    for action in ACTIONS:
+        build_site_media(modelsite, action)
+
+
+def build_all():
+    from .registry import registry
+    for modelsite in registry.get_modelsites():
+        build_site_bundles(modelsite)
+    state['built'] = True
+
+
+def clear():
+    with lock:
+        bundles.clear()
+        state['built'] = False
+
+
+def get_bundle(name):
+    bundle = bundles.get(name)
+    if bundle is None and not state['built']:
+        # Linked by another process, build every bundle of this one once
+        build_all()
+        bundle = bundles.get(name)
+    return bundle
+
+
+def bundle_view(request, name):
+    bundle = get_bundle(name)
+    if bundle is None:
+        raise Http404("Unknown bundle '%s'." % name)
+    etag = '"%s"' % bundle.name
+    if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(bundle.content, content_type=bundle.content_type)
+    response['ETag'] = etag
+    patch_cache_control(response, public=True, max_age=MAX_AGE, immutable=True)
+    return response
@@ -0,0 +1,135 @@
+"""
+Autocomplete for foreign keys.
+
+``ModelChoiceField`` renders every row of the related table as an option, the
+autocomplete widgets only render the selected values and the others are
+searched through the ``autocomplete`` JSON endpoint of the ModelSite::
+
+    /people/working/autocomplete/?field=person&q=ad&page=1
+
+    {"results": [{"id": "...", "text": "Ada"}], "more": false}
+
+The search is a ``startswith`` lookup on ``ModelSite.autocomplete_search_fields``
+ordered by the same fields, which a plain b-tree index on them serves. It
+reads the queryset of the registered site of the related model, which the
+user must be allowed to list.
+"""
+from urllib.parse import urlencode
+
+from django import forms
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured, ValidationError
+from django.core.validators import EMPTY_VALUES
+from django.db import models
+
+
+class AutocompleteMixin:
+    """ Render only the selected options of a ModelChoiceField """
+    css_class = 'autocomplete'
+
+    def __init__(self, modelsite, field_name, attrs=None):
+        self.modelsite = modelsite
+        self.field_name = field_name
+        super().__init__(attrs)
+
+    @property
+    def media(self):
+        return forms.Media(js=['django_websites/js/autocomplete.js'])
+
+    def get_url(self):
+        return '%s?%s' % (
+            self.modelsite.url_helper.autocomplete_url, urlencode({'field': self.field_name}))
+
+    def build_attrs(self, base_attrs, extra_attrs=None):
+        attrs = super().build_attrs(base_attrs, extra_attrs)
+        attrs['data-autocomplete-url'] = self.get_url()
+        attrs['class'] = ('%s %s' % (attrs.get('class', ''), self.css_class)).strip()
+        return attrs
+
+    def get_selected_choices(self, value):
+        iterator = self.choices
+        choices = []
+        if not self.allow_multiple_selected and iterator.field.empty_label is not None:
+            choices.append(('', iterator.field.empty_label))
+        values = [v for v in value if v not in EMPTY_VALUES]
+        if values:
+            key = iterator.field.to_field_name or 'pk'
+            try:
+                objects = list(iterator.queryset.filter(**{'%s__in' % key: values}))
+            except (ValueError, TypeError, ValidationError):
+                objects = []
+            choices.extend(iterator.choice(obj) for obj in objects)
+        return choices
+
+    def optgroups(self, name, value, attrs=None):
+        choices = self.choices
+        self.choices = self.get_selected_choices(value)
+        try:
+            return super().optgroups(name, value, attrs)
+        finally:
+            self.choices = choices
+
+
+class AutocompleteSelect(AutocompleteMixin, forms.Select):
+    pass
+
+
+class AutocompleteSelectMultiple(AutocompleteMixin, forms.SelectMultiple):
+    pass
+
+
+def get_relation_field(model, name):
+    """ Foreign key, one to one or many to many field ``name`` of ``model``, or None """
+    try:
+        field = model._meta.get_field(name)
+    except FieldDoesNotExist:
+        return None
+    if field.is_relation and field.concrete:
+        return field
+    return None
+
+
+def get_search_fields(modelsite, field):
+    search_fields = modelsite.autocomplete_search_fields.get(field.name)
+    if search_fields:
+        return list(search_fields)
+    for related_field in field.related_model._meta.concrete_fields:
+        if isinstance(related_field, models.CharField) and not related_field.primary_key:
+            return [related_field.name]
+    raise ImproperlyConfigured(
+        "'%s' has no autocomplete_search_fields for '%s' and '%s' has no "
+        "CharField to search." % (
+            modelsite.__class__.__name__, field.name, field.related_model._meta.label))
+
+
+def get_related_modelsite(modelsite, field):
+    """ Registered site of the related model of ``field``, preferably in the same namespace """
+    from .registry import registry
+    modelsites = registry.get_modelsites_for_model(field.related_model)
+    for related in modelsites:
+        if related.get_namespace() == modelsite.get_namespace():
+            return related
+    return modelsites[0] if modelsites else None
+
+
+def search(modelsite, field, queryset, term, page=1):
+    """
+    Return the ``page`` of the related objects of ``field`` in ``queryset``
+    matching ``term`` and if more follow
+    """
+    limit = modelsite.autocomplete_limit
+    search_fields = get_search_fields(modelsite, field)
+    queryset = queryset.complex_filter(field.get_limit_choices_to())
+    if term:
+        query = models.Q()
+        for name in search_fields:
+            query |= models.Q(**{'%s__%s' % (name, modelsite.autocomplete_lookup): term})
+        queryset = queryset.filter(query)
+    offset = (page - 1) * limit
+    # One more row tells if there is a next page without a COUNT query
+    objects = list(queryset.order_by(*search_fields, 'pk')[offset:offset + limit + 1])
+    return objects[:limit], len(objects) > limit
+
+
+def get_results(field, objects):
+    to_field = 'pk' if field.many_to_many else field.target_field.attname
+    return [{'id': str(getattr(obj, to_field)), 'text': str(obj)} for obj in objects]
@@ -0,0 +1,139 @@
+"""
+Facet counts of the filter sidebar.
+
+The choice filters of a FilterSet are counted over the filtered queryset in a
+single aggregate query, one ``Count(filter=Q(...))`` per choice. The counts
+are cached by the SQL of the filtered queryset and a version per model that
+is bumped whenever a row is saved or deleted, so another filter or a write
+always recounts and ``WEBSITE_FACET_CACHE_TIMEOUT`` (default 60 seconds)
+bounds how stale bulk updates can leave them.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Count, Q
+from django.db.models.signals import post_save, post_delete
+from django.http import QueryDict
+from django_filters import ChoiceFilter, MultipleChoiceFilter
+
+from .results import get_field_path
+
+CACHE_PREFIX = 'django_websites:facets'
+
+
+class Facet:
+    def __init__(self, name, label, choices):
+        self.name = name
+        self.label = label
+        # (value, label, count, url) per choice
+        self.choices = choices
+
+    def __iter__(self):
+        return iter(self.choices)
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.name)
+
+
+def get_timeout():
+    return getattr(settings, 'WEBSITE_FACET_CACHE_TIMEOUT', 60)
+
+
+def get_version_key(model):
+    return '%s:version:%s' % (CACHE_PREFIX, model._meta.label_lower)
+
+
+def get_version(model):
+    key = get_version_key(model)
+    version = cache.get(key)
+    if version is None:
+        version = 1
+        cache.add(key, version, None)
+    return version
+
+
+def bump_version(model):
+    try:
+        cache.incr(get_version_key(model))
+    except ValueError:
+        cache.set(get_version_key(model), 2, None)
+
+
+def model_changed(sender, **kwargs):
+    bump_version(sender)
+
+
+def connect_signals(model):
+    uid = 'websites_facets_%s' % model._meta.label_lower
+    post_save.connect(model_changed, sender=model, dispatch_uid=uid + '_saved')
+    post_delete.connect(model_changed, sender=model, dispatch_uid=uid + '_deleted')
+
+
+def get_facet_filters(filterset):
+    """ Return the (name, filter, model field) of the exact choice filters """
+    facet_filters = []
+    model = filterset._meta.model
+    for name, filter_ in filterset.filters.items():
+        if not isinstance(filter_, (ChoiceFilter, MultipleChoiceFilter)):
+            continue
+        if filter_.lookup_expr != 'exact' or filter_.exclude:
+            continue
+        fields = get_field_path(model, filter_.field_name)
+        if fields and fields[-1].choices:
+            facet_filters.append((name, filter_, fields[-1]))
+    return facet_filters
+
+
+def count_facets(queryset, facet_filters):
+    """ Return the counts of every choice of ``facet_filters`` in one query """
+    aggregates = {}
+    for i, (name, filter_, field) in enumerate(facet_filters):
+        for j, (value, label) in enumerate(field.flatchoices):
+            aggregates['facet_%s_%s' % (i, j)] = Count(
+                'pk', filter=Q(**{filter_.field_name: value}))
+    if not aggregates:
+        return []
+    counts = queryset.order_by().aggregate(**aggregates)
+    return [
+        [counts['facet_%s_%s' % (i, j)] for j in range(len(field.flatchoices))]
+        for i, (name, filter_, field) in enumerate(facet_filters)
+    ]
+
+
+def get_cache_key(queryset):
+    sql, params = queryset.query.sql_with_params()
+    # The database too, replicas may lag behind the primary
+    digest = hashlib.md5(repr((queryset.db, sql, params)).encode()).hexdigest()
+    return '%s:%s:%s' % (CACHE_PREFIX, get_version(queryset.model), digest)
+
+
+def get_cached_counts(queryset, facet_filters):
+    key = get_cache_key(queryset)
+    counts = cache.get(key)
+    if counts is None:
+        counts = count_facets(queryset, facet_filters)
+        cache.set(key, counts, get_timeout())
+    return counts
+
+
+def get_facets(filterset, page_kwarg='page'):
+    """ Return a ``Facet`` per choice filter of ``filterset``, counted over ``filterset.qs`` """
+    if filterset.is_bound and not filterset.is_valid():
+        return []
+    facet_filters = get_facet_filters(filterset)
+    if not facet_filters:
+        return []
+    counts = get_cached_counts(filterset.qs, facet_filters)
+    params = QueryDict(mutable=True)
+    params.update(filterset.data or {})
+    params.pop(page_kwarg, None)
+    facets = []
+    for (name, filter_, field), field_counts in zip(facet_filters, counts):
+        choices = []
+        for (value, label), count in zip(field.flatchoices, field_counts):
+            query = params.copy()
+            query[name] = value
+            choices.append((value, label, count, '?%s' % query.urlencode()))
+        facets.append(Facet(name, filter_.label or field.verbose_name, choices))
+    return facets
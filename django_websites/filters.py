@@ -1,11 +1,49 @@
+from django.utils.functional import cached_property
+from django_filters import ModelChoiceFilter, ModelMultipleChoiceFilter
 from django_filters.filterset import FilterSet, ALL_FIELDS
 
-def custom_filterset_factory(model, fields=ALL_FIELDS):
+from .facets import connect_signals, get_facets
+from .autocomplete import AutocompleteSelect, AutocompleteSelectMultiple, get_relation_field
+
+
+class SiteFilterSet(FilterSet):
+    facets_enabled = True
+
+    @cached_property
+    def facets(self):
+        """ Counts of every choice of the choice filters over the filtered queryset """
+        if not self.facets_enabled:
+            return []
+        return get_facets(self)
+
+
+def custom_filterset_factory(model, fields=ALL_FIELDS, modelsite=None):
     meta_fields = {'model': model, 'fields': fields}
     meta = type(str('Meta'), (object,), meta_fields)
+    attrs = {'Meta': meta}
+    if modelsite is not None:
+        attrs['facets_enabled'] = modelsite.facets_enabled
     filterset = type(
         str('%sFilterSet' % model._meta.object_name),
-        (FilterSet,),
-        {'Meta': meta}
+        (SiteFilterSet,),
+        attrs
     )
-    return filterset
\ No newline at end of file
+    if filterset.facets_enabled:
+        connect_signals(model)
+    if modelsite is not None:
+        set_autocomplete_widgets(filterset, modelsite)
+    return filterset
+
+
+def set_autocomplete_widgets(filterset, modelsite):
+    """
+    Give the foreign key filters of ``filterset`` autocomplete widgets, which
+    don't load the related table to render the filter form.
+    """
+    for filter_ in filterset.base_filters.values():
+        if 'widget' in filter_.extra or not get_relation_field(modelsite.model, filter_.field_name):
+            continue
+        if isinstance(filter_, ModelMultipleChoiceFilter):
+            filter_.extra['widget'] = AutocompleteSelectMultiple(modelsite, filter_.field_name)
+        elif isinstance(filter_, ModelChoiceFilter):
+            filter_.extra['widget'] = AutocompleteSelect(modelsite, filter_.field_name)
@@ -1,5 +1,31 @@
+import time
+
+from django.conf import settings
 from django.contrib.auth import get_permission_codename
 from django.contrib.auth.models import Permission
+from django.db.models.signals import post_save, post_delete, post_migrate
+
+# (codenames, expiry) of the SitePermissionHelpers by model label. Cleared
+# when this process changes permissions, the others see the changes after
+# WEBSITE_PERMISSION_CACHE_TIMEOUT seconds (default 60).
+permission_codenames = {}
+
+
+def get_permission_cache_timeout():
+    return getattr(settings, 'WEBSITE_PERMISSION_CACHE_TIMEOUT', 60)
+
+
+def clear_permission_codenames(**kwargs):
+    permission_codenames.clear()
+
+
+post_save.connect(
+    clear_permission_codenames, sender=Permission, dispatch_uid='websites_permission_codenames_saved')
+post_delete.connect(
+    clear_permission_codenames, sender=Permission, dispatch_uid='websites_permission_codenames_deleted')
+# create_permissions() bulk creates them without post_save
+post_migrate.connect(
+    clear_permission_codenames, dispatch_uid='websites_permission_codenames_migrated')
 
 
 class PermissionHelper:
@@ -64,6 +90,17 @@ class SitePermissionHelper:
             content_type__model=self.opts.model_name,
         )
 
+    def get_all_model_permission_codenames(self):
+        """ Codenames of the model permissions, see ``permission_codenames`` """
+        key = self.opts.label_lower
+        now = time.monotonic()
+        cached = permission_codenames.get(key)
+        if cached is not None and cached[1] > now:
+            return cached[0]
+        codenames = list(self.get_all_model_permissions().values_list('codename', flat=True))
+        permission_codenames[key] = (codenames, now + get_permission_cache_timeout())
+        return codenames
+
     def get_perm_codename(self, action):
         return get_permission_codename(action, self.opts)
 
@@ -71,8 +108,8 @@ class SitePermissionHelper:
         return user.has_perm("%s.%s" % (self.opts.app_label, perm_codename))
 
     def user_has_any_permissions(self, user):
-        for perm in self.get_all_model_permissions().values('codename'):
-            if self.user_has_specific_permission(user, perm['codename']):
+        for codename in self.get_all_model_permission_codenames():
+            if self.user_has_specific_permission(user, codename):
                 return True
         return False
 
@@ -1,20 +1,73 @@
-from django.urls import reverse
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.db import models
+from django.urls import reverse, get_script_prefix, get_urlconf
+from django.urls.converters import get_converter
 from django.utils.functional import cached_property
+from django.utils.http import RFC3986_SUBDELIMS
+
+# Stand for the instance pk while reversing URL templates, they must be
+# valid for the pk converter and never appear elsewhere in the URL
+PK_PLACEHOLDERS = {
+    'int': '918273645546372819',
+    'uuid': 'fedcba98-7654-4321-8fed-cba987654321',
+}
+PK_PLACEHOLDER = 'INSTANCEPK'
+# Converters whose values never need escaping in a URL
+SAFE_PK_CONVERTERS = ('int', 'uuid', 'slug')
 
 
 class SiteURLHelper:
+    pk_regex = r'[-\w]+'
+
     def __init__(self, modelsite):
         self.modelsite = modelsite
         self.model = modelsite.model
         self.namespace = modelsite.get_namespace()
         self.opts = modelsite.opts
+        self.routing = modelsite.get_url_routing()
+        if self.routing == 'path':
+            self.pk_converter = self.get_pk_converter()
+            self.pk_regex = get_converter(self.pk_converter).regex
+        self.pk_re = re.compile(self.pk_regex)
+        self.pk_quoted = not (self.routing == 'path' and self.pk_converter in SAFE_PK_CONVERTERS)
+        self.url_templates = {}
+
+    def get_pk_converter(self):
+        """ Path converter matching the primary key of the model """
+        field = self.opts.pk
+        while field.is_relation:
+            # Multi table inheritance, the pk is a link to the parent pk
+            field = field.target_field
+        if isinstance(field, models.UUIDField):
+            return 'uuid'
+        if isinstance(field, (models.AutoField, models.IntegerField)):
+            return 'int'
+        if isinstance(field, models.SlugField):
+            return 'slug'
+        return 'str'
+
+    def get_url_prefix(self):
+        return r'^%s/' % self.opts.model_name
+
+    def get_url_route(self, action, specific=False, prefix=True):
+        """ Route of ``action`` for ``django.urls.path`` """
+        start = '%s/' % self.opts.model_name if prefix else ''
+        if action == 'index':
+            return start
+        if specific:
+            return '%s%s/<%s:instance_pk>/' % (start, action, self.pk_converter)
+        return '%s%s/' % (start, action)
 
-    def get_url_pattern(self, action, specific=False):
+    def get_url_pattern(self, action, specific=False, prefix=True):
+        start = self.get_url_prefix() if prefix else '^'
         if action == 'index':
-            return r'^%s/$' % self.opts.model_name
+            return r'%s$' % start
         if specific:
-            return r'^%s/%s/(?P<instance_pk>[-\w]+)/$' % (self.opts.model_name, action)
-        return r'^%s/%s/$' % (self.opts.model_name, action)
+            return r'%s%s/(?P<instance_pk>%s)/$' % (start, action, self.pk_regex)
+        return r'%s%s/$' % (start, action)
 
     def get_url_name(self, action):
         namespace = self.namespace or self.opts.app_label
@@ -24,20 +77,63 @@ class SiteURLHelper:
             action
         )
 
+    def get_url_template(self, action, specific):
+        """
+        Return the (prefix, suffix) around the pk of the ``action`` URL.
+
+        Templates are reversed once per URLconf and script prefix, then
+        every link is built by concatenation instead of ``reverse()``.
+        """
+        key = (action, specific, get_script_prefix(), get_urlconf() or settings.ROOT_URLCONF)
+        template = self.url_templates.get(key)
+        if template is None:
+            url_name = self.get_url_name(action)
+            if specific:
+                placeholder = PK_PLACEHOLDER
+                if self.routing == 'path':
+                    placeholder = PK_PLACEHOLDERS.get(self.pk_converter, PK_PLACEHOLDER)
+                url = reverse(url_name, args=[placeholder])
+                prefix, _, suffix = url.rpartition(placeholder)
+                template = (prefix, suffix)
+            else:
+                template = (reverse(url_name), '')
+            self.url_templates[key] = template
+        return template
+
     def get_url(self, action, specific, *args, **kwargs):
         if specific:
+            if len(args) == 1 and not kwargs:
+                pk = str(args[0])
+                if self.pk_re.fullmatch(pk):
+                    prefix, suffix = self.get_url_template(action, True)
+                    if self.pk_quoted:
+                        # Escaped like reverse() does
+                        pk = quote(pk, safe=RFC3986_SUBDELIMS + '/~:@')
+                    return prefix + pk + suffix
             url_name = self.get_url_name(action)
             return reverse(url_name, args=args, kwargs=kwargs)
-        return reverse(self.get_url_name(action))
+        return self.get_url_template(action, False)[0]
 
-    @cached_property
+    @property
     def index_url(self):
         return self.get_url('index', specific=False)
 
-    @cached_property
+    @property
     def create_url(self):
         return self.get_url('create', specific=False)
 
+    @property
+    def import_url(self):
+        return self.get_url('import', specific=False)
+
+    @property
+    def trash_url(self):
+        return self.get_url('trash', specific=False)
+
+    @property
+    def autocomplete_url(self):
+        return self.get_url('autocomplete', specific=False)
+
     @cached_property
     def index_url_name(self):
         return self.get_url_name('index')
@@ -0,0 +1,113 @@
+"""
+Bulk CSV import for ModelSites.
+
+The uploaded file is decoded and parsed line by line, every row is validated
+with the site ModelForm and the valid rows are inserted ``chunk_size`` at a
+time with ``bulk_create``, each chunk in its own transaction (retried row by
+row when the database rejects it, to report the faulty rows). Only the current
+chunk and the first ``max_errors`` row errors are kept in memory whatever the
+size of the file.
+
+``bulk_create`` neither calls ``save()`` nor sends save signals, and many to
+many fields are not imported.
+"""
+import codecs
+import csv
+from collections import namedtuple
+
+from django import forms
+from django.core.exceptions import NON_FIELD_ERRORS
+from django.db import DatabaseError, transaction
+from django.utils.translation import ugettext_lazy as _
+
+RowError = namedtuple('RowError', ['line', 'errors'])
+
+
+class CSVImportForm(forms.Form):
+    csv_file = forms.FileField(
+        label=_('CSV file'),
+        help_text=_('The first line holds the field names.'))
+
+
+class ImportResult:
+    def __init__(self, max_errors=100):
+        self.max_errors = max_errors
+        self.created = 0
+        self.error_count = 0
+        self.errors = []
+
+    def add_error(self, line, errors):
+        self.error_count += 1
+        if len(self.errors) < self.max_errors:
+            self.errors.append(RowError(line, errors))
+
+    @property
+    def truncated(self):
+        return self.error_count > len(self.errors)
+
+
+class CSVImporter:
+    def __init__(self, model, form_class, chunk_size=500, max_errors=100, using=None):
+        self.model = model
+        self.form_class = form_class
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.using = using
+
+    def read_rows(self, fileobj, encoding='utf-8-sig'):
+        """ Yield the line number and the dict of every CSV row of ``fileobj`` """
+        reader = csv.DictReader(codecs.iterdecode(fileobj, encoding))
+        for row in reader:
+            yield reader.line_num, row
+
+    def get_form(self, row):
+        return self.form_class(data=row)
+
+    def validate_row(self, row):
+        """ Return the unsaved instance of ``row`` and the form errors """
+        form = self.get_form(row)
+        if form.is_valid():
+            return form.instance, None
+        return None, {field: list(errors) for field, errors in form.errors.items()}
+
+    def save_chunk(self, chunk, result):
+        manager = self.model._default_manager.db_manager(self.using)
+        try:
+            with transaction.atomic(using=manager.db):
+                manager.bulk_create([instance for line, instance in chunk])
+        except DatabaseError:
+            self.save_rows(chunk, result)
+        else:
+            result.created += len(chunk)
+
+    def save_rows(self, chunk, result):
+        """ Insert a failed chunk row by row, each in a savepoint, to report the faulty rows only """
+        manager = self.model._default_manager.db_manager(self.using)
+        with transaction.atomic(using=manager.db):
+            for line, instance in chunk:
+                try:
+                    with transaction.atomic(using=manager.db):
+                        manager.bulk_create([instance])
+                except DatabaseError as err:
+                    result.add_error(line, {NON_FIELD_ERRORS: [str(err)]})
+                else:
+                    result.created += 1
+
+    def run(self, fileobj, encoding='utf-8-sig'):
+        result = ImportResult(self.max_errors)
+        chunk = []
+        try:
+            for line, row in self.read_rows(fileobj, encoding):
+                instance, errors = self.validate_row(row)
+                if errors:
+                    result.add_error(line, errors)
+                    continue
+                chunk.append((line, instance))
+                if len(chunk) >= self.chunk_size:
+                    self.save_chunk(chunk, result)
+                    chunk = []
+        except (csv.Error, UnicodeDecodeError) as err:
+            result.add_error(None, {NON_FIELD_ERRORS: [str(err)]})
+        if chunk:
+            self.save_chunk(chunk, result)
+        return result
@@ -0,0 +1,187 @@
+"""
+Derive the query shapes an IndexView generates for a ModelSite (ordering,
+filterset fields and the foreign key lookups they imply) and suggest the
+``Meta.indexes`` that would support them.
+"""
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Index, Q
+from django.urls import get_resolver, URLPattern, URLResolver
+
+from .options import ModelSite
+
+# Lookups a b-tree index can serve
+INDEXABLE_LOOKUPS = {'exact', 'in', 'gt', 'gte', 'lt', 'lte', 'range', 'startswith', 'isnull'}
+
+
+class Suggestion:
+    def __init__(self, model, fields, reason, condition=None):
+        self.model = model
+        self.fields = list(fields)
+        self.reasons = [reason]
+        self.condition = condition
+
+    def get_index(self):
+        # Partial indexes must be named, the name is replaced right after
+        index = Index(fields=self.fields, name='partial', condition=self.condition)
+        index.set_name_with_model(self.model)
+        return index
+
+    def __repr__(self):
+        index = self.get_index()
+        condition = ''
+        if self.condition is not None:
+            condition = ', condition=models.Q(%s)' % ', '.join(
+                '%s=%r' % child for child in self.condition.children)
+        return 'models.Index(fields=%r, name=%r%s)' % (index.fields, index.name, condition)
+
+
+def iter_modelsites(urlconf=None):
+    """ Yield every ModelSite instance routed in ``urlconf`` once """
+    seen = set()
+    patterns = list(get_resolver(urlconf).url_patterns)
+    while patterns:
+        pattern = patterns.pop(0)
+        if isinstance(pattern, URLResolver):
+            patterns.extend(pattern.url_patterns)
+        elif isinstance(pattern, URLPattern):
+            modelsite = getattr(pattern.callback, '__self__', None)
+            if isinstance(modelsite, ModelSite) and id(modelsite) not in seen:
+                seen.add(id(modelsite))
+                yield modelsite
+
+
+def get_existing_indexes(model):
+    """ Column lists of every index the database will have for ``model`` """
+    opts = model._meta
+    indexes = []
+    for field in opts.local_fields:
+        if field.primary_key or field.unique or field.db_index:
+            indexes.append([field.name])
+    for index in opts.indexes:
+        indexes.append([name.lstrip('-') for name in index.fields])
+    for fields in list(opts.unique_together) + list(opts.index_together):
+        indexes.append(list(fields))
+    return indexes
+
+
+def is_covered(model, fields):
+    for index in get_existing_indexes(model):
+        if index[:len(fields)] == fields:
+            return True
+    return False
+
+
+def resolve_path(model, path):
+    """
+    Follow ``path`` (``person__name__startswith``) through relations and
+    return the model and field name holding the column, and the lookup.
+    """
+    parts = path.split('__')
+    field = relation = None
+    for position, part in enumerate(parts):
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            if field is not None:
+                return model, field.name, '__'.join(parts[position:])
+            if relation is not None:
+                return relation[0], relation[1].name, '__'.join(parts[position:])
+            return None, None, None
+        if not field.concrete:
+            return None, None, None
+        if field.is_relation and position < len(parts) - 1:
+            if not (field.many_to_one or field.one_to_one):
+                return None, None, None
+            relation = (model, field)
+            model = field.related_model
+            field = None
+    return model, field.name, 'exact'
+
+
+def get_filter_lookups(modelsite):
+    fields = modelsite.filterset_fields or []
+    if isinstance(fields, dict):
+        return list(fields.items())
+    return [(name, ['exact']) for name in fields]
+
+
+def get_ordering_fields(modelsite):
+    """ Local ordering columns, the primary key alone needs no index """
+    model = modelsite.model
+    ordering = []
+    for name in modelsite.ordering or model._meta.ordering or []:
+        if not isinstance(name, str) or name == '?':
+            break
+        name = name.lstrip('-')
+        if name == 'pk':
+            name = model._meta.pk.name
+        target, field_name, lookup = resolve_path(model, name)
+        if target is not model or lookup != 'exact':
+            break
+        ordering.append(field_name)
+    if ordering == [model._meta.pk.name]:
+        return []
+    return ordering
+
+
+def get_sort_fields(modelsite):
+    """ Local columns of the sortable_by columns, sorted along the primary key """
+    model = modelsite.model
+    order_fields = {
+        column.name: column.order_field for column in modelsite.get_result_columns()
+    }
+    fields = []
+    for name in modelsite.sortable_by or []:
+        target, field_name, lookup = resolve_path(model, order_fields.get(name) or '')
+        if target is model and lookup == 'exact':
+            fields.append(field_name)
+    return fields
+
+
+def suggest_indexes(modelsite):
+    """
+    Return the ``Suggestion``s not covered by the existing indexes. In trash
+    mode the site only reads the rows not trashed so the indexes of the model
+    are partial, and ``trashed_at`` is indexed over the trash for the purge.
+    """
+    model = modelsite.model
+    ordering = get_ordering_fields(modelsite)
+    condition = Q(is_trash=False) if modelsite.trash_enabled else None
+    shapes = []
+    if ordering:
+        shapes.append((model, ordering, 'ordering %s' % ', '.join(ordering), condition))
+    for field_name in get_sort_fields(modelsite):
+        shapes.append((model, [field_name], 'sort by %s' % field_name, condition))
+
+    for path, lookups in get_filter_lookups(modelsite):
+        target, field_name, lookup = resolve_path(model, path)
+        if target is None:
+            continue
+        lookups = [lookup] if lookup != 'exact' else lookups
+        if not INDEXABLE_LOOKUPS.intersection(lookups):
+            continue
+        if target is model:
+            fields = [field_name] + [name for name in ordering if name != field_name]
+            reason = 'filter %s then ordering' if ordering else 'filter %s'
+            shapes.append((model, fields, reason % path, condition))
+        else:
+            shapes.append((target, [field_name], 'filter %s' % path, None))
+    if modelsite.trash_enabled:
+        shapes.append((model, ['trashed_at'], 'purge of the trash', Q(is_trash=True)))
+
+    suggestions = []
+    for target, fields, reason, condition in shapes:
+        if is_covered(target, fields):
+            continue
+        for suggestion in suggestions:
+            same_model = suggestion.model is target and suggestion.condition == condition
+            if same_model and suggestion.fields[:len(fields)] == fields:
+                suggestion.reasons.append(reason)
+                break
+            if same_model and fields[:len(suggestion.fields)] == suggestion.fields:
+                suggestion.fields = fields
+                suggestion.reasons.append(reason)
+                break
+        else:
+            suggestions.append(Suggestion(target, fields, reason, condition))
+    return suggestions
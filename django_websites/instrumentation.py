@@ -0,0 +1,235 @@
+"""
+Opt-in timing of ModelSite views.
+
+Enable it for every site with ``WEBSITE_INSTRUMENTATION = True`` or per site
+with ``ModelSite.instrumentation_enabled``. Each request produces a ``Sample``
+which is kept in an in-process ring buffer (see ``stats``) and sent with the
+``view_instrumented`` signal so exporters can forward it elsewhere::
+
+    @receiver(view_instrumented)
+    def export(sender, sample, **kwargs):
+        statsd.timing('sites.%s.%s' % (sample.model, sample.action), sample.duration)
+"""
+import math
+import threading
+import time
+from contextlib import ExitStack
+from collections import deque, namedtuple
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import PermissionDenied
+from django.db import connections
+from django.http import Http404
+from django.dispatch import Signal
+
+# Sent with ``sample`` after each instrumented request
+view_instrumented = Signal()
+
+Sample = namedtuple('Sample', [
+    'namespace', 'model', 'action', 'status_code', 'duration',
+    'queries', 'query_time', 'render_time', 'response_size', 'timestamp'
+])
+
+# Upper bounds (ms) of the latency histogram buckets
+HISTOGRAM_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, float('inf'))
+
+
+def is_enabled(modelsite):
+    enabled = getattr(modelsite, 'instrumentation_enabled', None)
+    if enabled is None:
+        return getattr(settings, 'WEBSITE_INSTRUMENTATION', False)
+    return enabled
+
+
+def percentile(values, percent):
+    """ Nearest-rank percentile of already sorted ``values`` """
+    if not values:
+        return None
+    index = max(0, math.ceil(percent / 100.0 * len(values)) - 1)
+    return values[min(index, len(values) - 1)]
+
+
+class QueryCounter:
+    """ Database execute wrapper counting queries and their duration """
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+
+
+class StatsBuffer:
+    """
+    Keep the last ``maxlen`` samples of every (namespace, model, action)
+    and aggregate them on demand.
+    """
+
+    def __init__(self, maxlen=None):
+        self.maxlen = maxlen
+        self.lock = threading.Lock()
+        self.buffers = {}
+
+    def get_maxlen(self):
+        return self.maxlen or getattr(settings, 'WEBSITE_INSTRUMENTATION_BUFFER_SIZE', 1000)
+
+    def record(self, sample):
+        key = (sample.namespace, sample.model, sample.action)
+        buffer = self.buffers.get(key)
+        if buffer is None:
+            with self.lock:
+                buffer = self.buffers.setdefault(key, deque(maxlen=self.get_maxlen()))
+        buffer.append(sample)
+
+    def clear(self):
+        with self.lock:
+            self.buffers = {}
+
+    def get_histogram(self, durations):
+        histogram = []
+        position = 0
+        for bound in HISTOGRAM_BUCKETS:
+            count = 0
+            while position < len(durations) and durations[position] <= bound:
+                count += 1
+                position += 1
+            histogram.append(('+Inf' if bound == float('inf') else bound, count))
+        return histogram
+
+    def summarize(self, samples):
+        count = len(samples)
+        durations = sorted(s.duration for s in samples)
+        return {
+            'count': count,
+            'p50': percentile(durations, 50),
+            'p90': percentile(durations, 90),
+            'p99': percentile(durations, 99),
+            'max': durations[-1],
+            'histogram': self.get_histogram(durations),
+            'queries': sum(s.queries for s in samples) / count,
+            'query_time': sum(s.query_time for s in samples) / count,
+            'render_time': sum(s.render_time for s in samples) / count,
+            'response_size': sum(s.response_size for s in samples) / count,
+        }
+
+    def summary(self):
+        with self.lock:
+            items = [(key, list(buffer)) for key, buffer in self.buffers.items()]
+        results = []
+        for (namespace, model, action), samples in sorted(items):
+            if not samples:
+                continue
+            result = {'namespace': namespace, 'model': model, 'action': action}
+            result.update(self.summarize(samples))
+            results.append(result)
+        return results
+
+
+stats = StatsBuffer()
+
+
+class Measurement:
+    """ Queries and durations of one request, recorded once as a ``Sample`` """
+
+    def __init__(self, modelsite, action):
+        self.modelsite = modelsite
+        self.action = action
+        self.counter = QueryCounter()
+        self.render_time = 0.0
+        self.start = time.perf_counter()
+
+    def count_queries(self):
+        stack = ExitStack()
+        for conn in connections.all():
+            stack.enter_context(conn.execute_wrapper(self.counter))
+        return stack
+
+    def record(self, status_code, response=None):
+        size = 0
+        if response is not None and not response.streaming:
+            size = len(response.content)
+        sample = Sample(
+            namespace=self.modelsite.get_namespace(),
+            model=self.modelsite.opts.label_lower,
+            action=self.action,
+            status_code=status_code,
+            duration=(time.perf_counter() - self.start) * 1000,
+            queries=self.counter.count,
+            query_time=self.counter.duration * 1000,
+            render_time=self.render_time * 1000,
+            response_size=size,
+            timestamp=time.time(),
+        )
+        stats.record(sample)
+        view_instrumented.send(sender=self.modelsite.__class__, sample=sample)
+
+
+def instrument_render(response, measurement):
+    """
+    Time the deferred rendering of a TemplateResponse, still rendered by the
+    handler after the template response middleware. Post render callbacks run
+    inside ``render()`` and not at all when it fails, so ``render`` itself is
+    wrapped and the sample recorded once it's done.
+    """
+    render = response.render
+
+    def instrumented_render():
+        start = time.perf_counter()
+        rendered = None
+        try:
+            with measurement.count_queries():
+                rendered = render()
+            return rendered
+        finally:
+            measurement.render_time += time.perf_counter() - start
+            if rendered is None:
+                measurement.record(500)
+            else:
+                measurement.record(rendered.status_code, rendered)
+
+    response.render = instrumented_render
+
+
+def get_exception_status(exc):
+    if isinstance(exc, Http404):
+        return 404
+    if isinstance(exc, PermissionDenied):
+        return 403
+    return 500
+
+
+def instrument_view(view, modelsite, action):
+    """
+    Wrap a view function returned by ``as_view`` so object lookup, dispatch
+    and template rendering are timed, including the requests ending with an
+    exception. Durations are in milliseconds.
+    """
+
+    @wraps(view)
+    def instrumented(request, *args, **kwargs):
+        measurement = Measurement(modelsite, action)
+        response = None
+        status_code = 500
+        try:
+            with measurement.count_queries():
+                response = view(request, *args, **kwargs)
+        except Exception as exc:
+            status_code = get_exception_status(exc)
+            raise
+        finally:
+            if response is None:
+                measurement.record(status_code)
+        if hasattr(response, 'render') and not response.is_rendered:
+            instrument_render(response, measurement)
+        else:
+            measurement.record(response.status_code, response)
+        return response
+
+    return instrumented
@@ -0,0 +1,68 @@
+"""
+Jinja2 environment for the ``sites/*`` templates shipped in ``jinja2/``.
+
+    TEMPLATES = [
+        ...,
+        {
+            'BACKEND': 'django.template.backends.jinja2.Jinja2',
+            'APP_DIRS': True,
+            'OPTIONS': {'environment': 'django_websites.jinja.environment'},
+        },
+    ]
+
+then select the engine per site with ``ModelSite.template_engine = 'jinja2'``
+(the engine NAME). The template tags of the Django templates are globals::
+
+    {% set links = page_links() %}
+    <a href="?{{ replace_param(page=3) }}">3</a>
+"""
+from django.templatetags.static import static
+from django.urls import reverse
+from django.utils.translation import gettext, ngettext
+from jinja2 import Environment
+
+try:
+    from jinja2 import pass_context
+except ImportError:
+    # Jinja2 < 3.0
+    from jinja2 import contextfunction as pass_context
+
+from .pagination import get_page_range
+from .templatetags import formutils_tags, menu_tags, pagination_tags
+
+
+@pass_context
+def replace_param(context, **kwargs):
+    return pagination_tags.replace_param(context, **kwargs)
+
+
+@pass_context
+def page_links(context, page_param='page', neighbors=3):
+    return pagination_tags.page_links(context, page_param, neighbors)
+
+
+@pass_context
+def site_menu(context):
+    return menu_tags.site_menu(context)
+
+
+def url(name, *args, **kwargs):
+    return reverse(name, args=args, kwargs=kwargs)
+
+
+def environment(**options):
+    env = Environment(**options)
+    env.globals.update({
+        '_': gettext,
+        'gettext': gettext,
+        'ngettext': ngettext,
+        'static': static,
+        'url': url,
+        'replace_param': replace_param,
+        'page_links': page_links,
+        'proper_paginate': get_page_range,
+        'site_menu': site_menu,
+        'is_checkbox': formutils_tags.is_checkbox,
+        'is_textarea': formutils_tags.is_textarea,
+    })
+    return env
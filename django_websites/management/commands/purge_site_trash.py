@@ -0,0 +1,57 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import ProtectedError
+from django.utils import timezone
+
+from django_websites.registry import registry
+
+
+class Command(BaseCommand):
+    help = (
+        "Permanently delete the rows trashed by ModelSites in trash mode, in "
+        "small batches so it can run off-peak without long locks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'models', nargs='*', metavar='app_label.ModelName',
+            help='Only purge these models.')
+        parser.add_argument(
+            '--days', type=int, default=30,
+            help='Only purge rows trashed more than this many days ago (default 30).')
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='Rows deleted per transaction (default 500).')
+        parser.add_argument(
+            '--pause', type=float, default=0.5,
+            help='Seconds to sleep between batches (default 0.5).')
+
+    def get_modelsites(self, labels):
+        modelsites = {}
+        for modelsite in registry.get_modelsites():
+            if modelsite.trash_enabled:
+                modelsites.setdefault(modelsite.model, modelsite)
+        if labels:
+            labels = {label.lower() for label in labels}
+            unknown = labels - {model._meta.label_lower for model in modelsites}
+            if unknown:
+                raise CommandError('No ModelSite in trash mode for %s.' % ', '.join(sorted(unknown)))
+            return [site for model, site in modelsites.items() if model._meta.label_lower in labels]
+        return list(modelsites.values())
+
+    def handle(self, *args, **options):
+        older_than = timezone.now() - timedelta(days=options['days'])
+        for modelsite in self.get_modelsites(options['models']):
+            try:
+                deleted = modelsite.get_trash_queryset().purge(
+                    batch_size=options['batch_size'],
+                    older_than=older_than,
+                    pause=options['pause'],
+                )
+            except ProtectedError as err:
+                # The batches before the protected rows are already deleted
+                self.stderr.write('%s: purge stopped, %s' % (modelsite.opts.label, err.args[0]))
+                continue
+            if options['verbosity']:
+                self.stdout.write('%s: %s rows deleted' % (modelsite.opts.label, deleted))
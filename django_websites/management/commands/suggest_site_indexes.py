@@ -0,0 +1,94 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import migrations
+from django.db.migrations.autodetector import MigrationAutodetector
+from django.db.migrations.loader import MigrationLoader
+from django.db.migrations.writer import MigrationWriter
+
+from django_websites.indexes import iter_modelsites, suggest_indexes
+from django_websites.registry import registry
+
+
+class Command(BaseCommand):
+    help = (
+        "Suggest Meta.indexes supporting the ordering and filters of every "
+        "registered ModelSite, optionally writing them as migrations."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--urlconf', default=None,
+            help='Walk the ModelSites routed in this URLconf instead of the registry.')
+        parser.add_argument(
+            '--write-migration', action='store_true',
+            help=(
+                'Write an AddIndex migration in each app that needs indexes. Add the '
+                'printed Meta.indexes to the models too, or the next makemigrations '
+                'removes them.'))
+        parser.add_argument(
+            '--name', default='site_indexes',
+            help='Name suffix of the written migrations.')
+
+    def get_suggestions(self, urlconf):
+        suggestions = {}
+        if urlconf:
+            modelsites = iter_modelsites(urlconf)
+        else:
+            modelsites = registry.get_modelsites()
+        for modelsite in modelsites:
+            for suggestion in suggest_indexes(modelsite):
+                key = (suggestion.model, tuple(suggestion.fields))
+                if key in suggestions:
+                    suggestions[key].reasons.extend(suggestion.reasons)
+                else:
+                    suggestions[key] = suggestion
+        return list(suggestions.values())
+
+    def handle(self, *args, **options):
+        suggestions = self.get_suggestions(options['urlconf'])
+        if not suggestions:
+            self.stdout.write('No missing indexes.')
+            return
+
+        by_model = {}
+        for suggestion in suggestions:
+            by_model.setdefault(suggestion.model, []).append(suggestion)
+        for model, items in by_model.items():
+            self.stdout.write(self.style.MIGRATE_HEADING('%s.Meta.indexes' % model._meta.label))
+            for suggestion in items:
+                self.stdout.write('    %r,' % suggestion)
+                self.stdout.write('        # %s' % '; '.join(suggestion.reasons))
+
+        if options['write_migration']:
+            by_app = {}
+            for suggestion in suggestions:
+                by_app.setdefault(suggestion.model._meta.app_label, []).append(suggestion)
+            for app_label, items in by_app.items():
+                self.write_migration(app_label, items, options['name'])
+            self.stdout.write(self.style.WARNING(
+                'Add the Meta.indexes above to the models, otherwise the next '
+                'makemigrations generates a RemoveIndex for each of them.'))
+
+    def write_migration(self, app_label, suggestions, name):
+        loader = MigrationLoader(None, ignore_no_migrations=True)
+        if app_label not in loader.migrated_apps:
+            raise CommandError("App '%s' has no migrations module." % app_label)
+        leaf_nodes = loader.graph.leaf_nodes(app_label)
+        if len(leaf_nodes) > 1:
+            raise CommandError("App '%s' has conflicting migrations, merge them first." % app_label)
+        number = 1
+        if leaf_nodes:
+            number = (MigrationAutodetector.parse_number(leaf_nodes[0][1]) or 0) + 1
+
+        migration = migrations.Migration('%04d_%s' % (number, name), app_label)
+        migration.dependencies = list(leaf_nodes)
+        migration.operations = [
+            migrations.AddIndex(suggestion.model._meta.model_name, suggestion.get_index())
+            for suggestion in suggestions
+        ]
+        writer = MigrationWriter(migration)
+        os.makedirs(os.path.dirname(writer.path), exist_ok=True)
+        with open(writer.path, 'w') as fh:
+            fh.write(writer.as_string())
+        self.stdout.write(self.style.SUCCESS('Wrote %s' % writer.path))
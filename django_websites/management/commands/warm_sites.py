@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from django_websites.warmup import warm_sites
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the warm-up (templates, URLs, FilterSet and ModelForm classes, "
+        "permission codenames...) of every registered ModelSite. A timing tool "
+        "only: the caches are built in this command process, the server "
+        "processes are not warmed."
+    )
+
+    def handle(self, *args, **options):
+        total = 0.0
+        for result in warm_sites():
+            total += result.duration
+            for step, err in result.errors:
+                self.stderr.write('%s: %s failed: %s' % (result.label, step, err))
+            if options['verbosity']:
+                self.stdout.write('%s: %.1f ms' % (result.label, result.duration * 1000))
+        if options['verbosity']:
+            self.stdout.write('Total: %.1f ms' % (total * 1000))
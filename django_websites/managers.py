@@ -0,0 +1,57 @@
+"""
+Trash (soft delete) support for models carrying the ``is_trash``,
+``trashed_at`` and ``trashed_by`` columns.
+
+Trashing is a single UPDATE of those columns, the rows are hard deleted later
+by ``purge`` (``manage.py purge_site_trash``) in small batches so the delete
+cascades run off-peak.
+"""
+import time
+
+from django.db import models, transaction
+from django.utils import timezone
+
+
+class TrashQuerySet(models.QuerySet):
+
+    def active(self):
+        return self.filter(is_trash=False)
+
+    def trashed(self):
+        return self.filter(is_trash=True)
+
+    def trash(self, user=None):
+        return self.update(is_trash=True, trashed_at=timezone.now(), trashed_by=user)
+
+    def restore(self):
+        return self.update(is_trash=False, trashed_at=None, trashed_by=None)
+
+    def purge(self, batch_size=500, older_than=None, pause=0):
+        """
+        Hard delete the trashed rows (trashed before ``older_than``)
+        ``batch_size`` at a time, each batch in its own transaction with
+        ``pause`` seconds between batches. Return the number of rows deleted.
+        """
+        queryset = self.trashed()
+        if older_than is not None:
+            queryset = queryset.filter(trashed_at__lt=older_than)
+        queryset = queryset.order_by('trashed_at', 'pk')
+        deleted = 0
+        while True:
+            pks = list(queryset.values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return deleted
+            with transaction.atomic(using=self.db):
+                self.model._base_manager.using(self.db).filter(pk__in=pks).delete()
+            deleted += len(pks)
+            if len(pks) < batch_size:
+                return deleted
+            if pause:
+                time.sleep(pause)
+
+
+class TrashManager(models.Manager.from_queryset(TrashQuerySet)):
+    """ Manager hiding the trashed rows """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(is_trash=False)
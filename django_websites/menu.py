@@ -0,0 +1,142 @@
+"""
+Navigation menu of the registered ModelSites.
+
+The menu of a user is built once by walking the registry and checking the
+list permission of every site, then cached by user id, language and a
+permissions version. The version is bumped whenever groups or permissions
+change, or a user's groups, permissions or ``is_superuser``, ``is_staff`` and
+``is_active`` flags change, so cached menus are never stale. Other user saves
+(last login, profile fields) keep the cached menus.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.db.models.signals import post_init, post_save, post_delete, m2m_changed
+from django.urls import get_script_prefix
+from django.utils import translation
+
+from .registry import registry
+
+VERSION_CACHE_KEY = 'django_websites:menu:version'
+USER_FLAGS = ('is_superuser', 'is_staff', 'is_active')
+
+
+def get_timeout():
+    return getattr(settings, 'WEBSITE_MENU_CACHE_TIMEOUT', 300)
+
+
+def get_permissions_version():
+    version = cache.get(VERSION_CACHE_KEY)
+    if version is None:
+        version = 1
+        cache.add(VERSION_CACHE_KEY, version, None)
+    return version
+
+
+def bump_permissions_version(**kwargs):
+    try:
+        cache.incr(VERSION_CACHE_KEY)
+    except ValueError:
+        cache.set(VERSION_CACHE_KEY, 2, None)
+
+
+def get_user_flags(instance):
+    # Read from __dict__ so deferred fields are not loaded
+    return tuple(instance.__dict__.get(name) for name in USER_FLAGS)
+
+
+def user_initialized(sender, instance, **kwargs):
+    instance._websites_menu_flags = get_user_flags(instance)
+
+
+def user_saved(sender, instance, created=False, update_fields=None, **kwargs):
+    """ Bump the version when the permission flags of an existing user changed """
+    flags = get_user_flags(instance)
+    previous = getattr(instance, '_websites_menu_flags', None)
+    instance._websites_menu_flags = flags
+    if created:
+        # No menu is cached for a new user
+        return
+    if update_fields is not None and not set(update_fields) & set(USER_FLAGS):
+        return
+    if previous is None or None in previous or previous != flags:
+        bump_permissions_version()
+
+
+def get_cache_key(user):
+    return 'django_websites:menu:%s:%s:%s:%s' % (
+        get_permissions_version(), user.pk, translation.get_language(), get_script_prefix())
+
+
+def user_can_see(modelsite, user):
+    if not modelsite.index_view_enabled:
+        return False
+    if modelsite.index_view_is_public:
+        return True
+    return modelsite.permission_helper.user_can_list(user)
+
+
+def get_site_item(modelsite):
+    return {
+        'label': str(modelsite.get_menu_label()),
+        'icon': modelsite.get_menu_icon(),
+        'url': modelsite.url_helper.index_url,
+        'namespace': modelsite.get_namespace(),
+        'model_name': modelsite.opts.model_name,
+    }
+
+
+def build_menu(user):
+    """ Return the menu items ``user`` can see, groups hold their sites as children """
+    menu = []
+    grouped = set()
+    for group in registry.groups:
+        children = []
+        for modelsite in group.get_modelsite_instance():
+            grouped.add(id(modelsite))
+            if user_can_see(modelsite, user):
+                children.append(get_site_item(modelsite))
+        if children:
+            menu.append({
+                'label': str(group.menu_label or group.namespace.title()),
+                'icon': group.menu_icon,
+                'url': children[0]['url'],
+                'namespace': group.namespace,
+                'children': children,
+            })
+    for modelsite in registry.get_modelsites():
+        if id(modelsite) not in grouped and user_can_see(modelsite, user):
+            menu.append(dict(get_site_item(modelsite), children=[]))
+    return menu
+
+
+def get_menu(user):
+    """ Cached ``build_menu``, anonymous users only see public sites """
+    if not user.is_authenticated:
+        return build_menu(user)
+    key = get_cache_key(user)
+    menu = cache.get(key)
+    if menu is None:
+        menu = build_menu(user)
+        cache.set(key, menu, get_timeout())
+    return menu
+
+
+def connect_signals():
+    User = get_user_model()
+    post_init.connect(user_initialized, sender=User, dispatch_uid='websites_menu_user_initialized')
+    post_save.connect(user_saved, sender=User, dispatch_uid='websites_menu_user_saved')
+    for model in (User, Group, Permission):
+        uid = 'websites_menu_%s' % model._meta.label_lower
+        if model is not User:
+            post_save.connect(bump_permissions_version, sender=model, dispatch_uid=uid + '_saved')
+        post_delete.connect(bump_permissions_version, sender=model, dispatch_uid=uid + '_deleted')
+    throughs = [Group.permissions.through]
+    for name in ('groups', 'user_permissions'):
+        if hasattr(User, name):
+            throughs.append(getattr(User, name).through)
+    for through in throughs:
+        m2m_changed.connect(
+            bump_permissions_version, sender=through,
+            dispatch_uid='websites_menu_%s' % through._meta.label_lower)
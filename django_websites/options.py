@@ -1,13 +1,21 @@
 from django.db.models import Model
+from django.forms import modelform_factory
 from django.core.exceptions import ImproperlyConfigured
 from django.conf import settings
 from django.conf.urls import url, include
+from django.urls import get_script_prefix, path
+from django.utils.module_loading import import_string
 
 from .helpers import SitePermissionHelper, ButtonHelper, SiteURLHelper
+from .autocomplete import (
+    AutocompleteMixin, AutocompleteSelect, AutocompleteSelectMultiple, get_relation_field,
+)
+from . import assets, facets
 from .filters import custom_filterset_factory
-from .views import IndexView, CreateView, InspectView, EditView, DeleteView
+from .managers import TrashManager, TrashQuerySet
 
 WEBSITE_LIST_PER_PAGE = getattr(settings, 'WEBSITE_LIST_PER_PAGE', 15)
+WEBSITE_URL_ROUTING = getattr(settings, 'WEBSITE_URL_ROUTING', 'regex')
 
 
 class ModelSite:
@@ -16,13 +24,44 @@ class ModelSite:
     menu_icon = ''
     menu_label = ''
     select_related = None
+    instrumentation_enabled = None
 
-    # Index Display
+    # Either 'regex' (url() patterns) or 'path' (path() with a pk converter
+    # matching the model pk), defaults to WEBSITE_URL_ROUTING
+    url_routing = None
+    slow_query_threshold = None
+
+    # Databases of the reading views (read_actions answering GET) and of
+    # everything else, None for the default routing. Needs
+    # 'django_websites.routing.SiteRouter' in DATABASE_ROUTERS.
+    read_using = None
+    write_using = None
+    read_actions = ('index', 'inspect', 'autocomplete', 'trash')
+
+    # Index Display, the ordering always ends with the primary key
     ordering = ['id']
     list_display = []
+    # list_display items the user can sort by, None for the columns an index
+    # serves (see sorting)
+    sortable_by = None
+    unindexed_sort_limit = None
+    # Formatter name (see utils.formatters) or callable per list_display item
+    list_formatters = {}
+    empty_value_display = '-'
     list_per_page = None
     filterset_fields = None
     filterset_class = None
+    # Show the count of every choice of the choice filters
+    facets_enabled = True
+
+    # Foreign key filters and the relations in autocomplete_fields are
+    # searched through the autocomplete endpoint, by default on the first
+    # CharField of the related model
+    autocomplete_fields = []
+    autocomplete_search_fields = {}
+    autocomplete_lookup = 'startswith'
+    autocomplete_limit = 20
+    autocomplete_view_class = 'django_websites.views.AutocompleteView'
 
     # Form
     fields = []
@@ -34,38 +73,64 @@ class ModelSite:
     index_meta_title = None
     index_view_is_public = False
     index_view_enabled = True
-    index_view_class = IndexView
+    index_view_class = 'django_websites.views.IndexView'
     index_view_template_names = None
+    index_view_fragment_template_names = None
 
     inspect_page_title = None
     inspect_page_subtitle = None
     inspect_meta_title = None
     inspect_view_is_public = False
     inspect_view_enabled = False
-    inspect_view_class = InspectView
+    inspect_view_class = 'django_websites.views.InspectView'
     inspect_view_template_names = None
 
     create_page_title = None
     create_page_subtitle = None
     create_meta_title = None
     create_view_enabled = False
-    create_view_class = CreateView
+    create_view_class = 'django_websites.views.CreateView'
     create_view_template_names = None
 
     edit_page_title = None
     edit_page_subtitle = None
     edit_meta_title = None
     edit_view_enabled = False
-    edit_view_class = EditView
+    edit_view_class = 'django_websites.views.EditView'
     edit_view_template_names = None
 
     delete_page_title = None
     delete_page_subtitle = None
     delete_meta_title = None
     delete_view_enabled = False
-    delete_view_class = DeleteView
+    delete_view_class = 'django_websites.views.DeleteView'
     delete_view_template_names = None
 
+    import_view_enabled = False
+    import_view_class = 'django_websites.views.ImportView'
+    import_view_template_names = None
+    # Rows validated then inserted per transaction
+    import_chunk_size = 500
+
+    # Soft delete, the model needs the is_trash, trashed_at and trashed_by
+    # fields. Deleting sets them and the site only shows the other rows.
+    trash_enabled = False
+    trash_view_class = 'django_websites.views.TrashView'
+    trash_view_template_names = None
+
+    # Static files of the views, bundled into one CSS and one JS file per
+    # view (see assets)
+    index_view_extra_css = []
+    index_view_extra_js = []
+    form_view_extra_css = []
+    form_view_extra_js = []
+    inspect_view_extra_css = []
+    inspect_view_extra_js = []
+
+    # NAME of the template engine rendering the views, None for the first
+    # engine having the template. The app ships Jinja2 templates, see jinja.
+    template_engine = None
+
     # Helper
     permission_helper_class = SitePermissionHelper
     button_helper_class = ButtonHelper
@@ -81,9 +146,28 @@ class ModelSite:
         self.opts = self.model._meta
         self.permission_helper = self.get_permission_helper_class()(self)
         self.url_helper = self.get_url_helper_class()(self)
+        self._media = {}
+        self._modelform_classes = {}
+
+    def get_manager(self):
+        """ Manager of the rows shown by the site, trashed rows are hidden in trash mode """
+        if self.trash_enabled:
+            manager = TrashManager()
+            manager.model = self.model
+            return manager
+        return self.model._default_manager
+
+    def get_trash_queryset(self):
+        """ Every row, trashed or not, with the TrashQuerySet methods """
+        return TrashQuerySet(self.model)
+
+    def trash_instance(self, instance, user=None):
+        count = self.get_trash_queryset().filter(pk=instance.pk).trash(user)
+        facets.bump_version(self.model)
+        return count
 
     def get_queryset(self, request):
-        return self.model.objects.all()
+        return self.get_manager().all()
 
     def get_model(self):
         if not self.model:
@@ -93,12 +177,90 @@ class ModelSite:
     def get_fields(self):
         return self.fields
 
+    def get_list_display(self):
+        return self.list_display or ['__str__']
+
+    def get_result_columns(self):
+        """ list_display compiled to ``results.Column``s, once per instance """
+        columns = getattr(self, '_result_columns', None)
+        if columns is None:
+            from .results import compile_columns
+            columns = self._result_columns = compile_columns(self)
+        return columns
+
+    def get_ordering(self):
+        from .sorting import add_tiebreaker
+        return add_tiebreaker(self.model, self.ordering or self.model._meta.ordering or [])
+
+    def get_sort_columns(self):
+        """ ``sorting.SortColumn``s of the sortable columns by name, once per instance """
+        columns = getattr(self, '_sort_columns', None)
+        if columns is None:
+            from .sorting import compile_sort_columns
+            columns = self._sort_columns = compile_sort_columns(self)
+        return columns
+
     def get_form_class(self):
         return self.form_class
 
+    def get_modelform_class(self, fields):
+        """ ModelForm of ``fields`` with the autocomplete widgets, built once """
+        key = tuple(fields)
+        form_class = self._modelform_classes.get(key)
+        if form_class is None:
+            form_class = self._modelform_classes[key] = modelform_factory(
+                self.model, fields=fields, widgets=self.get_form_widgets())
+        return form_class
+
+    def get_form_widgets(self):
+        """ Autocomplete widgets of the autocomplete_fields for the generated ModelForm """
+        widgets = {}
+        for name in self.autocomplete_fields:
+            field = get_relation_field(self.model, name)
+            if field is None:
+                raise ImproperlyConfigured(
+                    "'%s' autocomplete_fields item '%s' is not a relation of '%s'." % (
+                        self.__class__.__name__, name, self.opts.label))
+            widget_class = AutocompleteSelectMultiple if field.many_to_many else AutocompleteSelect
+            widgets[name] = widget_class(self, name)
+        return widgets
+
+    def get_index_view_extra_css(self):
+        return self.index_view_extra_css
+
+    def get_index_view_extra_js(self):
+        return self.index_view_extra_js
+
+    def get_form_view_extra_css(self):
+        return self.form_view_extra_css
+
+    def get_form_view_extra_js(self):
+        return self.form_view_extra_js
+
+    def get_inspect_view_extra_css(self):
+        return self.inspect_view_extra_css
+
+    def get_inspect_view_extra_js(self):
+        return self.inspect_view_extra_js
+
+    def get_media(self, action):
+        """ Bundled media of the 'index', 'form' or 'inspect' views, built once per script prefix """
+        key = (action, get_script_prefix())
+        media = self._media.get(key)
+        if media is None:
+            media = self._media[key] = assets.build_site_media(self, action)
+        return media
+
     def get_namespace(self):
         return self.namespace or self.opts.app_label
 
+    def get_url_routing(self):
+        routing = self.url_routing or WEBSITE_URL_ROUTING
+        if routing not in ('regex', 'path'):
+            raise ImproperlyConfigured(
+                "'%s' url_routing must be 'regex' or 'path'." % self.__class__.__name__)
+        return routing
+
     def get_menu_label(self):
         return self.menu_label or self.opts.verbose_name_plural.title()
 
@@ -112,14 +274,27 @@ class ModelSite:
         if self.filterset_class:
             return self.filterset_class
         elif self.model:
-            return custom_filterset_factory(
-                model=self.model,
-                fields=self.filterset_fields
-            )
+            filterset_class = getattr(self, '_filterset_class', None)
+            if filterset_class is None:
+                filterset_class = self._filterset_class = custom_filterset_factory(
+                    model=self.model,
+                    fields=self.filterset_fields or [],
+                    modelsite=self,
+                )
+            return filterset_class
         else:
             msg = "'%s' must define 'filterset_class' or 'model'"
             raise ImproperlyConfigured(msg % self.__class__.__name__)
 
+    def get_autocomplete_fields(self):
+        """ Names of the relations searchable through the autocomplete endpoint """
+        names = list(self.autocomplete_fields)
+        for filter_ in self.get_filterset_class().base_filters.values():
+            widget = filter_.extra.get('widget')
+            if isinstance(widget, AutocompleteMixin) and widget.field_name not in names:
+                names.append(widget.field_name)
+        return names
+
     def get_permission_helper_class(self):
         return self.permission_helper_class
 
@@ -129,6 +304,19 @@ class ModelSite:
     def get_button_helper_class(self):
         return self.button_helper_class
 
+    def get_view_class(self, action):
+        """
+        Return the view class of ``action``, dotted paths are imported on
+        first use so views are only loaded for the sites actually routed to.
+        """
+        view_class = getattr(self, '%s_view_class' % action)
+        if isinstance(view_class, str):
+            view_class = import_string(view_class)
+        return view_class
+
+    def get_template_engine(self):
+        return self.template_engine
+
     def get_template_names(self, action):
         return [
             'sites/%s_%s_%s.html' % (self.namespace, self.opts.model_name, action),
@@ -144,6 +332,9 @@ class ModelSite:
     def get_index_template(self):
         return self.index_view_template_names or self.get_template_names('index')
 
+    def get_index_fragment_template(self):
+        return self.index_view_fragment_template_names or self.get_template_names('index_fragment')
+
     def get_inspect_template(self):
         return self.inspect_view_template_names or self.get_template_names('inspect')
 
@@ -156,72 +347,77 @@ class ModelSite:
     def get_delete_template(self):
         return self.delete_view_template_names or self.get_template_names('delete')
 
-    def get_urls(self):
+    def get_trash_template(self):
+        return self.trash_view_template_names or self.get_template_names('trash')
+
+    def get_import_template(self):
+        return self.import_view_template_names or self.get_template_names('import')
+
+    def make_url(self, action, specific, view, prefix=True):
         url_helper = self.url_helper
+        name = url_helper.get_url_name(action)
+        if url_helper.routing == 'path':
+            return path(url_helper.get_url_route(action, specific, prefix), view, name=name)
+        return url(url_helper.get_url_pattern(action, specific, prefix), view, name=name)
+
+    def get_urls(self, prefix=True):
         urls = []
         if self.create_view_enabled:
-            urls.append(
-                url(
-                    url_helper.get_url_pattern('create', specific=False),
-                    self.create_view, name=url_helper.get_url_name('create')
-                ),
-            )
-
+            urls.append(self.make_url('create', False, self.create_view, prefix))
+        if self.import_view_enabled:
+            urls.append(self.make_url('import', False, self.import_view, prefix))
+        if self.trash_enabled:
+            urls.append(self.make_url('trash', False, self.trash_view, prefix))
+        if self.index_view_enabled:
+            urls.append(self.make_url('autocomplete', False, self.autocomplete_view, prefix))
         if self.edit_view_enabled:
-            urls.append(
-                url(
-                    url_helper.get_url_pattern('edit', specific=True),
-                    self.edit_view, name=url_helper.get_url_name('edit')
-                ),
-            )
-
+            urls.append(self.make_url('edit', True, self.edit_view, prefix))
         if self.delete_view_enabled:
-            urls.append(
-                url(
-                    url_helper.get_url_pattern('delete', specific=True),
-                    self.delete_view, name=url_helper.get_url_name('delete')
-                ),
-            )
+            urls.append(self.make_url('delete', True, self.delete_view, prefix))
         if self.inspect_view_enabled:
-            urls.append(
-                url(
-                    url_helper.get_url_pattern('inspect', specific=True),
-                    self.inspect_view, name=url_helper.get_url_name('inspect')
-                )
-            )
+            urls.append(self.make_url('inspect', True, self.inspect_view, prefix))
         if self.index_view_enabled:
-            urls.append(
-                url(url_helper.get_url_pattern('index', specific=False),
-                    self.index_view,
-                    name=url_helper.get_url_name('index')
-                    )
-            )
-
+            urls.append(self.make_url('index', False, self.index_view, prefix))
         return urls
 
     def index_view(self, request):
         kwargs = {'modelsite': self}
-        view_class = self.index_view_class
+        view_class = self.get_view_class('index')
         return view_class.as_view(**kwargs)(request)
 
     def create_view(self, request):
         kwargs = {'modelsite': self}
-        view_class = self.create_view_class
+        view_class = self.get_view_class('create')
+        return view_class.as_view(**kwargs)(request)
+
+    def import_view(self, request):
+        kwargs = {'modelsite': self}
+        view_class = self.get_view_class('import')
+        return view_class.as_view(**kwargs)(request)
+
+    def trash_view(self, request):
+        kwargs = {'modelsite': self}
+        view_class = self.get_view_class('trash')
+        return view_class.as_view(**kwargs)(request)
+
+    def autocomplete_view(self, request):
+        kwargs = {'modelsite': self}
+        view_class = self.get_view_class('autocomplete')
         return view_class.as_view(**kwargs)(request)
 
     def inspect_view(self, request, instance_pk):
         kwargs = {'modelsite': self, 'instance_pk': instance_pk}
-        view_class = self.inspect_view_class
+        view_class = self.get_view_class('inspect')
         return view_class.as_view(**kwargs)(request)
 
     def edit_view(self, request, instance_pk):
         kwargs = {'modelsite': self, 'instance_pk': instance_pk}
-        view_class = self.edit_view_class
+        view_class = self.get_view_class('edit')
         return view_class.as_view(**kwargs)(request)
 
     def delete_view(self, request, instance_pk):
         kwargs = {'modelsite': self, 'instance_pk': instance_pk}
-        view_class = self.delete_view_class
+        view_class = self.get_view_class('delete')
         return view_class.as_view(**kwargs)(request)
 
 
@@ -235,19 +431,19 @@ class ModelSiteGroup:
         return self.items
 
     def get_modelsite_instance(self):
-        if bool(self.items):
-            sites = []
-            for modelsite in self.get_items():
-                sites.append(modelsite(namespace=self.namespace))
-            return sites
-        else:
-            return []
+        from .registry import registry
+        return [
+            registry.get_modelsite(modelsite, self.namespace)
+            for modelsite in self.get_items()
+        ]
 
     def get_urls(self):
-        urls = []
-        sites = self.get_modelsite_instance()
-        for site in sites:
-            urls.append(
-                url('', include(site.get_urls()))
-            )
+        urls = getattr(self, '_urls', None)
+        if urls is None:
+            urls = []
+            for site in self.get_modelsite_instance():
+                urls.append(
+                    url(site.url_helper.get_url_prefix(), include(site.get_urls(prefix=False)))
+                )
+            self._urls = urls
         return urls
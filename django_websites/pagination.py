@@ -0,0 +1,90 @@
+def get_page_range(paginator, current_page, neighbors=3):
+    """
+    Return the page numbers around ``current_page``, at most
+    ``2 * neighbors + 1`` of them, shifted so the window always stays
+    inside ``paginator.page_range``.
+    """
+    if paginator.num_pages > 2 * neighbors:
+        start_index = max(1, current_page - neighbors)
+        end_index = min(paginator.num_pages, current_page + neighbors)
+        if end_index < start_index + 2 * neighbors:
+            end_index = start_index + 2 * neighbors
+        elif start_index > end_index - 2 * neighbors:
+            start_index = end_index - 2 * neighbors
+        if start_index < 1:
+            end_index -= start_index
+            start_index = 1
+        elif end_index > paginator.num_pages:
+            start_index -= (end_index - paginator.num_pages)
+            end_index = paginator.num_pages
+        page_list = [f for f in range(start_index, end_index + 1)]
+        return page_list[:(2 * neighbors + 1)]
+    return paginator.page_range
+
+
+class PageLinks:
+    """
+    Build every link of a pagination bar from a single copy of the
+    request parameters.
+
+    The query string without the page parameter is normalized (empty
+    parameters removed) and encoded once, each link is then a plain
+    string concatenation of that prefix and the page number.
+    """
+    page_param = 'page'
+    neighbors = 3
+
+    def __init__(self, params, page_obj, page_param=None, neighbors=None):
+        self.page_obj = page_obj
+        self.paginator = page_obj.paginator
+        if page_param is not None:
+            self.page_param = page_param
+        if neighbors is not None:
+            self.neighbors = neighbors
+        self.prefix = self.get_prefix(params)
+
+    def get_prefix(self, params):
+        d = params.copy()
+        d.pop(self.page_param, None)
+        for k in [k for k, v in d.items() if not v]:
+            del d[k]
+        query = d.urlencode()
+        if query:
+            return '?%s&%s=' % (query, self.page_param)
+        return '?%s=' % self.page_param
+
+    def get_url(self, number):
+        return self.prefix + str(number)
+
+    @property
+    def first(self):
+        if self.page_obj.number == 1:
+            return None
+        return self.get_url(1)
+
+    @property
+    def previous(self):
+        if not self.page_obj.has_previous():
+            return None
+        return self.get_url(self.page_obj.previous_page_number())
+
+    @property
+    def next(self):
+        if not self.page_obj.has_next():
+            return None
+        return self.get_url(self.page_obj.next_page_number())
+
+    @property
+    def last(self):
+        if self.page_obj.number == self.paginator.num_pages:
+            return None
+        return self.get_url(self.paginator.num_pages)
+
+    @property
+    def pages(self):
+        current = self.page_obj.number
+        prefix = self.prefix
+        return [
+            {'number': i, 'url': prefix + str(i), 'is_current': i == current}
+            for i in get_page_range(self.paginator, current, self.neighbors)
+        ]
@@ -3,37 +3,78 @@
 # reference : https://stackoverflow.com/a/13952198
 # inspired by wagtail admin migrations
 
-from django.apps import apps
-from django.contrib.contenttypes.models import ContentType
-from django.contrib.auth.models import Permission
+from django.apps import apps as global_apps
+from django.db import DEFAULT_DB_ALIAS, transaction
+
+GLOBAL_APP_LABEL = 'global_permission'
+GLOBAL_MODEL = 'website'
+
+
+def get_models(apps=None):
+    apps = apps or global_apps
+    return apps.get_model('contenttypes', 'ContentType'), apps.get_model('auth', 'Permission')
+
+
+def sync_global_permissions(specs, prune=False, apps=None, using=DEFAULT_DB_ALIAS):
+    """
+    Make the global permissions match ``specs``, a ``{codename: name}`` dict or
+    an iterable of ``(codename, name)`` pairs. Missing permissions are created
+    and renamed ones updated in bulk, with ``prune`` the global permissions not
+    in ``specs`` are deleted. Pass the ``apps`` of a data migration to use the
+    historical models. Return the permissions by codename.
+    """
+    ContentType, Permission = get_models(apps)
+    specs = dict(specs)
+    with transaction.atomic(using=using):
+        # Add a fake content type to hang the permissions off.
+        content_type, created = ContentType.objects.using(using).get_or_create(
+            app_label=GLOBAL_APP_LABEL,
+            model=GLOBAL_MODEL
+        )
+        queryset = Permission.objects.using(using).filter(content_type=content_type).order_by()
+        existing = {perm.codename: perm for perm in queryset}
+
+        renamed = []
+        for codename, name in specs.items():
+            perm = existing.get(codename)
+            if perm is not None and perm.name != name:
+                perm.name = name
+                renamed.append(perm)
+        if renamed:
+            Permission.objects.using(using).bulk_update(renamed, ['name'])
+
+        missing = [
+            Permission(content_type=content_type, codename=codename, name=name)
+            for codename, name in specs.items() if codename not in existing
+        ]
+        if missing:
+            Permission.objects.using(using).bulk_create(missing)
+            # Not every backend sets the primary key on bulk_create
+            existing.update(
+                (perm.codename, perm)
+                for perm in queryset.filter(codename__in=[p.codename for p in missing])
+            )
+
+        if prune:
+            stale = set(existing) - set(specs)
+            if stale:
+                # This cascades to Group
+                queryset.filter(codename__in=stale).delete()
+    return {codename: existing[codename] for codename in specs}
 
 
 def create_global_permissions(name, codename):
-    # Add a fake content type to hang the permission off.
-    # The fact that this doesn't correspond to an actual defined model shouldn't matter, I hope...
-    fake_model_content_type, created = ContentType.objects.get_or_create(
-        app_label='global_permission',
-        model='website'
-    )
-
-    # Create custom permission
-    custom_permission, created = Permission.objects.get_or_create(
-        content_type=fake_model_content_type,
-        codename=codename,
-        name=name
-    )
-    return custom_permission
-
-
-def remove_global_permissions(codename):
-    """Reverse the above additions of permissions."""
-
-    fake_model_content_type = ContentType.objects.get(
-        app_label='global_permission',
-        model='website'
-    )
+    return sync_global_permissions({codename: name})[codename]
+
+
+def remove_global_permissions(codenames, apps=None, using=DEFAULT_DB_ALIAS):
+    """Reverse the above additions of permissions, ``codenames`` may be one or many."""
+    ContentType, Permission = get_models(apps)
+    if isinstance(codenames, str):
+        codenames = [codenames]
     # This cascades to Group
-    Permission.objects.filter(
-        content_type=fake_model_content_type,
-        codename=codename,
-    ).delete()
\ No newline at end of file
+    Permission.objects.using(using).filter(
+        content_type__app_label=GLOBAL_APP_LABEL,
+        content_type__model=GLOBAL_MODEL,
+        codename__in=list(codenames),
+    ).delete()
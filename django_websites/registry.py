@@ -0,0 +1,158 @@
+"""
+Central registry of ModelSites.
+
+Sites are registered in a ``sites.py`` module of any installed app, those
+modules are imported when the app registry is ready::
+
+    from django_websites.registry import register
+
+    @register
+    class PersonSite(ModelSite):
+        model = Person
+
+and routed by including ``registry.urls`` once in the URLconf::
+
+    urlpatterns = [
+        url(r'^sites/', include(registry.urls)),
+    ]
+
+without an instance namespace: the URL helpers and the asset bundles
+reverse the site URL names (``people_person_index``, ``websites_bundle``)
+globally.
+
+Each site is mounted at ``<namespace>/<model_name>/`` (one resolver per
+namespace, then one per site) so a request only walks the prefixes of its
+namespace, the asset bundles of the views are served under ``_assets/``.
+The site instance, view classes and URL patterns of a site are built the
+first time a request is resolved under its prefix, so resolving a request
+only builds the sites it walks through. The first ``reverse()`` in the
+process populates the whole URL resolver and builds every site, and
+rendering a site page reverses its URLs. In practice every site is built
+on the first page rendered. One instance per (site class, namespace)
+lives in the process and is shared by the URLconf, helpers and menus.
+"""
+import threading
+from collections import OrderedDict
+
+from django.conf.urls import url
+from django.core.exceptions import ImproperlyConfigured
+from django.urls.resolvers import RegexPattern, URLResolver
+from django.utils.module_loading import autodiscover_modules
+
+from .assets import BUNDLE_URL_NAME, bundle_view
+from .options import ModelSite, ModelSiteGroup
+
+
+def get_site_namespace(site_class, namespace=None):
+    return namespace or site_class.namespace or site_class.model._meta.app_label
+
+
+class LazySiteURLConf:
+    """ URLconf of one ModelSite, built on the first resolve or reverse """
+
+    def __init__(self, registry, site_class, namespace):
+        self.registry = registry
+        self.site_class = site_class
+        self.namespace = namespace
+
+    @property
+    def urlpatterns(self):
+        modelsite = self.registry.get_modelsite(self.site_class, self.namespace)
+        return modelsite.get_urls(prefix=False)
+
+    def __repr__(self):
+        return '<%s %s.%s>' % (self.__class__.__name__, self.namespace, self.site_class.__name__)
+
+
+class SiteRegistry:
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.sites = OrderedDict()
+        self.groups = []
+        self.instances = {}
+        self._urls = None
+
+    def register(self, site_class):
+        """ Register a ModelSite or ModelSiteGroup class, usable as decorator """
+        with self.lock:
+            if issubclass(site_class, ModelSiteGroup):
+                group = site_class()
+                self.groups.append(group)
+                for item in group.get_items():
+                    self.add_site(item, group.namespace)
+            elif issubclass(site_class, ModelSite):
+                self.add_site(site_class)
+            else:
+                raise ImproperlyConfigured(
+                    "'%s' must be a ModelSite or ModelSiteGroup subclass." % site_class.__name__)
+            self._urls = None
+        return site_class
+
+    def add_site(self, site_class, namespace=None):
+        namespace = get_site_namespace(site_class, namespace)
+        key = (site_class, namespace)
+        if key in self.sites:
+            raise ImproperlyConfigured(
+                "'%s' is already registered in namespace '%s'." % (site_class.__name__, namespace))
+        self.sites[key] = site_class
+
+    def is_registered(self, site_class, namespace=None):
+        return (site_class, get_site_namespace(site_class, namespace)) in self.sites
+
+    def get_modelsite(self, site_class, namespace=None):
+        """ Return the process wide instance of ``site_class`` """
+        key = (site_class, get_site_namespace(site_class, namespace))
+        modelsite = self.instances.get(key)
+        if modelsite is None:
+            with self.lock:
+                modelsite = self.instances.get(key)
+                if modelsite is None:
+                    modelsite = site_class(namespace=key[1])
+                    self.instances[key] = modelsite
+        return modelsite
+
+    def get_modelsites(self):
+        return [self.get_modelsite(site_class, namespace) for site_class, namespace in self.sites]
+
+    def get_modelsites_for_model(self, model):
+        return [
+            self.get_modelsite(site_class, namespace)
+            for site_class, namespace in self.sites if site_class.model is model
+        ]
+
+    def get_urls(self):
+        urls = self._urls
+        if urls is None:
+            with self.lock:
+                namespaces = OrderedDict()
+                for site_class, namespace in self.sites:
+                    prefix = r'^%s/' % site_class.model._meta.model_name
+                    namespaces.setdefault(namespace, []).append(URLResolver(
+                        RegexPattern(prefix),
+                        LazySiteURLConf(self, site_class, namespace)
+                    ))
+                urls = [
+                    url(r'^_assets/(?P<name>\w+\.(?:css|js))$', bundle_view, name=BUNDLE_URL_NAME)
+                ]
+                urls.extend(
+                    URLResolver(RegexPattern(r'^%s/' % namespace), site_urls)
+                    for namespace, site_urls in namespaces.items()
+                )
+                self._urls = urls
+        return urls
+
+    @property
+    def urls(self):
+        return self.get_urls()
+
+
+registry = SiteRegistry()
+
+
+def register(site_class):
+    return registry.register(site_class)
+
+
+def autodiscover():
+    autodiscover_modules('sites')
@@ -0,0 +1,231 @@
+"""
+Results table of the index view, driven by ``ModelSite.list_display``.
+
+Every ``list_display`` item is compiled once per ModelSite into a ``Column``:
+a label and an accessor (``attrgetter`` for fields and ``__`` paths through
+foreign keys, a dict lookup for choices, the callable itself for functions
+and ModelSite methods) plus an optional formatter from
+``ModelSite.list_formatters``. A page of objects is then turned into rows of
+plain tuples, one column at a time so formatters work on whole columns, and
+``html_rows`` renders the cells of a row in one go for the template loop.
+"""
+import datetime
+from operator import attrgetter
+
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.utils.formats import localize
+from django.utils.functional import cached_property
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+from django.utils.timezone import template_localtime
+from django.utils.text import capfirst
+
+from .utils.formatters import ColumnFormatter, get_formatter
+
+
+class Column:
+    def __init__(self, name, label, accessor, formatter=None, select_related=None,
+                 order_field=None):
+        self.name = name
+        self.label = label
+        self.accessor = accessor
+        self.formatter = formatter
+        self.select_related = select_related
+        # Lookup the column is sorted by, None if it can't be
+        self.order_field = order_field
+
+    def get_values(self, objects, empty_value):
+        values = [self.accessor(obj) for obj in objects]
+        if self.formatter is not None:
+            filled = [value for value in values if value is not None]
+            formatted = iter(self.formatter.format_column(filled))
+            values = [None if value is None else next(formatted) for value in values]
+        return [empty_value if value is None else value for value in values]
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.name)
+
+
+def get_field_path(model, name):
+    """ Return the fields along ``name`` (``person__name``) or None """
+    fields = []
+    for part in name.split('__'):
+        if model is None:
+            return None
+        try:
+            field = model._meta.get_field(part)
+        except FieldDoesNotExist:
+            return None
+        if field.many_to_many or field.one_to_many:
+            return None
+        fields.append(field)
+        model = field.related_model
+    return fields
+
+
+def get_path_accessor(fields):
+    if len(fields) == 1:
+        return attrgetter(fields[0].name)
+    names = [field.name for field in fields]
+
+    def accessor(obj):
+        for name in names:
+            obj = getattr(obj, name)
+            if obj is None:
+                # A null foreign key along the path
+                return None
+        return obj
+    return accessor
+
+
+def get_choices_accessor(getter, field):
+    choices = dict(field.flatchoices)
+    get_choice = choices.get
+
+    def accessor(obj):
+        value = getter(obj)
+        return get_choice(value, value)
+    return accessor
+
+
+def call_method(name):
+    def accessor(obj):
+        return getattr(obj, name)()
+    return accessor
+
+
+def compile_column(modelsite, name):
+    model = modelsite.model
+    if callable(name):
+        label = getattr(name, 'short_description', name.__name__.replace('_', ' '))
+        return Column(
+            name.__name__, capfirst(label), name,
+            order_field=getattr(name, 'admin_order_field', None))
+    if name == '__str__':
+        return Column(name, capfirst(model._meta.verbose_name), str)
+
+    fields = get_field_path(model, name)
+    if fields:
+        field = fields[-1]
+        getter = get_path_accessor(fields)
+        label = field.verbose_name
+        if len(fields) > 1:
+            label = '%s %s' % (fields[-2].verbose_name, label)
+        accessor = get_choices_accessor(getter, field) if field.choices else getter
+        select_related = None
+        if field.is_relation:
+            select_related = name
+        elif len(fields) > 1:
+            select_related = '__'.join(f.name for f in fields[:-1])
+        return Column(
+            name, capfirst(label), accessor, select_related=select_related, order_field=name)
+
+    method = getattr(modelsite, name, None)
+    if callable(method):
+        label = getattr(method, 'short_description', name.replace('_', ' '))
+        return Column(
+            name, capfirst(label), method,
+            order_field=getattr(method, 'admin_order_field', None))
+
+    attr = getattr(model, name, None)
+    if attr is None:
+        raise ImproperlyConfigured(
+            "'%s' list_display item '%s' is not a field, a method of the "
+            "ModelSite or an attribute of '%s'." % (
+                modelsite.__class__.__name__, name, model._meta.label))
+    label = getattr(attr, 'short_description', None)
+    order_field = getattr(attr, 'admin_order_field', None)
+    if isinstance(attr, property):
+        label = label or getattr(attr.fget, 'short_description', None)
+        order_field = order_field or getattr(attr.fget, 'admin_order_field', None)
+        accessor = attrgetter(name)
+    elif callable(attr):
+        accessor = call_method(name)
+    else:
+        accessor = attrgetter(name)
+    return Column(
+        name, capfirst(label or name.replace('_', ' ')), accessor, order_field=order_field)
+
+
+def get_column_formatter(formatter):
+    if isinstance(formatter, str):
+        return get_formatter(formatter)
+    if isinstance(formatter, ColumnFormatter):
+        return formatter
+    return ColumnFormatter(formatter)
+
+
+def compile_columns(modelsite):
+    columns = []
+    formatters = modelsite.list_formatters
+    for name in modelsite.get_list_display():
+        column = compile_column(modelsite, name)
+        if column.name in formatters:
+            column.formatter = get_column_formatter(formatters[column.name])
+        columns.append(column)
+    return columns
+
+
+# Cells of these types are rendered once per distinct value in a column
+MEMO_TYPES = {str, int, bool, datetime.date, datetime.datetime}
+
+
+def render_cell(value):
+    if not hasattr(value, '__html__'):
+        value = escape(localize(template_localtime(value)))
+    return '<td>%s</td>' % value
+
+
+def render_cells(values):
+    memo = {}
+    cells = []
+    for value in values:
+        cls = value.__class__
+        if cls not in MEMO_TYPES:
+            cells.append(render_cell(value))
+            continue
+        if cls is datetime.datetime:
+            # Memoized in the current time zone like {{ value }} shows it
+            value = template_localtime(value)
+        key = (cls, value)
+        cell = memo.get(key)
+        if cell is None:
+            cell = memo[key] = render_cell(value)
+        cells.append(cell)
+    return cells
+
+
+class ResultsTable:
+    def __init__(self, modelsite, objects, columns=None):
+        self.modelsite = modelsite
+        self.columns = columns or modelsite.get_result_columns()
+        self.objects = list(objects)
+
+    @property
+    def headers(self):
+        return [column.label for column in self.columns]
+
+    def get_rows(self):
+        """ Return a (object, cells tuple) pair per object """
+        empty_value = self.modelsite.empty_value_display
+        cells = [column.get_values(self.objects, empty_value) for column in self.columns]
+        return list(zip(self.objects, zip(*cells)))
+
+    @cached_property
+    def rows(self):
+        return self.get_rows()
+
+    @cached_property
+    def html_rows(self):
+        """
+        ``rows`` with the cells rendered to ``<td>`` elements, localized and
+        escaped like ``{{ cell }}`` would be, for a single variable per row
+        """
+        columns = [render_cells(cells) for cells in zip(*(cells for obj, cells in self.rows))]
+        return [
+            (obj, mark_safe(''.join(cells)))
+            for (obj, _), cells in zip(self.rows, zip(*columns))
+        ]
+
+    def __len__(self):
+        return len(self.objects)
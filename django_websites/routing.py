@@ -0,0 +1,114 @@
+"""
+Database routing of the ModelSite views.
+
+The reading views of a site (``read_actions`` answering GET requests) run
+their queries on ``ModelSite.read_using``, the other views and every write on
+``ModelSite.write_using``, ``None`` leaving the choice to the next router.
+Install the router to enable it::
+
+    DATABASE_ROUTERS = ['django_websites.routing.SiteRouter']
+
+After a write the user gets a cookie keeping their reads on the primary for
+``WEBSITE_PRIMARY_STICKY_SECONDS`` (default 10) so they see their own changes
+whatever the replication lag.
+"""
+import threading
+from functools import wraps
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+ROUTER = 'django_websites.routing.SiteRouter'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+state = threading.local()
+
+
+class Route:
+    def __init__(self, read, write):
+        self.read = read
+        self.write = write
+        self.wrote = False
+
+
+def get_route():
+    return getattr(state, 'route', None)
+
+
+def get_cookie_name():
+    return getattr(settings, 'WEBSITE_PRIMARY_COOKIE_NAME', 'websites_primary')
+
+
+def get_sticky_seconds():
+    return getattr(settings, 'WEBSITE_PRIMARY_STICKY_SECONDS', 10)
+
+
+def is_enabled(modelsite):
+    return modelsite.read_using is not None or modelsite.write_using is not None
+
+
+def is_pinned(request):
+    """ Whether the user wrote recently and must read from the primary """
+    return get_cookie_name() in request.COOKIES
+
+
+def pin(response):
+    response.set_cookie(
+        get_cookie_name(), '1', max_age=get_sticky_seconds(), httponly=True, samesite='Lax')
+
+
+def get_read_database(modelsite, action, request):
+    if action in modelsite.read_actions and request.method in SAFE_METHODS \
+            and not is_pinned(request):
+        return modelsite.read_using
+    return modelsite.write_using
+
+
+def route_view(view, modelsite, action):
+    """
+    Wrap a view function returned by ``as_view`` so its queries, template
+    rendering included, are routed to the databases of ``modelsite``.
+    """
+    if ROUTER not in settings.DATABASE_ROUTERS:
+        raise ImproperlyConfigured(
+            "'%s' sets read_using or write_using, add '%s' to DATABASE_ROUTERS." % (
+                modelsite.__class__.__name__, ROUTER))
+
+    @wraps(view)
+    def routed(request, *args, **kwargs):
+        if hasattr(request, 'user'):
+            # Load the session and the user first, from the default database
+            request.user.is_authenticated
+        route = Route(get_read_database(modelsite, action, request), modelsite.write_using)
+        previous = get_route()
+        state.route = route
+        try:
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+        finally:
+            state.route = previous
+        if route.wrote:
+            pin(response)
+        return response
+    return routed
+
+
+class SiteRouter:
+    """ Route the queries of the ModelSite views, see ``route_view`` """
+
+    def db_for_read(self, model, **hints):
+        route = get_route()
+        if route is None:
+            return None
+        return route.read
+
+    def db_for_write(self, model, **hints):
+        route = get_route()
+        if route is None:
+            return None
+        if not route.wrote:
+            # Read what was just written from the same database
+            route.wrote = True
+            route.read = route.write
+        return route.write
@@ -0,0 +1,190 @@
+"""
+Capture slow queries of ModelSite views together with the database plan.
+
+Enable it with ``WEBSITE_SLOW_QUERY_THRESHOLD`` (milliseconds) or per site with
+``ModelSite.slow_query_threshold``. Queries slower than the threshold are kept
+grouped by filter shape (the sorted names of the non empty request parameters)
+so filter combinations that need an index stand out in ``slow_queries_view``.
+
+Once the response is ready each SQL statement is explained at most once every
+``WEBSITE_SLOW_QUERY_EXPLAIN_INTERVAL`` seconds (default 300), the samples in
+between reuse its plan. ``WEBSITE_SLOW_QUERY_EXPLAIN = False`` turns EXPLAIN
+off, so a slow endpoint never runs an extra query per slow query.
+"""
+import threading
+import time
+from collections import OrderedDict
+from contextlib import ExitStack
+from functools import wraps
+
+from django.conf import settings
+from django.db import connections, DatabaseError, NotSupportedError
+
+
+def get_threshold(modelsite):
+    threshold = getattr(modelsite, 'slow_query_threshold', None)
+    if threshold is None:
+        return getattr(settings, 'WEBSITE_SLOW_QUERY_THRESHOLD', None)
+    return threshold
+
+
+def get_explain_interval():
+    """ Seconds between two EXPLAIN of the same SQL, None when disabled """
+    if not getattr(settings, 'WEBSITE_SLOW_QUERY_EXPLAIN', True):
+        return None
+    return getattr(settings, 'WEBSITE_SLOW_QUERY_EXPLAIN_INTERVAL', 300)
+
+
+def get_filter_shape(params, ignored=('page',)):
+    return tuple(sorted(
+        key for key, value in params.items() if value and key not in ignored
+    ))
+
+
+def explain(connection, sql, params):
+    """ Return the plan of ``sql`` as a list of lines, or the error raised """
+    try:
+        prefix = connection.ops.explain_query_prefix()
+        with connection.cursor() as cursor:
+            cursor.execute('%s %s' % (prefix, sql), params)
+            return [' '.join(str(col) for col in row) for row in cursor.fetchall()]
+    except (DatabaseError, NotSupportedError) as err:
+        return ['EXPLAIN failed: %s' % err]
+
+
+class SlowQueryCollector:
+    """ Database execute wrapper keeping the queries slower than ``threshold`` """
+
+    def __init__(self, alias, threshold):
+        self.alias = alias
+        self.threshold = threshold
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = (time.perf_counter() - start) * 1000
+            if not many and duration > self.threshold and sql.lstrip()[:6].upper() == 'SELECT':
+                self.queries.append((sql, params, duration))
+
+
+class SlowQueryStore:
+    """
+    Keep at most ``max_shapes`` filter shapes (least recently seen are
+    dropped first) and the ``max_samples`` slowest queries of each, and the
+    last plan of at most ``max_plans`` SQL statements.
+    """
+
+    def __init__(self, max_shapes=100, max_samples=5, max_plans=500):
+        self.max_shapes = max_shapes
+        self.max_samples = max_samples
+        self.max_plans = max_plans
+        self.lock = threading.Lock()
+        self.shapes = OrderedDict()
+        self.plans = OrderedDict()
+
+    def get_plan(self, alias, sql, params, interval):
+        """ The plan of ``sql``, explained again once ``interval`` seconds passed """
+        key = (alias, sql)
+        now = time.time()
+        with self.lock:
+            cached = self.plans.get(key)
+        if cached is not None and now - cached[0] < interval:
+            return cached[1]
+        plan = explain(connections[alias], sql, params)
+        with self.lock:
+            self.plans.pop(key, None)
+            self.plans[key] = (now, plan)
+            while len(self.plans) > self.max_plans:
+                self.plans.popitem(last=False)
+        return plan
+
+    def record(self, entry):
+        key = (entry['namespace'], entry['model'], entry['action'], entry['shape'])
+        with self.lock:
+            group = self.shapes.pop(key, None)
+            if group is None:
+                group = {'count': 0, 'total_duration': 0.0, 'samples': []}
+            group['count'] += 1
+            group['total_duration'] += entry['duration']
+            samples = group['samples']
+            samples.append(entry)
+            samples.sort(key=lambda e: e['duration'], reverse=True)
+            del samples[self.max_samples:]
+            self.shapes[key] = group
+            while len(self.shapes) > self.max_shapes:
+                self.shapes.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.shapes.clear()
+            self.plans.clear()
+
+    def summary(self):
+        with self.lock:
+            items = [(key, dict(group, samples=list(group['samples'])))
+                     for key, group in self.shapes.items()]
+        results = []
+        for (namespace, model, action, shape), group in items:
+            results.append({
+                'namespace': namespace,
+                'model': model,
+                'action': action,
+                'shape': list(shape),
+                'count': group['count'],
+                'mean_duration': group['total_duration'] / group['count'],
+                'max_duration': group['samples'][0]['duration'],
+                'samples': group['samples'],
+            })
+        results.sort(key=lambda r: r['max_duration'], reverse=True)
+        return results
+
+
+store = SlowQueryStore()
+
+
+def capture_slow_queries(view, modelsite, action, ignored_params=('page',)):
+    """
+    Wrap a view function returned by ``as_view`` so its slow queries are
+    recorded in ``store`` with their plan.
+    """
+    namespace = modelsite.get_namespace()
+    model = modelsite.opts.label_lower
+    threshold = get_threshold(modelsite)
+
+    @wraps(view)
+    def captured(request, *args, **kwargs):
+        collectors = []
+        with ExitStack() as stack:
+            for conn in connections.all():
+                collector = SlowQueryCollector(conn.alias, threshold)
+                collectors.append(collector)
+                stack.enter_context(conn.execute_wrapper(collector))
+            response = view(request, *args, **kwargs)
+            if hasattr(response, 'render') and not response.is_rendered:
+                response.render()
+
+        params = {key: request.GET.getlist(key) for key in request.GET}
+        shape = get_filter_shape(request.GET, ignored_params)
+        interval = get_explain_interval()
+        for collector in collectors:
+            for sql, sql_params, duration in collector.queries:
+                plan = None
+                if interval is not None:
+                    plan = store.get_plan(collector.alias, sql, sql_params, interval)
+                store.record({
+                    'namespace': namespace,
+                    'model': model,
+                    'action': action,
+                    'shape': shape,
+                    'params': params,
+                    'sql': sql,
+                    'duration': duration,
+                    'explain': plan,
+                    'timestamp': time.time(),
+                })
+        return response
+
+    return captured
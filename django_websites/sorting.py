@@ -0,0 +1,112 @@
+"""
+Column sorting of the index view.
+
+The ``list_display`` columns with an order field (field columns, callables
+with ``admin_order_field``) can be sorted with ``?sort=name`` or
+``?sort=-name``. By default only the columns whose sort an index of the model
+serves are offered, ``ModelSite.sortable_by`` lists them explicitly. An
+explicit column without index is logged once and its sort refused over
+``unindexed_sort_limit`` rows (``WEBSITE_UNINDEXED_SORT_LIMIT``, default
+10000) as the database would sort the whole filtered table per page.
+
+Every ordering ends with the primary key so rows with equal values keep the
+same order from one page to the next.
+"""
+import logging
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+from .indexes import is_covered, resolve_path
+
+logger = logging.getLogger('django_websites.sorting')
+
+
+class SortColumn:
+    def __init__(self, name, order_field, indexed):
+        self.name = name
+        self.order_field = order_field
+        self.indexed = indexed
+
+    def get_ordering(self, descending=False):
+        if descending:
+            return '-%s' % self.order_field
+        return self.order_field
+
+    def get_param(self, descending=False):
+        """ Value of the sort parameter, see ``parse_sort`` """
+        if descending:
+            return '-%s' % self.name
+        return self.name
+
+    def __repr__(self):
+        return '<%s %s>' % (self.__class__.__name__, self.name)
+
+
+def get_unindexed_sort_limit(modelsite):
+    if modelsite.unindexed_sort_limit is not None:
+        return modelsite.unindexed_sort_limit
+    return getattr(settings, 'WEBSITE_UNINDEXED_SORT_LIMIT', 10000)
+
+
+def is_indexed(model, order_field):
+    """ Whether an index of ``model`` serves ``order_by(order_field)`` """
+    target, field_name, lookup = resolve_path(model, order_field)
+    if target is not model or lookup != 'exact':
+        # Sorted on a joined table
+        return False
+    field = model._meta.get_field(field_name)
+    if field.is_relation and field.related_model._meta.ordering:
+        # Sorted by the ordering of the related model
+        return False
+    return is_covered(model, [field.name])
+
+
+def compile_sort_columns(modelsite):
+    model = modelsite.model
+    columns = {
+        column.name: column for column in modelsite.get_result_columns()
+    }
+    names = modelsite.sortable_by
+    if names is None:
+        names = [name for name, column in columns.items() if column.order_field]
+    sort_columns = {}
+    for name in names:
+        column = columns.get(name)
+        if column is None or not column.order_field:
+            raise ImproperlyConfigured(
+                "'%s' sortable_by item '%s' is not a list_display column with an "
+                "order field." % (modelsite.__class__.__name__, name))
+        indexed = is_indexed(model, column.order_field)
+        if not indexed:
+            if modelsite.sortable_by is None:
+                continue
+            logger.warning(
+                "%s column '%s' is sortable but no index of %s serves its sort, "
+                "it is refused over %s rows.", modelsite.__class__.__name__, name,
+                model._meta.label, get_unindexed_sort_limit(modelsite))
+        sort_columns[name] = SortColumn(name, column.order_field, indexed)
+    return sort_columns
+
+
+def parse_sort(sort_columns, value):
+    """ Return the (``SortColumn``, descending) pair of ``?sort=value`` or None """
+    if not value:
+        return None
+    descending = value.startswith('-')
+    column = sort_columns.get(value.lstrip('-'))
+    if column is None:
+        return None
+    return column, descending
+
+
+def add_tiebreaker(model, ordering):
+    """ Append the primary key to ``ordering`` unless it's already there """
+    pk_name = model._meta.pk.name
+    ordering = list(ordering)
+    names = [name.lstrip('-') for name in ordering if isinstance(name, str)]
+    if 'pk' in names or pk_name in names or '?' in names:
+        return ordering
+    descending = bool(names) and isinstance(ordering[0], str) and ordering[0].startswith('-')
+    ordering.append('-%s' % pk_name if descending else pk_name)
+    return ordering
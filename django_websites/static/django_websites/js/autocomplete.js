@@ -0,0 +1,61 @@
+// Search the options of the select.autocomplete elements as the user types,
+// the endpoint answers {"results": [{"id": ..., "text": ...}], "more": bool}.
+// While more results follow a button loads the next page.
+(function () {
+  'use strict';
+
+  function bind(select) {
+    var input = document.createElement('input');
+    var more = document.createElement('button');
+    var timer = null;
+    var page = 1;
+    input.type = 'search';
+    input.className = 'autocomplete-search';
+    input.setAttribute('autocomplete', 'off');
+    more.type = 'button';
+    more.className = 'autocomplete-more';
+    more.textContent = '…';
+    more.hidden = true;
+    select.parentNode.insertBefore(input, select);
+    select.parentNode.insertBefore(more, select.nextSibling);
+
+    function load(append) {
+      var url = select.getAttribute('data-autocomplete-url') +
+        '&q=' + encodeURIComponent(input.value) + '&page=' + page;
+      fetch(url, {credentials: 'same-origin'})
+        .then(function (response) { return response.json(); })
+        .then(function (data) {
+          if (!append) {
+            var options = Array.prototype.slice.call(select.options);
+            options.forEach(function (option) {
+              if (option.value && !option.selected) {
+                select.removeChild(option);
+              }
+            });
+          }
+          data.results.forEach(function (result) {
+            if (!select.querySelector('option[value="' + CSS.escape(result.id) + '"]')) {
+              select.appendChild(new Option(result.text, result.id));
+            }
+          });
+          more.hidden = !data.more;
+        });
+    }
+
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(function () {
+        page = 1;
+        load(false);
+      }, 250);
+    });
+    more.addEventListener('click', function () {
+      page += 1;
+      load(true);
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    document.querySelectorAll('select.autocomplete[data-autocomplete-url]').forEach(bind);
+  });
+})();
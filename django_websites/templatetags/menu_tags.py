@@ -0,0 +1,15 @@
+from django import template
+
+from ..menu import get_menu
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def site_menu(context):
+    """
+    Return the cached navigation menu of the current user.
+
+    {% site_menu as menu %}
+    """
+    return get_menu(context['request'].user)
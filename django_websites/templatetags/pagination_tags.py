@@ -1,5 +1,7 @@
 from django import template
 
+from ..pagination import PageLinks, get_page_range
+
 register = template.Library()
 
 
@@ -32,21 +34,25 @@ def replace_param(context, **kwargs):
     return d.urlencode()
 
 
+@register.simple_tag(takes_context=True)
+def page_links(context, page_param='page', neighbors=3):
+    """
+    Return a ``PageLinks`` for the current page, the request parameters (or
+    ``page_params`` of the context) are copied and encoded only once for
+    every link of the pagination bar.
+
+    {% page_links as links %}
+    <a href="{{ links.next }}">Next</a>
+    """
+    params = context.get('page_params')
+    if params is None:
+        params = context['request'].GET
+    return PageLinks(
+        params, context['page_obj'],
+        page_param=page_param, neighbors=neighbors
+    )
+
+
 @register.filter(name='proper_paginate')
 def proper_paginate(paginator, current_page, neighbors=3):
-    if paginator.num_pages > 2*neighbors:
-        start_index = max(1, current_page-neighbors)
-        end_index = min(paginator.num_pages, current_page + neighbors)
-        if end_index < start_index + 2*neighbors:
-            end_index = start_index + 2*neighbors
-        elif start_index > end_index - 2*neighbors:
-            start_index = end_index - 2*neighbors
-        if start_index < 1:
-            end_index -= start_index
-            start_index = 1
-        elif end_index > paginator.num_pages:
-            start_index -= (end_index-paginator.num_pages)
-            end_index = paginator.num_pages
-        page_list = [f for f in range(start_index, end_index+1)]
-        return page_list[:(2*neighbors + 1)]
-    return paginator.page_range
\ No newline at end of file
+    return get_page_range(paginator, current_page, neighbors)
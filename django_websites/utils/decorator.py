@@ -2,10 +2,83 @@ from functools import wraps
 from django.core.exceptions import ValidationError
 from django.shortcuts import reverse, redirect
 from django.contrib import messages
+from django.db.models.signals import post_save, pre_save
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import csrf_protect
 
 
+def defer_update(instance, **values):
+    """ Set computed field ``values`` on ``instance`` and queue them for one write """
+    for name, value in values.items():
+        setattr(instance, name, value)
+    instance.__dict__.setdefault('_deferred_updates', {}).update(values)
+
+
+def flush_deferred_updates(instance, send_signals=False, using=None):
+    """
+    Write the values queued by ``defer_update`` in one UPDATE of those columns,
+    with ``send_signals`` through ``save(update_fields=...)`` so save signals
+    run again (receivers see ``instance._dirty``). Return True if anything
+    was written.
+    """
+    values = instance.__dict__.pop('_deferred_updates', None)
+    if not values:
+        return False
+    using = using or instance._state.db
+    if send_signals:
+        instance._dirty = True
+        try:
+            instance.save(update_fields=list(values), using=using)
+        finally:
+            del instance._dirty
+    else:
+        instance.__class__._base_manager.using(using).filter(pk=instance.pk).update(**values)
+    return True
+
+
+def flush_after_save(sender, instance=None, using=None, **kwargs):
+    if instance is not None and '_deferred_updates' in instance.__dict__:
+        flush_deferred_updates(instance, using=using)
+
+
+# Writes the columns a pre_save receiver queued outside of update_fields
+post_save.connect(flush_after_save, dispatch_uid='websites_flush_deferred_updates')
+
+
+def deferred_updates(func=None, send_signals=False):
+    """
+    Decorator for pre_save / post_save receivers computing fields with
+    ``defer_update``. On pre_save the values are written by the save itself
+    (those excluded by ``update_fields`` right after it), on post_save the
+    queued values are flushed in one UPDATE instead of saving the whole row
+    again.
+    """
+
+    def decorator(func):
+        @wraps(func)
+        def receiver(sender, instance=None, **kwargs):
+            if not instance or hasattr(instance, '_dirty'):
+                return
+            func(sender, instance=instance, **kwargs)
+            if kwargs.get('signal') is pre_save:
+                update_fields = kwargs.get('update_fields')
+                values = instance.__dict__.get('_deferred_updates', {})
+                # columns left out of update_fields stay queued for flush_after_save
+                for name in list(values):
+                    if update_fields is None or name in update_fields:
+                        del values[name]
+                if not values:
+                    instance.__dict__.pop('_deferred_updates', None)
+            else:
+                flush_deferred_updates(instance, send_signals, kwargs.get('using'))
+
+        return receiver
+
+    if func is None:
+        return decorator
+    return decorator(func)
+
+
 def prevent_recursion(func):
     """ Decorator, Prevent Recursion inside Post Save Signal """
 
@@ -17,6 +90,9 @@ def prevent_recursion(func):
         if hasattr(instance, '_dirty'):
             return
         func(sender, instance=instance, **kwargs)
+        # changes queued with defer_update only need their own columns
+        if flush_deferred_updates(instance, send_signals=True, using=kwargs.get('using')):
+            return
         try:
             # there is dirty, lets save
             instance._dirty = True
@@ -0,0 +1,111 @@
+"""
+Column formatters for result tables.
+
+A formatter turns a cell value into display text, ``format_column`` formats a
+whole column in one call. Formatted values are memoized per formatter and
+language so repeated values (statuses, round amounts) are only formatted once::
+
+    from django_websites.utils.formatters import format_column, register
+
+    format_column('money', [1500, 1500, Decimal('20.5')])
+
+    @register('percent')
+    def percent(value):
+        return '%s %%' % value
+"""
+from decimal import Decimal
+
+from django.conf import settings
+from django.utils.translation import get_language
+
+from . import text
+
+MEMO_SIZE = 4096
+# Cells looked up before giving up the memo on mostly distinct columns
+PROBE_SIZE = 256
+
+
+class ColumnFormatter:
+    """ Format cells with ``func``, keeping up to ``memo_size`` results per language """
+
+    def __init__(self, func, memo_size=MEMO_SIZE):
+        self.func = func
+        self.memo_size = memo_size
+        self.memos = {}
+
+    def get_memo(self):
+        key = (get_language(), settings.USE_L10N)
+        memo = self.memos.get(key)
+        if memo is None:
+            memo = self.memos[key] = {}
+        return memo
+
+    def format_column(self, values):
+        func = self.func
+        memo = self.get_memo()
+        memo_size = self.memo_size
+        results = []
+        append = results.append
+        misses = 0
+        values = iter(values)
+        for position, value in enumerate(values, 1):
+            if position == PROBE_SIZE and misses > PROBE_SIZE * 0.9:
+                # Mostly distinct values, memoizing only costs
+                append(func(value))
+                results.extend(map(func, values))
+                break
+            cls = value.__class__
+            if cls is int or cls is str:
+                key = value
+            elif cls is Decimal or cls is float:
+                # Equal Decimals and floats may not print the same (1.0, 1.00, -0.0)
+                key = (cls, str(value))
+            else:
+                append(func(value))
+                continue
+            result = memo.get(key)
+            if result is None:
+                misses += 1
+                result = func(value)
+                if len(memo) >= memo_size:
+                    memo.clear()
+                memo[key] = result
+            append(result)
+        return results
+
+    def __call__(self, value):
+        return self.format_column([value])[0]
+
+    def clear(self):
+        self.memos.clear()
+
+
+formatters = {}
+
+
+def register(name, func=None, memo_size=MEMO_SIZE):
+    """ Register ``func`` as the formatter ``name``, usable as decorator """
+    if func is None:
+        return lambda func: register(name, func, memo_size)
+    formatters[name] = ColumnFormatter(func, memo_size)
+    return func
+
+
+def get_formatter(name):
+    try:
+        return formatters[name]
+    except KeyError:
+        raise ValueError("Unknown column formatter '%s'." % name)
+
+
+def format_column(name, values):
+    return get_formatter(name).format_column(values)
+
+
+register('money', text.get_money)
+register('format_money', text.format_money)
+register('text_right', text.text_right)
+register('text_left', text.text_left)
+register('text_center', text.text_center)
+register('rome', text.number_to_rome)
+register('text_id', text.number_to_text_id)
@@ -1,9 +1,108 @@
 import re
 from decimal import Decimal
+from functools import lru_cache
 
 from django.utils.html import format_html
 from django.conf import settings
-from django.utils.formats import number_format
+from django.core.signals import setting_changed
+from django.utils import formats, numberformat
+from django.utils.translation import get_language
+
+LEADING_DIGITS = re.compile(r'(-?)(\d+)')
+ASCII_DIGITS = re.compile(r'[0-9]+')
+
+HURUF = ["", "satu", "dua", "tiga", "empat", "lima",
+         "enam", "tujuh", "delapan", "sembilan", "sepuluh", "sebelas"]
+SKALA = [
+    (1000000000000, " trilyun "),
+    (1000000000, " milyar "),
+    (1000000, " juta "),
+    (1000, " ribu "),
+]
+
+
+def group_digits(digits, sep, grouping=3):
+    """
+    Insert ``sep`` between the groups of a string of digits, ``grouping``
+    follows the NUMBER_GROUPING setting (an int or a sequence like (3, 2, 0)).
+    """
+    if grouping == 3 and 3 < len(digits) < 100 and ASCII_DIGITS.fullmatch(digits) \
+            and digits[0] != '0':
+        # Let the int formatting do the common case
+        grouped = '{:,}'.format(int(digits))
+        return grouped if sep == ',' else grouped.replace(',', sep)
+    try:
+        intervals = list(grouping)
+    except TypeError:
+        intervals = [grouping, 0]
+    size = intervals.pop(0)
+    groups = []
+    end = len(digits)
+    while size and end > size:
+        groups.append(digits[end - size:end])
+        end -= size
+        if intervals:
+            size = intervals.pop(0) or size
+    groups.append(digits[:end])
+    return sep.join(reversed(groups))
+
+
+class NumberFormat:
+    """ Separators and grouping of a language, read once from the format settings """
+
+    def __init__(self, decimal_sep='.', thousand_sep=',', grouping=3):
+        self.decimal_sep = decimal_sep
+        self.thousand_sep = thousand_sep
+        self.grouping = grouping
+
+    @classmethod
+    def for_language(cls, lang=None, use_l10n=None):
+        return cls(
+            formats.get_format('DECIMAL_SEPARATOR', lang, use_l10n),
+            formats.get_format('THOUSAND_SEPARATOR', lang, use_l10n),
+            formats.get_format('NUMBER_GROUPING', lang, use_l10n),
+        )
+
+    def format(self, value, decimal_pos=None):
+        """ Same as ``number_format(value, decimal_pos, force_grouping=True)`` """
+        if isinstance(value, Decimal):
+            _, digits, exponent = value.as_tuple()
+            if abs(exponent) + len(digits) > 200:
+                return numberformat.format(
+                    value, self.decimal_sep, decimal_pos, self.grouping,
+                    self.thousand_sep, force_grouping=True)
+            text = '{:f}'.format(value)
+        else:
+            text = str(value)
+        sign = ''
+        if text[:1] == '-':
+            sign = '-'
+            text = text[1:]
+        int_part, _, dec_part = text.partition('.')
+        if decimal_pos is not None:
+            dec_part = dec_part[:decimal_pos].ljust(decimal_pos, '0')
+        if dec_part:
+            dec_part = self.decimal_sep + dec_part
+        return sign + group_digits(int_part, self.thousand_sep, self.grouping) + dec_part
+
+
+number_formats = {}
+
+
+def get_number_format():
+    """ NumberFormat of the active language, cached per language """
+    lang = get_language() if settings.USE_L10N else None
+    number_format = number_formats.get(lang)
+    if number_format is None:
+        number_format = number_formats[lang] = NumberFormat.for_language(lang)
+    return number_format
+
+
+def reset_number_formats(**kwargs):
+    number_formats.clear()
+
+
+setting_changed.connect(reset_number_formats)
 
 
 def get_money(value, use_l10n=True):
@@ -16,15 +115,15 @@ def get_money(value, use_l10n=True):
             if not isinstance(value, (float, Decimal)):
                 value = int(value)
         except (TypeError, ValueError):
-            return get_money(value, False)
+            pass
         else:
-            return number_format(value, decimal_pos=2, force_grouping=True)
-    orig = str(value)
-    new = re.sub(r"^(-?\d+)(\d{3})", r'\g<1>,\g<2>', orig)
-    if orig == new:
-        return new
-    else:
-        return get_money(new, use_l10n)
+            return get_number_format().format(value, decimal_pos=2)
+    text = str(value)
+    match = LEADING_DIGITS.match(text)
+    if not match:
+        return text
+    sign, digits = match.groups()
+    return sign + group_digits(digits, ',') + text[match.end():]
 
 
 def number_to_rome(number):
@@ -43,28 +142,41 @@ def number_to_rome(number):
 
 
 def format_money(number):
-    text = '<div align="right">{}</div>'
-    return format_html(text.format(get_money(number)))
+    return format_html('<div align="right">{}</div>', get_money(number))
 
 
 def text_right(text):
-    html_text = '<div align="right">{}</div>'
-    return format_html(html_text.format(text or '-'))
+    return format_html('<div align="right">{}</div>', text or '-')
 
 
 def text_left(text):
-    html_text = '<div align="left">{}</div>'
-    return format_html(html_text.format(text or '-'))
+    return format_html('<div align="left">{}</div>', text or '-')
 
 
 def text_center(text):
-    html_text = '<div align="center">{}</div>'
-    return format_html(html_text.format(text or '-'))
+    return format_html('<div align="center">{}</div>', text or '-')
 
 
 def make_link(url, text):
-    html_text = '<a href="{}">{}</a>'
-    return format_html(html_text.format(url, text))
+    return format_html('<a href="{}">{}</a>', url, text)
+
+
+@lru_cache(maxsize=1000)
+def ratusan_to_text_id(nilai):
+    """ Kalimat bilangan 0 - 999 """
+    if nilai < 12:
+        return HURUF[nilai]
+    text = ""
+    if nilai >= 200:
+        text = HURUF[nilai // 100] + " ratus "
+    elif nilai >= 100:
+        text = "seratus "
+    nilai %= 100
+    if nilai < 12:
+        return text + HURUF[nilai]
+    if nilai < 20:
+        return text + HURUF[nilai - 10] + " belas "
+    return text + HURUF[nilai // 10] + " puluh " + HURUF[nilai % 10]
 
 
 def number_to_text_id(nilai):
@@ -73,30 +185,19 @@ def number_to_text_id(nilai):
     :param nilai: interger
     :return: string
     """
-    huruf = ["", "satu", "dua", "tiga", "empat", "lima",
-             "enam", "tujuh", "delapan", "sembilan", "sepuluh", "sebelas"]
     nilai = int(nilai)
-    if nilai == 0:
-        return ""
-    elif nilai < 12 and nilai != 0:
-        return "" + huruf[nilai]
-    elif nilai < 20:
-        return number_to_text_id(nilai - 10) + " belas "
-    elif nilai < 100:
-        return number_to_text_id(nilai / 10) + " puluh " + number_to_text_id(nilai % 10)
-    elif nilai < 200:
-        return "seratus " + number_to_text_id(nilai - 100)
-    elif nilai < 1000:
-        return number_to_text_id(nilai / 100) + " ratus " + number_to_text_id(nilai % 100)
-    elif nilai < 2000:
-        return "seribu " + number_to_text_id(nilai - 1000)
-    elif nilai < 1000000:
-        return number_to_text_id(nilai / 1000) + " ribu " + number_to_text_id(nilai % 1000)
-    elif nilai < 1000000000:
-        return number_to_text_id(nilai / 1000000) + " juta " + number_to_text_id(nilai % 1000000)
-    elif nilai < 1000000000000:
-        return number_to_text_id(nilai / 1000000000) + " milyar " + number_to_text_id(nilai % 1000000000)
-    elif nilai < 100000000000000:
-        return number_to_text_id(nilai / 1000000000000) + " trilyun " + number_to_text_id(nilai % 1000000000000)
-    elif nilai <= 100000000000000:
-        return "Maaf Tidak Dapat di Proses Karena Jumlah nilai Terlalu Besar"
+    if nilai < 12:
+        return HURUF[nilai]
+    if nilai >= 100000000000000:
+        if nilai == 100000000000000:
+            return "Maaf Tidak Dapat di Proses Karena Jumlah nilai Terlalu Besar"
+        return None
+    text = ""
+    for skala, nama in SKALA:
+        if nilai >= skala:
+            jumlah, nilai = divmod(nilai, skala)
+            if skala == 1000 and jumlah == 1:
+                text += "seribu "
+            else:
+                text += ratusan_to_text_id(jumlah) + nama
+    return text + ratusan_to_text_id(nilai)
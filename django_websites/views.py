@@ -1,7 +1,7 @@
-from django import forms
 from django.db import models
 from django.db.models.fields.related import ManyToManyField, OneToOneRel
-from django.core.exceptions import PermissionDenied, ObjectDoesNotExist
+from django.core.exceptions import PermissionDenied, ObjectDoesNotExist, ValidationError
+from django.utils.cache import patch_vary_headers
 from django.utils.decorators import method_decorator
 from django.utils.encoding import force_str
 from django.utils.functional import cached_property
@@ -10,11 +10,15 @@ from django.utils.text import capfirst
 from django.shortcuts import redirect, get_object_or_404, render
 from django.views.generic import TemplateView, FormView
 from django.contrib.admin.utils import quote, unquote
-from django.contrib.auth.decorators import login_required
+from django.contrib.auth.decorators import login_required, user_passes_test
+from django.http import Http404, JsonResponse
 from django.views.generic.list import MultipleObjectMixin, MultipleObjectTemplateResponseMixin
 from django_filters.views import FilterMixin
 
-from . import messages
+from . import autocomplete, facets, messages, instrumentation, routing, slowqueries
+from .importer import CSVImporter, CSVImportForm
+from .results import ResultsTable
+from .sorting import add_tiebreaker, get_unindexed_sort_limit, parse_sort
 
 
 class SiteBaseView(TemplateView):
@@ -22,10 +26,31 @@ class SiteBaseView(TemplateView):
     Groups together common functionality for all app views.
     """
     modelsite = None
+    action = None
     meta_title = ''
     page_title = ''
     page_subtitle = ''
 
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        modelsite = initkwargs.get('modelsite')
+        if modelsite is None:
+            return view
+        if routing.is_enabled(modelsite):
+            view = routing.route_view(view, modelsite, cls.action)
+        if slowqueries.get_threshold(modelsite) is not None:
+            view = slowqueries.capture_slow_queries(
+                view, modelsite, cls.action, ignored_params=cls.get_ignored_params())
+        if instrumentation.is_enabled(modelsite):
+            view = instrumentation.instrument_view(view, modelsite, cls.action)
+        return view
+
+    @classmethod
+    def get_ignored_params(cls):
+        """ Request parameters that don't change the filtered queryset """
+        return ('page',)
+
     def __init__(self, modelsite, **kwargs):
         self.modelsite = modelsite
         self.model = modelsite.model
@@ -37,6 +62,7 @@ class SiteBaseView(TemplateView):
         self.pk_attname = self.opts.pk.attname
         self.permission_helper = modelsite.permission_helper
         self.url_helper = modelsite.url_helper
+        self.template_engine = modelsite.get_template_engine()
         super().__init__(**kwargs)
 
     def check_action_permitted(self, user):
@@ -74,6 +100,10 @@ class SiteBaseView(TemplateView):
     def create_url(self):
         return self.url_helper.create_url
 
+    @cached_property
+    def import_url(self):
+        return self.url_helper.import_url
+
     def get_base_queryset(self, request=None):
         return self.modelsite.get_queryset(request or self.request)
 
@@ -108,9 +138,7 @@ class ModelFormView(SiteBaseView, FormView):
         if self.form_class:
             return self.form_class
         else:
-            model = self.model
-            fields = self.get_fields()
-            return forms.modelform_factory(model, fields=fields)
+            return self.modelsite.get_modelform_class(self.get_fields())
 
     def get_success_url(self):
         return self.modelsite.get_success_url() or self.index_url
@@ -125,10 +153,7 @@ class ModelFormView(SiteBaseView, FormView):
 
     @property
     def media(self):
-        return forms.Media(
-            css={'all': self.modelsite.get_form_view_extra_css()},
-            js=self.modelsite.get_form_view_extra_js()
-        )
+        return self.modelsite.get_media('form')
 
     def get_context_data(self, **kwargs):
         form = self.get_form()
@@ -154,8 +179,11 @@ class ModelFormView(SiteBaseView, FormView):
         model_name = self.verbose_name
         return _("The %s could not be created due to errors.") % model_name
 
+    def save_instance(self, form):
+        return form.save()
+
     def form_valid(self, form):
-        instance = form.save()
+        instance = self.save_instance(form)
         messages.success(
             self.request, self.get_success_message(instance),
             buttons=self.get_success_message_buttons(instance)
@@ -176,11 +204,17 @@ class InstanceSpecificView(SiteBaseView):
 
     def __init__(self, modelsite, instance_pk):
         super().__init__(modelsite)
-        self.instance_pk = unquote(instance_pk)
+        if isinstance(instance_pk, str):
+            instance_pk = unquote(instance_pk)
+        try:
+            # Malformed pks are rejected before hitting the database
+            self.instance_pk = self.opts.pk.to_python(instance_pk)
+        except ValidationError:
+            raise Http404
         self.pk_quoted = quote(self.instance_pk)
         filter_kwargs = dict()
         filter_kwargs[self.pk_attname] = self.instance_pk
-        object_qs = modelsite.model._default_manager.get_queryset().filter(**filter_kwargs)
+        object_qs = modelsite.get_manager().filter(**filter_kwargs)
         self.instance = get_object_or_404(object_qs)
 
     def get_page_title(self):
@@ -209,12 +243,35 @@ class InstanceSpecificView(SiteBaseView):
 
 
 class IndexView(MultipleObjectTemplateResponseMixin, FilterMixin, MultipleObjectMixin, SiteBaseView):
+    action = 'index'
     page_title = _('All')
     paginate_by = 12
+    # Render only the results and the pagination for requests with
+    # ?fragment=1 or the HX-Request header
+    fragments_enabled = True
+    fragment_param = 'fragment'
+    fragment_header = 'HX-Request'
+    # Sort by a sortable column with ?sort=name or ?sort=-name
+    sorting_enabled = True
+    sort_param = 'sort'
+
+    @classmethod
+    def get_ignored_params(cls):
+        return (cls.page_kwarg, cls.fragment_param)
+
+    def is_fragment(self):
+        if not self.fragments_enabled:
+            return False
+        request = self.request
+        return (
+            request.GET.get(self.fragment_param) == '1'
+            or request.META.get('HTTP_%s' % self.fragment_header.upper().replace('-', '_')) == 'true'
+        )
 
     def get_queryset(self):
-        if self.modelsite.get_queryset(self.request):
-            return self.modelsite.get_queryset(self.request)
+        queryset = self.modelsite.get_queryset(self.request)
+        if queryset is not None:
+            return queryset
         return super(IndexView, self).get_queryset()
 
     def check_action_permitted(self, user):
@@ -232,10 +289,7 @@ class IndexView(MultipleObjectTemplateResponseMixin, FilterMixin, MultipleObject
 
     @property
     def media(self):
-        return forms.Media(
-            css={'all': self.modelsite.get_index_view_extra_css()},
-            js=self.modelsite.get_index_view_extra_js()
-        )
+        return self.modelsite.get_media('index')
 
     def get_page_title(self):
         return (
@@ -252,59 +306,120 @@ class IndexView(MultipleObjectTemplateResponseMixin, FilterMixin, MultipleObject
             return self.modelsite.list_per_page
         return self.paginate_by
 
+    def get_paginator(self, queryset, per_page, **kwargs):
+        paginator = super().get_paginator(queryset, per_page, **kwargs)
+        # Counted once by get()
+        paginator.count = self.result_count
+        return paginator
+
+    def get_sort(self):
+        """ The (``SortColumn``, descending) pair requested, or None """
+        if not self.sorting_enabled:
+            return None
+        return parse_sort(self.modelsite.get_sort_columns(), self.request.GET.get(self.sort_param))
+
     def get_ordering(self):
-        if self.modelsite.ordering:
-            return self.modelsite.ordering
-        return self.ordering
+        if self.sort is not None:
+            column, descending = self.sort
+            return add_tiebreaker(self.model, [column.get_ordering(descending)])
+        return self.modelsite.get_ordering()
+
+    def check_sort(self, result_count):
+        """ Refuse the sorts no index serves over the unindexed sort limit """
+        if self.sort is None or self.sort[0].indexed:
+            return True
+        return result_count <= get_unindexed_sort_limit(self.modelsite)
+
+    def get_result_headers(self, params):
+        """ Label, sort URL and sort direction of every column """
+        sort_columns = self.modelsite.get_sort_columns() if self.sorting_enabled else {}
+        current, descending = self.sort or (None, False)
+        params = params.copy()
+        params.pop(self.page_kwarg, None)
+        params.pop(self.fragment_param, None)
+        headers = []
+        for column in self.modelsite.get_result_columns():
+            header = {'label': column.label, 'url': None, 'sorted': None}
+            sort_column = sort_columns.get(column.name)
+            if sort_column is not None:
+                if sort_column is current:
+                    header['sorted'] = 'desc' if descending else 'asc'
+                params[self.sort_param] = sort_column.get_param(
+                    descending=sort_column is current and not descending)
+                header['url'] = '?%s' % params.urlencode()
+            headers.append(header)
+        return headers
 
     def apply_select_related(self, qs):
 
         if self.select_related is True:
-            qs = qs.select_related()
-        if self.select_related:
-            qs = qs.select_related(*self.select_related)
-
+            return qs.select_related()
+        select_related = list(self.select_related or [])
+        # Foreign keys shown by list_display
+        for column in self.modelsite.get_result_columns():
+            if column.select_related and column.select_related not in select_related:
+                select_related.append(column.select_related)
+        if select_related:
+            qs = qs.select_related(*select_related)
         return qs
 
     def get_context_data(self, **kwargs):
         user = self.request.user
-        all_count = self.get_base_queryset().count()
-        queryset = self.get_queryset()
-        result_count = queryset.count()
+        params = self.request.GET
         context = {
             'view': self,
-            'all_count': all_count,
-            'result_count': result_count,
+            'result_count': self.result_count,
             'user_can_create': self.permission_helper.user_can_create(user),
+            'sort_refused': self.sort_refused,
         }
+        if self.is_fragment():
+            # Links of the fragment lead to full pages
+            params = params.copy()
+            params.pop(self.fragment_param, None)
+            context['page_params'] = params
+        else:
+            context['all_count'] = self.get_base_queryset().count()
         context.update(kwargs)
-        return super().get_context_data(**context)
+        context = super().get_context_data(**context)
+        context['results'] = ResultsTable(self.modelsite, context['object_list'])
+        context['result_headers'] = self.get_result_headers(params)
+        return context
 
     def get_template_names(self):
         if self.template_name:
             return [self.template_name]
+        if self.is_fragment():
+            return self.modelsite.get_index_fragment_template()
         return self.modelsite.get_index_template()
 
     def get_filterset_class(self):
         """
         Returns the filterset class to use in this view
         """
-        if self.modelsite.filterset_class:
-            return self.modelsite.filterset_class
-        return super().get_filterset_class()
+        return self.modelsite.get_filterset_class()
 
     def get(self, request, *args, **kwargs):
         filterset_class = self.get_filterset_class()
         self.filterset = self.get_filterset(filterset_class)
         if not self.filterset.is_bound or self.filterset.is_valid() or not self.get_strict():
-            self.object_list = self.apply_select_related(self.filterset.qs)
+            queryset = self.filterset.qs
         else:
-            self.object_list = self.filterset.queryset.none()
+            queryset = self.filterset.queryset.none()
+        self.result_count = queryset.count()
+        self.sort = self.get_sort()
+        self.sort_refused = not self.check_sort(self.result_count)
+        if self.sort_refused:
+            self.sort = None
+        self.object_list = self.apply_select_related(queryset.order_by(*self.get_ordering()))
         context = self.get_context_data(filter=self.filterset, object_list=self.object_list)
-        return self.render_to_response(context)
+        response = self.render_to_response(context)
+        if self.fragments_enabled:
+            patch_vary_headers(response, [self.fragment_header])
+        return response
 
 
 class InspectView(InstanceSpecificView):
+    action = 'inspect'
     page_title = _('Inspecting')
 
     def check_action_permitted(self, user):
@@ -318,10 +433,7 @@ class InspectView(InstanceSpecificView):
 
     @property
     def media(self):
-        return forms.Media(
-            css={'all': self.modelsite.get_inspect_view_extra_css()},
-            js=self.modelsite.get_inspect_view_extra_js()
-        )
+        return self.modelsite.get_media('inspect')
 
     def get_context_data(self, **kwargs):
         context = {
@@ -341,6 +453,7 @@ class InspectView(InstanceSpecificView):
 
 
 class CreateView(ModelFormView):
+    action = 'create'
     page_title = _('New')
 
     def check_action_permitted(self, user):
@@ -366,6 +479,7 @@ class CreateView(ModelFormView):
 
 
 class EditView(ModelFormView, InstanceSpecificView):
+    action = 'edit'
     page_title = _('Editing')
 
     def check_action_permitted(self, user):
@@ -400,6 +514,28 @@ class EditView(ModelFormView, InstanceSpecificView):
         name = self.verbose_name
         return _("The %s could not be saved due to errors.") % name
 
+    def get_update_fields(self, form):
+        """ Concrete fields changed in ``form``, plus the auto_now ones """
+        update_fields = []
+        for field in self.opts.concrete_fields:
+            if field.primary_key:
+                continue
+            if field.name in form.changed_data or getattr(field, 'auto_now', False):
+                update_fields.append(field.name)
+        return update_fields
+
+    def save_instance(self, form):
+        """ Write only the changed columns, nothing when the form is unchanged """
+        if not form.has_changed():
+            return form.instance
+        instance = form.save(commit=False)
+        changed = set(form.changed_data)
+        if changed.intersection(field.name for field in self.opts.concrete_fields):
+            instance.save(update_fields=self.get_update_fields(form))
+        if changed.intersection(field.name for field in self.opts.many_to_many):
+            form.save_m2m()
+        return instance
+
     def get_template_names(self):
         if self.template_name:
             return [self.template_name]
@@ -407,6 +543,7 @@ class EditView(ModelFormView, InstanceSpecificView):
 
 
 class DeleteView(InstanceSpecificView):
+    action = 'delete'
     page_title = _('Delete')
 
     def get_success_url(self):
@@ -431,13 +568,19 @@ class DeleteView(InstanceSpecificView):
         ) % self.verbose_name
 
     def delete_instance(self):
-        self.instance.delete()
+        if self.modelsite.trash_enabled:
+            # A single UPDATE, the cascades run when the trash is purged
+            self.modelsite.trash_instance(self.instance, self.request.user)
+        else:
+            self.instance.delete()
 
     def post(self, request, *args, **kwargs):
         try:
-            msg = _("%(model_name)s '%(instance)s' deleted.") % {
-                'model_name': self.verbose_name, 'instance': self.instance
-            }
+            if self.modelsite.trash_enabled:
+                msg = _("%(model_name)s '%(instance)s' moved to trash.")
+            else:
+                msg = _("%(model_name)s '%(instance)s' deleted.")
+            msg = msg % {'model_name': self.verbose_name, 'instance': self.instance}
             self.delete_instance()
             messages.success(request, msg.title())
             return redirect(self.get_success_url())
@@ -471,5 +614,174 @@ class DeleteView(InstanceSpecificView):
         return self.modelsite.get_delete_template()
 
 
+class TrashView(IndexView):
+    """ Trashed rows of a site in trash mode, restored or purged in bulk """
+    action = 'trash'
+    page_title = _('Trash')
+    fragments_enabled = False
+    sorting_enabled = False
+
+    def check_action_permitted(self, user):
+        return self.permission_helper.user_can_delete_obj(user, None)
+
+    def get_base_queryset(self, request=None):
+        return self.modelsite.get_trash_queryset().trashed()
+
+    def get_queryset(self):
+        return self.get_base_queryset()
+
+    def get_page_title(self):
+        return "{} {}".format(self.page_title, self.opts.verbose_name_plural)
+
+    def get_template_names(self):
+        if self.template_name:
+            return [self.template_name]
+        return self.modelsite.get_trash_template()
+
+    actions = ('restore', 'purge')
+
+    def get_posted_pks(self):
+        """ The primary keys posted, None if one of them is invalid """
+        try:
+            return [self.opts.pk.to_python(pk) for pk in self.request.POST.getlist('pk')]
+        except ValidationError:
+            return None
+
+    def post(self, request, *args, **kwargs):
+        action = request.POST.get('action')
+        pks = self.get_posted_pks()
+        if action not in self.actions or pks is None:
+            messages.error(request, _("Invalid selection."))
+            return redirect(self.url_helper.trash_url)
+        queryset = self.get_base_queryset()
+        if pks:
+            queryset = queryset.filter(pk__in=pks)
+        elif request.POST.get('all') != '1':
+            return redirect(self.url_helper.trash_url)
+        if action == 'restore':
+            count = queryset.restore()
+            messages.success(request, _("%(count)s %(model_name)s restored.") % {
+                'count': count, 'model_name': self.verbose_name_plural})
+        else:
+            try:
+                count = queryset.purge()
+            except models.ProtectedError:
+                messages.error(request, _(
+                    "Some %(model_name)s could not be deleted because other "
+                    "records still refer to them.") % {'model_name': self.verbose_name_plural})
+            else:
+                messages.success(request, _("%(count)s %(model_name)s deleted.") % {
+                    'count': count, 'model_name': self.verbose_name_plural})
+        facets.bump_version(self.model)
+        return redirect(self.url_helper.trash_url)
+
+
+class AutocompleteView(SiteBaseView):
+    """ JSON search of the related objects of a foreign key, see ``autocomplete`` """
+    action = 'autocomplete'
+    max_page = 100
+
+    def check_action_permitted(self, user):
+        if self.modelsite.index_view_is_public:
+            return True
+        return self.permission_helper.user_can_list(user)
+
+    @method_decorator(login_required)
+    def dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_field(self):
+        name = self.request.GET.get('field', '')
+        if name not in self.modelsite.get_autocomplete_fields():
+            raise Http404("'%s' has no autocomplete field '%s'." % (
+                self.modelsite.__class__.__name__, name))
+        return autocomplete.get_relation_field(self.model, name)
+
+    def get_page(self):
+        try:
+            page = int(self.request.GET.get('page', 1))
+        except ValueError:
+            page = 1
+        return min(max(page, 1), self.max_page)
+
+    def get_related_modelsite(self, field):
+        """ Site of the related model, which the user must be able to list """
+        related = autocomplete.get_related_modelsite(self.modelsite, field)
+        if related is None:
+            raise PermissionDenied
+        if not related.index_view_is_public \
+                and not related.permission_helper.user_can_list(self.request.user):
+            raise PermissionDenied
+        return related
+
+    def get(self, request, *args, **kwargs):
+        field = self.get_field()
+        related = self.get_related_modelsite(field)
+        term = request.GET.get('q', '').strip()
+        objects, more = autocomplete.search(
+            self.modelsite, field, related.get_queryset(request), term, self.get_page())
+        return JsonResponse({'results': autocomplete.get_results(field, objects), 'more': more})
+
+
+class ImportView(SiteBaseView, FormView):
+    action = 'import'
+    page_title = _('Import')
+    form_class = CSVImportForm
+    importer_class = CSVImporter
+
+    def check_action_permitted(self, user):
+        return self.permission_helper.user_can_create(user)
+
+    @method_decorator(login_required)
+    def dispatch(self, request, *args, **kwargs):
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_page_title(self):
+        return "{} {}".format(self.page_title, self.opts.verbose_name_plural)
+
+    def get_model_form_class(self):
+        return (
+            self.modelsite.get_form_class()
+            or self.modelsite.get_modelform_class(self.modelsite.get_fields())
+        )
+
+    def get_importer(self):
+        return self.importer_class(
+            self.model, self.get_model_form_class(),
+            chunk_size=self.modelsite.import_chunk_size)
+
+    def get_success_message(self, result):
+        return _("%(count)s %(model_name)s imported.") % {
+            'count': result.created, 'model_name': self.verbose_name_plural
+        }
+
+    def form_valid(self, form):
+        result = self.get_importer().run(form.cleaned_data['csv_file'])
+        if result.created:
+            # bulk_create sends no post_save
+            facets.bump_version(self.model)
+            messages.success(self.request, self.get_success_message(result))
+        if result.error_count:
+            messages.error(self.request, _("%s rows could not be imported.") % result.error_count)
+        return self.render_to_response(self.get_context_data(form=form, result=result))
+
+    def get_template_names(self):
+        if self.template_name:
+            return [self.template_name]
+        return self.modelsite.get_import_template()
+
+
+@user_passes_test(lambda u: u.is_active and u.is_staff)
+def stats_view(request):
+    """ Aggregated timings of the instrumented ModelSite views """
+    return JsonResponse({'results': instrumentation.stats.summary()})
+
+
+@user_passes_test(lambda u: u.is_active and u.is_staff)
+def slow_queries_view(request):
+    """ Captured slow queries grouped by filter shape, slowest first """
+    return JsonResponse({'results': slowqueries.store.summary()})
+
+
 def handler403(request):
     return render(request, '403.html', status=403)
@@ -0,0 +1,149 @@
+"""
+Warm-up of the registered ModelSites.
+
+A fresh worker builds the site instances, resolves templates, reverses URL
+templates, generates FilterSet and ModelForm classes, compiles result and
+sort columns, bundles assets and loads permission codenames on the first
+request of every site. ``warm_up()`` does it in the current process, errors
+are logged instead of raised. Call it when the process starts, before it
+accepts requests: serve ``get_wsgi_application()`` of this module from the
+WSGI file, or call it from a server hook (gunicorn ``post_fork``).
+
+The ``warm_sites`` command only reports the time spent per site, the caches it
+builds die with the command process::
+
+    $ python manage.py warm_sites
+"""
+import logging
+import time
+
+from django.template.loader import select_template
+
+logger = logging.getLogger('django_websites.warmup')
+
+# Templates included by the view templates
+INCLUDE_TEMPLATES = [
+    'sites/includes/menu.html',
+    'sites/includes/filter.html',
+    'sites/includes/index_results.html',
+    'sites/includes/results.html',
+    'sites/includes/pagination.html',
+]
+FORM_INCLUDE_TEMPLATES = ['sites/includes/fieldset.html']
+# (action, attribute enabling it, URL specific to an instance)
+ACTIONS = [
+    ('index', 'index_view_enabled', False),
+    ('inspect', 'inspect_view_enabled', True),
+    ('create', 'create_view_enabled', False),
+    ('edit', 'edit_view_enabled', True),
+    ('delete', 'delete_view_enabled', True),
+    ('import', 'import_view_enabled', False),
+    ('trash', 'trash_enabled', False),
+]
+
+
+class WarmUpResult:
+    def __init__(self, modelsite):
+        self.modelsite = modelsite
+        self.duration = 0.0
+        self.errors = []
+
+    @property
+    def label(self):
+        return '%s.%s' % (self.modelsite.get_namespace(), self.modelsite.__class__.__name__)
+
+    def run(self, step, func, *args):
+        try:
+            func(*args)
+        except Exception as err:
+            self.errors.append((step, err))
+
+
+def get_actions(modelsite):
+    return [
+        (action, specific) for action, enabled, specific in ACTIONS
+        if getattr(modelsite, enabled)
+    ]
+
+
+def get_template_names(modelsite, actions):
+    names = [
+        getattr(modelsite, 'get_%s_template' % action)()
+        for action, specific in actions
+    ]
+    if modelsite.index_view_enabled:
+        names.append(modelsite.get_index_fragment_template())
+    names.extend([name] for name in INCLUDE_TEMPLATES)
+    if modelsite.create_view_enabled or modelsite.edit_view_enabled:
+        names.extend([name] for name in FORM_INCLUDE_TEMPLATES)
+    return names
+
+
+def warm_urls(modelsite, actions):
+    for action, specific in actions:
+        modelsite.url_helper.get_url_template(action, specific)
+    if modelsite.index_view_enabled:
+        modelsite.url_helper.get_url_template('autocomplete', False)
+
+
+def warm_forms(modelsite):
+    if modelsite.create_view_enabled or modelsite.edit_view_enabled \
+            or modelsite.import_view_enabled:
+        if not modelsite.get_form_class() and modelsite.get_fields():
+            modelsite.get_modelform_class(modelsite.get_fields())
+
+
+def warm_media(modelsite):
+    for action in ('index', 'form', 'inspect'):
+        modelsite.get_media(action)
+
+
+def warm_site(modelsite):
+    """ Build the lazy caches of ``modelsite``, return a ``WarmUpResult`` """
+    result = WarmUpResult(modelsite)
+    start = time.perf_counter()
+    actions = get_actions(modelsite)
+    engine = modelsite.get_template_engine()
+    for template_names in get_template_names(modelsite, actions):
+        result.run('template %s' % template_names[0], select_template, template_names, engine)
+    result.run('urls', warm_urls, modelsite, actions)
+    result.run('filterset', modelsite.get_filterset_class)
+    result.run('forms', warm_forms, modelsite)
+    result.run('columns', modelsite.get_result_columns)
+    if modelsite.index_view_enabled:
+        result.run('sort columns', modelsite.get_sort_columns)
+    result.run('media', warm_media, modelsite)
+    result.run('permissions', modelsite.permission_helper.get_all_model_permission_codenames)
+    result.duration = time.perf_counter() - start
+    return result
+
+
+def warm_sites(modelsites=None):
+    if modelsites is None:
+        from .registry import registry
+        modelsites = registry.get_modelsites()
+    return [warm_site(modelsite) for modelsite in modelsites]
+
+
+def warm_up():
+    """ Warm the sites of the current process, log the results of ``warm_sites`` """
+    for result in warm_sites():
+        for step, err in result.errors:
+            logger.warning('%s %s warm-up failed: %s', result.label, step, err)
+        logger.info('%s warmed up in %.1f ms', result.label, result.duration * 1000)
+
+
+def get_wsgi_application():
+    """ ``django.core.wsgi.get_wsgi_application`` warmed up before serving """
+    from django.core.wsgi import get_wsgi_application
+    application = get_wsgi_application()
+    warm_up()
+    return application
+
+
+def get_asgi_application():
+    """ ``django.core.asgi.get_asgi_application`` (Django 3.0+) warmed up before serving """
+    from django.core.asgi import get_asgi_application
+    application = get_asgi_application()
+    warm_up()
+    return application
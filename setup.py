@@ -25,6 +25,8 @@ setup(
     packages=[
         'django_websites',
         'django_websites.helpers',
+        'django_websites.management',
+        'django_websites.management.commands',
         'django_websites.templatetags',
         'django_websites.utils',
     ],
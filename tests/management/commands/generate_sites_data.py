@@ -0,0 +1,85 @@
+import random
+import uuid
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tests.models import PRIVACY_CHOICES, Person, Working, Volunteer
+
+NATIONS = ['Indonesia', 'Malaysia', 'Singapore', 'Thailand', 'Vietnam']
+RELIGIONS = ['Islam', 'Christian', 'Catholic', 'Hindu', 'Buddha']
+EMPLOYMENTS = ['CTR', 'FXD', 'OSR', 'ELS']
+
+
+class Command(BaseCommand):
+    help = 'Bulk generate Person, Working and Volunteer rows for benchmarks.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('persons', type=int, help='Number of persons to create.')
+        parser.add_argument(
+            '--related', type=int, default=2,
+            help='Working and Volunteer rows created per person.')
+        parser.add_argument(
+            '--batch-size', type=int, default=None,
+            help='Rows per INSERT, by default the database backend decides.')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rnd = random.Random(options['seed'])
+        batch_size = options['batch_size']
+        related = options['related']
+        privacies = [choice[0] for choice in PRIVACY_CHOICES]
+        today = date(2020, 1, 1)
+
+        with transaction.atomic():
+            persons = []
+            for i in range(options['persons']):
+                persons.append(Person(
+                    id=uuid.UUID(int=rnd.getrandbits(128), version=4),
+                    name='Person %06d' % i,
+                    pid='%016d' % rnd.randrange(10 ** 16),
+                    gender=rnd.choice('LP'),
+                    date_of_birth=today - timedelta(days=rnd.randrange(365 * 60)),
+                    place_of_birth=rnd.choice(NATIONS),
+                    privacy=rnd.choice(privacies),
+                    nickname='nick%s' % i,
+                    about_me='About person %s' % i,
+                    religion=rnd.choice(RELIGIONS),
+                    nation=rnd.choice(NATIONS),
+                ))
+            Person.objects.bulk_create(persons, batch_size=batch_size)
+
+            workings, volunteers = [], []
+            for person in persons:
+                for j in range(related):
+                    start = today - timedelta(days=rnd.randrange(365 * 20))
+                    workings.append(Working(
+                        id=uuid.UUID(int=rnd.getrandbits(128), version=4),
+                        person=person,
+                        name='Job %s' % j,
+                        institution='Company %s' % rnd.randrange(100),
+                        date_start=start,
+                        date_end=start + timedelta(days=rnd.randrange(365 * 5)),
+                        department='Department %s' % rnd.randrange(20),
+                        position='Position %s' % rnd.randrange(20),
+                        employment=rnd.choice(EMPLOYMENTS),
+                        privacy=rnd.choice(privacies),
+                    ))
+                    volunteers.append(Volunteer(
+                        id=uuid.UUID(int=rnd.getrandbits(128), version=4),
+                        person=person,
+                        organization='Organization %s' % rnd.randrange(100),
+                        position='Member',
+                        description='Volunteer work %s' % j,
+                        date_start=start,
+                        date_end=start + timedelta(days=rnd.randrange(365)),
+                        status=rnd.choice(['ACT', 'INC']),
+                        privacy=rnd.choice(privacies),
+                    ))
+            Working.objects.bulk_create(workings, batch_size=batch_size)
+            Volunteer.objects.bulk_create(volunteers, batch_size=batch_size)
+
+        if options['verbosity']:
+            self.stdout.write('Created %s persons, %s workings, %s volunteers.' % (
+                len(persons), len(workings), len(volunteers)))
@@ -1,9 +1,97 @@
 import uuid
+from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 UUID = {
     'default': uuid.uuid4,
     'unique': True,
     'primary_key': True,
     'editable': True
-}
\ No newline at end of file
+}
+
+PRIVACY_CHOICES = (
+    ('anyone', 'Anyone'),
+    ('users', 'All Users'),
+    ('friends', 'All Friends'),
+    ('students', 'All Students'),
+    ('teachers', 'All Teachers'),
+    ('employees', 'All Employees'),
+    ('managers', 'All Managers'),
+    ('me', 'Only Me'),
+)
+
+
+class TrashModel(models.Model):
+    is_trash = models.BooleanField(default=False, editable=False)
+    trashed_at = models.DateTimeField(null=True, blank=True, editable=False)
+    trashed_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, editable=False,
+        on_delete=models.CASCADE, related_name='%(class)s_trashes'
+    )
+
+    class Meta:
+        abstract = True
+
+
+class Person(TrashModel):
+    id = models.UUIDField(**UUID)
+    name = models.CharField(max_length=50)
+    pid = models.CharField(max_length=256, null=True, blank=True)
+    gender = models.CharField(
+        max_length=1, default='L', choices=(('L', 'Male'), ('P', 'Female')))
+    date_of_birth = models.DateField(null=True, blank=True, default=timezone.now)
+    place_of_birth = models.CharField(max_length=255, null=True, blank=True)
+    privacy = models.CharField(max_length=128, default='anyone', choices=PRIVACY_CHOICES)
+    nickname = models.CharField(max_length=256, null=True, blank=True)
+    about_me = models.TextField(max_length=128, null=True, blank=True)
+    religion = models.CharField(max_length=255, null=True, blank=True)
+    nation = models.CharField(max_length=255, null=True, blank=True)
+
+    class Meta:
+        verbose_name = 'Person'
+        verbose_name_plural = 'Persons'
+
+    def __str__(self):
+        return self.name
+
+
+class Working(TrashModel):
+    id = models.UUIDField(**UUID)
+    person = models.ForeignKey(Person, on_delete=models.CASCADE, related_name='work_histories')
+    name = models.CharField(max_length=50)
+    institution = models.CharField(max_length=256)
+    date_start = models.DateField(default=timezone.now, db_index=True)
+    date_end = models.DateField(default=timezone.now)
+    department = models.CharField(max_length=256)
+    position = models.CharField(max_length=256)
+    employment = models.CharField(
+        max_length=5, default='CTR',
+        choices=(('CTR', 'Contract'), ('FXD', 'Fixed'), ('OSR', 'Outsource'), ('ELS', 'Else')))
+    privacy = models.CharField(max_length=128, default='anyone', choices=PRIVACY_CHOICES)
+
+    def __str__(self):
+        return self.name
+
+
+class Volunteer(TrashModel):
+    id = models.UUIDField(**UUID)
+    person = models.ForeignKey(Person, on_delete=models.CASCADE, related_name='volunteers')
+    organization = models.CharField(max_length=256)
+    position = models.CharField(max_length=256)
+    description = models.TextField(max_length=256)
+    date_start = models.DateField(default=timezone.now)
+    date_end = models.DateField(default=timezone.now)
+    status = models.CharField(
+        max_length=5, default='ACT', choices=(('ACT', 'Active'), ('INC', 'Inactive')))
+    privacy = models.CharField(max_length=128, default='anyone', choices=PRIVACY_CHOICES)
+
+    def __str__(self):
+        return self.organization
+
+
+class Tag(models.Model):
+    code = models.CharField(max_length=50, primary_key=True)
+
+    def __str__(self):
+        return self.code
@@ -38,6 +38,23 @@ TEMPLATES = [
     }
 ]
 
-DATABASES = {"default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}}
+try:
+    import jinja2  # noqa: F401
+except ImportError:
+    pass
+else:
+    TEMPLATES.append({
+        "BACKEND": "django.template.backends.jinja2.Jinja2",
+        "APP_DIRS": True,
+        "OPTIONS": {
+            "environment": "django_websites.jinja.environment",
+            "context_processors": TEMPLATES[0]["OPTIONS"]["context_processors"],
+        },
+    })
+
+DATABASES = {
+    "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+    "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+}
 
 STATIC_URL = "/static/"
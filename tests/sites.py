@@ -0,0 +1,55 @@
+from django_websites.options import ModelSite, ModelSiteGroup
+from django_websites.registry import register
+
+from .models import Person, Working, Volunteer
+
+
+class PersonSite(ModelSite):
+    model = Person
+    ordering = ['name', 'id']
+    list_display = ['name', 'gender', 'privacy', 'nation']
+    filterset_fields = ['gender', 'privacy', 'nation']
+    index_view_extra_css = ['tests/site.css']
+    index_view_extra_js = ['https://cdn.example.com/lib.js', 'tests/site.js']
+    fields = ['name', 'pid', 'gender', 'date_of_birth', 'place_of_birth',
+              'privacy', 'nickname', 'about_me', 'religion', 'nation']
+    inspect_view_enabled = True
+    create_view_enabled = True
+    import_view_enabled = True
+    edit_view_enabled = True
+    delete_view_enabled = True
+
+
+class WorkingSite(ModelSite):
+    model = Working
+    select_related = ['person']
+    list_display = ['name', 'person__name', 'employment', 'date_start']
+    filterset_fields = ['person', 'employment', 'privacy']
+    autocomplete_fields = ['person']
+    fields = ['person', 'name', 'institution', 'date_start', 'date_end',
+              'department', 'position', 'employment', 'privacy']
+    inspect_view_enabled = True
+    create_view_enabled = True
+    edit_view_enabled = True
+    delete_view_enabled = True
+
+
+class VolunteerSite(ModelSite):
+    model = Volunteer
+    url_routing = 'path'
+    trash_enabled = True
+    list_display = ['organization', 'person', 'status', 'date_start']
+    filterset_fields = ['status', 'privacy']
+    autocomplete_fields = ['person']
+    fields = ['person', 'organization', 'position', 'description',
+              'date_start', 'date_end', 'status', 'privacy']
+    inspect_view_enabled = True
+    create_view_enabled = True
+    edit_view_enabled = True
+    delete_view_enabled = True
+
+
+@register
+class PeopleSiteGroup(ModelSiteGroup):
+    namespace = 'people'
+    items = [PersonSite, WorkingSite, VolunteerSite]
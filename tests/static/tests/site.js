@@ -0,0 +1 @@
+document.documentElement.className += ' js';
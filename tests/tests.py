@@ -1,7 +1,1215 @@
-from django.test import TestCase
+import re
+import time
+import uuid
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group, Permission
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command, CommandError
+from django.core.paginator import Paginator
+from django.http import QueryDict
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.forms.models import model_to_dict, modelform_factory
+from django.db.models import ProtectedError, Q
+from django.db.models.signals import post_save, pre_save
+from django.template import Context, Template
+from django.test import TestCase, RequestFactory, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.contrib.admin.utils import quote
+from django.utils import numberformat, timezone, translation
+from django.urls import NoReverseMatch, include, path, resolve, reverse, set_script_prefix, Resolver404
+from django.urls.resolvers import RegexPattern, URLResolver
+
+from django_websites import assets, instrumentation, menu, routing, slowqueries, warmup
+from django_websites.importer import CSVImporter
+from django_websites.indexes import resolve_path, suggest_indexes
+from django_websites.results import ResultsTable, render_cells
+from django_websites.sorting import add_tiebreaker
+from django_websites.views import CreateView
+from django_websites.options import ModelSite
+from django_websites.registry import SiteRegistry, registry
+from django_websites.pagination import PageLinks
+from django_websites.permissions import (
+    create_global_permissions, remove_global_permissions, sync_global_permissions,
+)
+from django_websites.templatetags.pagination_tags import replace_param, proper_paginate
+from django_websites.utils import text
+from django_websites.utils.formatters import ColumnFormatter, format_column
+from django_websites.utils.decorator import defer_update, deferred_updates, prevent_recursion
+
+try:
+    import jinja2
+except ImportError:
+    jinja2 = None
+
+from .models import Person, Working, Volunteer, Tag
+from .sites import PeopleSiteGroup, PersonSite, WorkingSite, VolunteerSite
 
 
 class TestPersonalModel(TestCase):
 
     def test_is_this_needed(self):
         self.assertEqual(False, False)
+
+
+class TestPageLinks(TestCase):
+
+    def setUp(self):
+        self.paginator = Paginator(range(200), 10)
+        self.page_obj = self.paginator.page(8)
+        self.request = RequestFactory().get('/things/?q=a+b&empty=&tag=x&tag=y&page=8')
+
+    def test_links_match_replace_param(self):
+        context = {'request': self.request}
+        links = PageLinks(self.request.GET, self.page_obj)
+        expected = [
+            replace_param(context, page=i)
+            for i in proper_paginate(self.paginator, self.page_obj.number)
+        ]
+        for page, query in zip(links.pages, expected):
+            self.assertEqual(QueryDict(page['url'][1:]), QueryDict(query))
+        self.assertEqual(
+            QueryDict(links.next[1:]), QueryDict(replace_param(context, page=9))
+        )
+
+    def test_boundaries(self):
+        links = PageLinks(QueryDict(), self.paginator.page(1))
+        self.assertIsNone(links.first)
+        self.assertIsNone(links.previous)
+        self.assertEqual(links.next, '?page=2')
+        self.assertEqual(links.last, '?page=20')
+        self.assertEqual([p['number'] for p in links.pages], list(range(1, 8)))
+        self.assertTrue(links.pages[0]['is_current'])
+
+
+class TestModelSiteViews(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_sites_data', 30, related=1, verbosity=0)
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.person = Person.objects.order_by('name')[0]
+
+    def person_data(self, **kwargs):
+        data = {'name': 'Someone', 'gender': 'L', 'privacy': 'anyone'}
+        data.update(kwargs)
+        return data
+
+    def test_generate_sites_data(self):
+        self.assertEqual(Person.objects.count(), 30)
+        self.assertEqual(Working.objects.count(), 30)
+        self.assertEqual(Volunteer.objects.count(), 30)
+
+    def test_index(self):
+        response = self.client.get('/people/person/', {'gender': 'P', 'page': 2})
+        self.assertEqual(response.status_code, 200)
+
+    def test_inspect(self):
+        response = self.client.get('/people/person/inspect/%s/' % self.person.pk)
+        self.assertContains(response, self.person.name)
+
+    def test_create(self):
+        response = self.client.post('/people/person/create/', self.person_data())
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Person.objects.filter(name='Someone').exists())
+
+    def test_edit(self):
+        response = self.client.post(
+            '/people/person/edit/%s/' % self.person.pk, self.person_data(name='Edited'))
+        self.assertEqual(response.status_code, 302)
+        self.person.refresh_from_db()
+        self.assertEqual(self.person.name, 'Edited')
+
+    def test_delete(self):
+        response = self.client.post('/people/person/delete/%s/' % self.person.pk)
+        self.assertEqual(response.status_code, 302)
+        self.assertFalse(Person.objects.filter(pk=self.person.pk).exists())
+
+
+@override_settings(WEBSITE_INSTRUMENTATION=True)
+class TestInstrumentation(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_sites_data', 5, related=0, verbosity=0)
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    def setUp(self):
+        instrumentation.stats.clear()
+        self.client.force_login(self.user)
+
+    def test_samples_are_recorded_and_sent(self):
+        samples = []
+
+        def receiver(sender, sample, **kwargs):
+            samples.append(sample)
+
+        instrumentation.view_instrumented.connect(receiver)
+        try:
+            self.client.get('/people/person/')
+        finally:
+            instrumentation.view_instrumented.disconnect(receiver)
+
+        self.assertEqual(len(samples), 1)
+        sample = samples[0]
+        self.assertEqual((sample.namespace, sample.model, sample.action), ('people', 'tests.person', 'index'))
+        self.assertGreater(sample.queries, 0)
+        self.assertGreater(sample.response_size, 0)
+
+    def test_percentile_is_nearest_rank(self):
+        self.assertEqual(instrumentation.percentile([1, 2], 50), 1)
+        values = list(range(1, 11))
+        self.assertEqual(instrumentation.percentile(values[:6], 50), 3)
+        self.assertEqual(instrumentation.percentile(values, 50), 5)
+        self.assertEqual(instrumentation.percentile(values, 90), 9)
+        self.assertEqual(instrumentation.percentile(values, 99), 10)
+
+    def test_render_is_left_to_the_handler(self):
+        request = RequestFactory().get('/people/person/')
+        request.user = self.user
+        response = resolve('/people/person/').func(request)
+        self.assertFalse(response.is_rendered)
+        self.assertEqual(instrumentation.stats.summary(), [])
+        response.render()
+        result = instrumentation.stats.summary()[0]
+        self.assertEqual(result['count'], 1)
+        self.assertGreater(result['render_time'], 0)
+
+    def test_errors_are_recorded(self):
+        self.client.get('/people/person/inspect/%s/' % uuid.uuid4())
+        result = instrumentation.stats.summary()[0]
+        self.assertEqual((result['action'], result['count']), ('inspect', 1))
+
+    def test_stats_view(self):
+        self.client.get('/people/person/')
+        self.client.get('/people/person/')
+        results = self.client.get('/stats/').json()['results']
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]['count'], 2)
+        self.assertEqual(sum(count for bound, count in results[0]['histogram']), 2)
+
+    def test_stats_view_is_staff_only(self):
+        user = get_user_model().objects.create_user('user', 'user@example.com', 'user')
+        self.client.force_login(user)
+        self.assertEqual(self.client.get('/stats/').status_code, 302)
+
+
+@override_settings(WEBSITE_SLOW_QUERY_THRESHOLD=0)
+class TestSlowQueries(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_sites_data', 5, related=0, verbosity=0)
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    def setUp(self):
+        slowqueries.store.clear()
+        self.client.force_login(self.user)
+
+    def test_queries_are_grouped_by_filter_shape(self):
+        self.client.get('/people/person/', {'privacy': 'anyone', 'gender': 'P', 'page': 1})
+        self.client.get('/people/person/', {'gender': 'L', 'privacy': 'me', 'nation': ''})
+        results = self.client.get('/slow-queries/').json()['results']
+        shapes = {tuple(r['shape']) for r in results if r['action'] == 'index'}
+        self.assertEqual(shapes, {('gender', 'privacy')})
+        sample = results[0]['samples'][0]
+        self.assertTrue(sample['explain'])
+        self.assertFalse(sample['explain'][0].startswith('EXPLAIN failed'))
+
+    def test_each_statement_is_explained_once_per_interval(self):
+        with mock.patch.object(slowqueries, 'explain', return_value=['plan']) as explain:
+            self.client.get('/people/person/', {'gender': 'P'})
+            count = explain.call_count
+            self.assertTrue(count)
+            self.client.get('/people/person/', {'gender': 'P'})
+            self.assertEqual(explain.call_count, count)
+            with override_settings(WEBSITE_SLOW_QUERY_EXPLAIN_INTERVAL=0):
+                self.client.get('/people/person/', {'gender': 'P'})
+            self.assertGreater(explain.call_count, count)
+        results = self.client.get('/slow-queries/').json()['results']
+        self.assertEqual(results[0]['samples'][-1]['explain'], ['plan'])
+
+    @override_settings(WEBSITE_SLOW_QUERY_EXPLAIN=False)
+    def test_explain_can_be_disabled(self):
+        with mock.patch.object(slowqueries, 'explain') as explain:
+            self.client.get('/people/person/', {'gender': 'P'})
+        self.assertFalse(explain.called)
+
+    def test_store_is_bounded(self):
+        store = slowqueries.SlowQueryStore(max_shapes=2, max_samples=1)
+        for i, shape in enumerate([('a',), ('b',), ('c',), ('c',)]):
+            store.record({
+                'namespace': 'n', 'model': 'm', 'action': 'index',
+                'shape': shape, 'duration': i,
+            })
+        results = store.summary()
+        self.assertEqual([r['shape'] for r in results], [['c'], ['b']])
+        self.assertEqual(results[0]['count'], 2)
+        self.assertEqual(len(results[0]['samples']), 1)
+
+
+class TestIndexAdvisor(TestCase):
+
+    def test_resolve_path(self):
+        self.assertEqual(resolve_path(Working, 'person'), (Working, 'person', 'exact'))
+        self.assertEqual(resolve_path(Working, 'person__in'), (Working, 'person', 'in'))
+        self.assertEqual(resolve_path(Working, 'person__name__startswith'), (Person, 'name', 'startswith'))
+        self.assertEqual(resolve_path(Working, 'unknown'), (None, None, None))
+
+    def test_suggest_indexes(self):
+        suggestions = suggest_indexes(PersonSite('people'))
+        self.assertEqual(
+            [s.fields for s in suggestions],
+            [['name', 'id'], ['gender', 'name', 'id'], ['privacy', 'name', 'id'], ['nation', 'name', 'id']]
+        )
+
+    def test_foreign_keys_are_covered(self):
+        fields = [s.fields for s in suggest_indexes(WorkingSite('people'))]
+        self.assertNotIn(['person'], fields)
+        self.assertIn(['employment'], fields)
+
+    def test_command(self):
+        out = StringIO()
+        call_command('suggest_site_indexes', stdout=out)
+        self.assertIn("models.Index(fields=['gender', 'name', 'id']", out.getvalue())
+        with self.assertRaises(CommandError):
+            call_command('suggest_site_indexes', write_migration=True, stdout=StringIO())
+
+
+class TestSiteRegistry(TestCase):
+
+    def test_autodiscover(self):
+        self.assertTrue(registry.is_registered(PersonSite, 'people'))
+        modelsite = registry.get_modelsites_for_model(Person)[0]
+        self.assertIs(modelsite, registry.get_modelsite(PersonSite, 'people'))
+        self.assertIs(modelsite, PeopleSiteGroup().get_modelsite_instance()[0])
+
+    def test_urls_are_built_lazily(self):
+        site_registry = SiteRegistry()
+        site_registry.register(PeopleSiteGroup)
+        self.assertIs(site_registry.urls, site_registry.urls)
+        self.assertEqual(site_registry.instances, {})
+
+        resolver = URLResolver(RegexPattern(r'^/'), site_registry.urls)
+        match = resolver.resolve('/people/working/create/')
+        self.assertEqual(match.url_name, 'people_working_create')
+        self.assertEqual(list(site_registry.instances), [(WorkingSite, 'people')])
+
+        # Reversing populates the whole resolver
+        resolver.reverse('people_person_index')
+        self.assertEqual(len(site_registry.instances), 3)
+
+    def test_register_twice(self):
+        site_registry = SiteRegistry()
+        site_registry.register(VolunteerSite)
+        with self.assertRaises(ImproperlyConfigured):
+            site_registry.register(VolunteerSite)
+
+
+class TestSiteURLHelper(TestCase):
+
+    def setUp(self):
+        self.url_helper = registry.get_modelsite(PersonSite, 'people').url_helper
+
+    def tearDown(self):
+        set_script_prefix('/')
+
+    def assertMatchesReverse(self, action, pk):
+        self.assertEqual(
+            self.url_helper.get_url(action, True, pk),
+            reverse('people_person_%s' % action, args=[pk])
+        )
+
+    def test_specific_urls_match_reverse(self):
+        for action in ['inspect', 'edit', 'delete']:
+            self.assertMatchesReverse(action, '1c5d4a3e-0a4b-4c6f-9d3e-2b1a0c9d8e7f')
+            self.assertMatchesReverse(action, quote('a/b:c_d'))
+            self.assertMatchesReverse(action, 'ünïcode')
+            self.assertMatchesReverse(action, 42)
+
+    def test_script_prefix(self):
+        set_script_prefix('/mounted/')
+        self.assertMatchesReverse('edit', 'abc')
+        self.assertEqual(self.url_helper.index_url, reverse('people_person_index'))
+        self.assertTrue(self.url_helper.index_url.startswith('/mounted/'))
+
+    def test_invalid_pk_is_rejected_like_reverse(self):
+        with self.assertRaises(NoReverseMatch):
+            self.url_helper.get_url('edit', True, 'a b')
+
+
+class TestPathRouting(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_sites_data', 2, related=1, verbosity=0)
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.volunteer = Volunteer.objects.all()[0]
+        self.url_helper = registry.get_modelsite(VolunteerSite, 'people').url_helper
+
+    def test_pk_converter(self):
+        self.assertEqual(self.url_helper.get_pk_converter(), 'uuid')
+        match = resolve('/people/volunteer/edit/%s/' % self.volunteer.pk)
+        self.assertEqual(match.kwargs['instance_pk'], self.volunteer.pk)
+
+    def test_url_templates_match_reverse(self):
+        for pk in [self.volunteer.pk, str(self.volunteer.pk)]:
+            self.assertEqual(
+                self.url_helper.get_url('inspect', True, pk),
+                reverse('people_volunteer_inspect', args=[pk])
+            )
+
+    def test_malformed_pk_is_not_routed(self):
+        with self.assertRaises(Resolver404):
+            resolve('/people/volunteer/edit/not-a-uuid/')
+
+    def test_views(self):
+        response = self.client.get('/people/volunteer/inspect/%s/' % self.volunteer.pk)
+        self.assertContains(response, self.volunteer.organization)
+
+    def test_str_pk_is_escaped_like_reverse(self):
+        modelsite = TagSite('tags')
+        urlconf = type('urlconf', (), {'urlpatterns': modelsite.get_urls()})
+        self.assertEqual(modelsite.url_helper.pk_converter, 'str')
+        with override_settings(ROOT_URLCONF=urlconf):
+            for pk in ['a?b#c%d', 'plain', 'ünïcode']:
+                self.assertEqual(
+                    modelsite.url_helper.get_url('inspect', True, pk),
+                    reverse('tags_tag_inspect', args=[pk])
+                )
+            self.assertEqual(
+                modelsite.url_helper.get_url('inspect', True, 'a?b#c%d'),
+                '/tag/inspect/a%3Fb%23c%25d/'
+            )
+
+    def test_malformed_pk_404_before_query_in_regex_mode(self):
+        with self.assertNumQueries(0):
+            response = self.client.get('/people/person/inspect/not-a-uuid/')
+        self.assertEqual(response.status_code, 404)
+
+
+class TagSite(ModelSite):
+    model = Tag
+    url_routing = 'path'
+    inspect_view_enabled = True
+
+
+class TestMenu(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User = get_user_model()
+        cls.admin = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.user = User.objects.create_user('user', 'user@example.com', 'user')
+        cls.group = Group.objects.create(name='person viewers')
+        cls.group.permissions.add(Permission.objects.get(codename='view_person'))
+
+    def setUp(self):
+        cache.clear()
+
+    def test_menu_is_cached(self):
+        items = menu.get_menu(self.admin)
+        self.assertEqual(len(items), 1)
+        self.assertEqual(
+            [child['url'] for child in items[0]['children']],
+            ['/people/person/', '/people/working/', '/people/volunteer/']
+        )
+        with self.assertNumQueries(0):
+            self.assertEqual(menu.get_menu(self.admin), items)
+
+    def test_menu_is_invalidated_on_permission_change(self):
+        self.assertEqual(menu.get_menu(self.user), [])
+        self.user.groups.add(self.group)
+        user = get_user_model().objects.get(pk=self.user.pk)
+        items = menu.get_menu(user)
+        self.assertEqual([child['label'] for child in items[0]['children']], ['Persons'])
+
+    def test_login_does_not_invalidate(self):
+        version = menu.get_permissions_version()
+        self.client.force_login(self.user)
+        self.assertEqual(menu.get_permissions_version(), version)
+
+    def test_only_permission_flags_invalidate(self):
+        version = menu.get_permissions_version()
+        user = get_user_model().objects.get(pk=self.user.pk)
+        user.first_name = 'Ada'
+        user.save()
+        self.assertEqual(menu.get_permissions_version(), version)
+        user.is_superuser = True
+        user.save()
+        self.assertNotEqual(menu.get_permissions_version(), version)
+        version = menu.get_permissions_version()
+        user.save()
+        self.assertEqual(menu.get_permissions_version(), version)
+
+    def test_menu_is_cached_per_language(self):
+        with translation.override('en'):
+            key = menu.get_cache_key(self.admin)
+        with translation.override('de'):
+            self.assertNotEqual(menu.get_cache_key(self.admin), key)
+
+    def test_index_renders_menu(self):
+        self.client.force_login(self.admin)
+        self.client.get('/people/person/')
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/people/person/')
+        self.assertContains(response, 'href="/people/volunteer/"')
+        for query in queries.captured_queries:
+            self.assertNotIn("'volunteer'", query['sql'])
+
+
+class TestGlobalPermissions(TestCase):
+
+    def test_sync_is_bulk_and_idempotent(self):
+        specs = [('can_export', 'Can export'), ('can_import', 'Can import')]
+        with self.assertNumQueries(9):
+            perms = sync_global_permissions(specs)
+        self.assertEqual(sorted(perms), ['can_export', 'can_import'])
+        with self.assertNumQueries(4):
+            self.assertEqual(sync_global_permissions(specs), perms)
+
+    def test_sync_renames_and_prunes(self):
+        sync_global_permissions({'can_export': 'Can export', 'can_import': 'Can import'})
+        perms = sync_global_permissions({'can_export': 'Can export data'}, prune=True)
+        self.assertEqual(perms['can_export'].name, 'Can export data')
+        codenames = Permission.objects.filter(
+            content_type__app_label='global_permission').values_list('codename', flat=True)
+        self.assertEqual(list(codenames), ['can_export'])
+
+    def test_remove_many(self):
+        create_global_permissions('Can export', 'can_export')
+        sync_global_permissions({'can_import': 'Can import', 'can_publish': 'Can publish'})
+        remove_global_permissions(['can_export', 'can_import'])
+        remove_global_permissions('can_publish')
+        self.assertFalse(Permission.objects.filter(content_type__app_label='global_permission').exists())
+
+
+def set_pid(sender, instance, **kwargs):
+    defer_update(instance, pid='P-%s' % instance.pk.hex[:8])
+
+
+def set_nickname(sender, instance, **kwargs):
+    defer_update(instance, nickname=instance.name.split()[0])
+
+
+class TestDeferredUpdates(TestCase):
+
+    def connect(self, signal, receiver):
+        signal.connect(receiver, sender=Person)
+        self.addCleanup(signal.disconnect, receiver, sender=Person)
+
+    def test_post_save_writes_computed_columns_once(self):
+        self.connect(post_save, deferred_updates(set_pid))
+        with CaptureQueriesContext(connection) as queries:
+            person = Person.objects.create(name='Ada Lovelace')
+        self.assertEqual(len(queries), 2)
+        self.assertIn('SET "pid"', queries[1]['sql'])
+        self.assertNotIn('"name"', queries[1]['sql'])
+        self.assertEqual(Person.objects.get(pk=person.pk).pid, person.pid)
+        with self.assertNumQueries(2):
+            person.save()
+
+    def test_pre_save_needs_no_extra_query(self):
+        self.connect(pre_save, deferred_updates(set_nickname))
+        with self.assertNumQueries(1):
+            person = Person.objects.create(name='Ada Lovelace')
+        self.assertEqual(Person.objects.get(pk=person.pk).nickname, 'Ada')
+        person.name = 'Grace Hopper'
+        with self.assertNumQueries(2):
+            person.save(update_fields=['name'])
+        self.assertEqual(Person.objects.get(pk=person.pk).nickname, 'Grace')
+
+    def test_prevent_recursion_saves_only_deferred_columns(self):
+        self.connect(post_save, prevent_recursion(set_pid))
+        with CaptureQueriesContext(connection) as queries:
+            person = Person.objects.create(name='Ada Lovelace')
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn('"name"', queries[1]['sql'])
+        self.assertEqual(Person.objects.get(pk=person.pk).pid, person.pid)
+
+
+class TestEditDirtyFields(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.person = Person.objects.create(
+            name='Ada', nation='UK', about_me='Analyst', date_of_birth=date(1815, 12, 10))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.person = Person.objects.get(pk=self.person.pk)
+        self.url = '/people/person/edit/%s/' % self.person.pk
+        self.data = {
+            key: '' if value is None else value
+            for key, value in model_to_dict(self.person, fields=PersonSite.fields).items()
+        }
+        # rendered by fields with a callable default
+        self.data['initial-date_of_birth'] = self.data['date_of_birth']
+
+    def get_writes(self, data):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(self.url, data)
+        self.assertEqual(response.status_code, 302)
+        return [q['sql'] for q in queries.captured_queries if q['sql'].startswith('UPDATE')]
+
+    def test_unchanged_form_is_not_saved(self):
+        self.assertEqual(self.get_writes(self.data), [])
+
+    def test_only_changed_columns_are_saved(self):
+        writes = self.get_writes(dict(self.data, nation='NL'))
+        self.assertEqual(len(writes), 1)
+        self.assertIn('SET "nation" = ', writes[0])
+        self.assertNotIn('"name"', writes[0])
+        self.assertNotIn('"about_me"', writes[0])
+        self.person.refresh_from_db()
+        self.assertEqual((self.person.nation, self.person.about_me), ('NL', 'Analyst'))
+
+
+class TestCSVImport(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def get_csv(self, rows):
+        lines = ['name,gender,privacy,nation'] + rows
+        return SimpleUploadedFile('persons.csv', '\n'.join(lines).encode('utf-8'), 'text/csv')
+
+    def test_import_view(self):
+        response = self.client.get('/people/person/import/')
+        self.assertEqual(response.status_code, 200)
+        csv_file = self.get_csv(['Ada,P,anyone,UK', 'Grace,X,anyone,US', 'Alan,L,me,UK'])
+        response = self.client.post('/people/person/import/', {'csv_file': csv_file})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['result'].created, 2)
+        self.assertEqual([error.line for error in response.context['result'].errors], [3])
+        self.assertIn('gender', response.context['result'].errors[0].errors)
+        self.assertEqual(
+            list(Person.objects.order_by('name').values_list('name', flat=True)), ['Ada', 'Alan'])
+
+    def test_chunks_are_bulk_created(self):
+        modelsite = registry.get_modelsite(PersonSite, 'people')
+        importer = CSVImporter(Person, modelform_factory(Person, fields=PersonSite.fields), chunk_size=10)
+        csv_file = self.get_csv(['Person %s,L,anyone,ID' % i for i in range(25)])
+        with CaptureQueriesContext(connection) as queries:
+            result = importer.run(csv_file)
+        self.assertEqual(result.created, 25)
+        inserts = [q for q in queries.captured_queries if q['sql'].startswith('INSERT')]
+        self.assertEqual(len(inserts), 3)
+        self.assertEqual(modelsite.import_chunk_size, 500)
+
+    def test_rejected_chunk_is_retried_row_by_row(self):
+        importer = CSVImporter(Tag, modelform_factory(Tag, fields=['code']))
+        csv_file = SimpleUploadedFile('tags.csv', b'code\na\nb\nb\nc', 'text/csv')
+        result = importer.run(csv_file)
+        self.assertEqual(result.created, 3)
+        self.assertEqual([error.line for error in result.errors], [4])
+        self.assertEqual(list(Tag.objects.order_by('code').values_list('code', flat=True)), ['a', 'b', 'c'])
+
+    def test_errors_are_bounded(self):
+        importer = CSVImporter(Person, modelform_factory(Person, fields=PersonSite.fields), max_errors=2)
+        result = importer.run(self.get_csv([',L,anyone,ID'] * 5))
+        self.assertEqual((result.created, result.error_count, len(result.errors)), (0, 5, 2))
+        self.assertTrue(result.truncated)
+
+
+class TestFormatters(TestCase):
+
+    def test_get_money(self):
+        self.assertEqual(text.get_money(1234567), '1,234,567')
+        self.assertEqual(text.get_money('-98765.4321'), '-98,765.4321')
+        with override_settings(USE_L10N=True), translation.override('de'):
+            self.assertEqual(text.get_money(1234567), '1.234.567,00')
+            self.assertEqual(text.get_money(Decimal('-1234.567')), '-1.234,56')
+
+    def test_group_digits_matches_numberformat(self):
+        for grouping in (3, (3, 2, 0), (1, 0), 0):
+            for number in (0, 7, 12345, 1234567890123):
+                self.assertEqual(
+                    text.group_digits(str(number), ',', grouping),
+                    numberformat.format(number, '.', grouping=grouping, thousand_sep=',',
+                                        force_grouping=True))
+
+    def test_number_to_text_id(self):
+        self.assertEqual(text.number_to_text_id(0), '')
+        self.assertEqual(text.number_to_text_id(15), 'lima belas ')
+        self.assertEqual(text.number_to_text_id(1234), 'seribu dua ratus tiga puluh empat')
+        self.assertEqual(text.number_to_text_id(2000001), 'dua juta satu')
+
+    def test_format_column_memoizes_repeated_values(self):
+        calls = []
+        formatter = ColumnFormatter(lambda value: calls.append(value) or str(value))
+        values = [1, 2, 1, Decimal('1.0'), Decimal('1.00'), Decimal('1.0'), 'x', 'x']
+        self.assertEqual(formatter.format_column(values), [str(value) for value in values])
+        self.assertEqual(calls, [1, 2, Decimal('1.0'), Decimal('1.00'), 'x'])
+        self.assertEqual(
+            format_column('text_right', ['<b>', None]),
+            ['<div align="right">&lt;b&gt;</div>', '<div align="right">-</div>'])
+
+
+class TestResultsTable(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.person = Person.objects.create(name='Ada', gender='P', nation='UK')
+        for i in range(3):
+            Volunteer.objects.create(
+                person=cls.person, organization='Org %s' % i, position='-', description='-', status='INC')
+
+    def test_columns(self):
+        modelsite = registry.get_modelsite(WorkingSite, 'people')
+        columns = modelsite.get_result_columns()
+        self.assertIs(columns, modelsite.get_result_columns())
+        self.assertEqual(
+            [column.label for column in columns], ['Name', 'Person name', 'Employment', 'Date start'])
+        self.assertEqual([column.select_related for column in columns], [None, 'person', None, None])
+
+    def test_rows_and_formatters(self):
+        modelsite = PersonSite('people')
+        modelsite.list_display = ['name', 'gender', 'pid', '__str__']
+        modelsite.list_formatters = {'name': 'text_right'}
+        table = ResultsTable(modelsite, [self.person])
+        self.assertEqual(table.headers, ['Name', 'Gender', 'Pid', 'Person'])
+        self.assertEqual(
+            table.rows, [(self.person, ('<div align="right">Ada</div>', 'Female', '-', 'Ada'))])
+
+    @override_settings(USE_TZ=True, TIME_ZONE='Asia/Jakarta')
+    def test_datetimes_in_current_time_zone(self):
+        value = datetime(2020, 1, 1, 20, 0, tzinfo=timezone.utc)
+        expected = Template('<td>{{ value }}</td>').render(Context({'value': value}))
+        self.assertEqual(render_cells([value, value]), [expected, expected])
+        self.assertIn('Jan. 2, 2020', expected)
+
+    def test_index_selects_related_columns(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/people/volunteer/')
+        self.assertContains(response, '<td>Inactive</td>', count=3)
+        self.assertContains(response, '<td>Ada</td>', count=3)
+        volunteers = response.context['results'].objects
+        with self.assertNumQueries(0):
+            [volunteer.person.name for volunteer in volunteers]
+
+
+class TestTrash(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.person = Person.objects.create(name='Ada')
+        cls.volunteers = [
+            Volunteer.objects.create(
+                person=cls.person, organization='Org %s' % i, position='-', description='-')
+            for i in range(4)
+        ]
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.modelsite = registry.get_modelsite(VolunteerSite, 'people')
+
+    def test_delete_is_a_single_update(self):
+        volunteer = self.volunteers[0]
+        url = '/people/volunteer/delete/%s/' % volunteer.pk
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(url)
+        self.assertEqual(response.status_code, 302)
+        writes = [q['sql'] for q in queries.captured_queries if not q['sql'].startswith('SELECT')]
+        self.assertEqual(len(writes), 1)
+        self.assertTrue(writes[0].startswith('UPDATE'))
+        volunteer.refresh_from_db()
+        self.assertEqual((volunteer.is_trash, volunteer.trashed_by), (True, self.user))
+        self.assertEqual(self.client.get('/people/volunteer/inspect/%s/' % volunteer.pk).status_code, 404)
+        self.assertEqual(self.client.get('/people/volunteer/').context['result_count'], 3)
+
+    def test_bulk_restore_and_purge(self):
+        pks = [str(v.pk) for v in self.volunteers[:3]]
+        self.modelsite.get_trash_queryset().filter(pk__in=pks).trash(self.user)
+        response = self.client.get('/people/volunteer/trash/')
+        self.assertEqual(response.context['result_count'], 3)
+        self.client.post('/people/volunteer/trash/', {'action': 'restore', 'pk': pks[:1]})
+        self.client.post('/people/volunteer/trash/', {'action': 'purge', 'pk': pks[1:]})
+        self.assertEqual(Volunteer.objects.filter(is_trash=False).count(), 2)
+        self.assertEqual(Volunteer.objects.count(), 2)
+
+    def test_invalid_posts_change_nothing(self):
+        pk = str(self.volunteers[0].pk)
+        self.modelsite.get_trash_queryset().filter(pk=pk).trash(self.user)
+        with mock.patch('django_websites.views.facets.bump_version') as bump_version:
+            for data in ({'action': 'purge', 'pk': ['1', 'abc']}, {'action': 'drop', 'pk': [pk]}):
+                response = self.client.post('/people/volunteer/trash/', data, follow=True)
+                self.assertRedirects(response, '/people/volunteer/trash/')
+                self.assertEqual({str(m).strip() for m in response.context['messages']}, {'Invalid selection.'})
+        bump_version.assert_not_called()
+        self.assertTrue(Volunteer.objects.filter(pk=pk).exists())
+
+    def test_protected_rows_are_reported(self):
+        pk = str(self.volunteers[0].pk)
+        self.modelsite.get_trash_queryset().filter(pk=pk).trash(self.user)
+        error = ProtectedError('Cannot delete some instances of model Volunteer', [])
+        with mock.patch('django_websites.managers.TrashQuerySet.purge', side_effect=error):
+            response = self.client.post(
+                '/people/volunteer/trash/', {'action': 'purge', 'pk': [pk]}, follow=True)
+            self.assertIn('could not be deleted', str(list(response.context['messages'])[0]))
+            err = StringIO()
+            call_command('purge_site_trash', days=0, stdout=StringIO(), stderr=err)
+            self.assertIn('tests.Volunteer: purge stopped', err.getvalue())
+
+    def test_purge_command(self):
+        queryset = self.modelsite.get_trash_queryset()
+        queryset.filter(pk=self.volunteers[0].pk).trash()
+        queryset.filter(pk=self.volunteers[1].pk).update(
+            is_trash=True, trashed_at=timezone.now() - timedelta(days=40))
+        call_command('purge_site_trash', 'tests.volunteer', batch_size=1, pause=0, stdout=StringIO())
+        self.assertEqual(Volunteer.objects.count(), 3)
+        self.assertFalse(Volunteer.objects.filter(pk=self.volunteers[1].pk).exists())
+        with self.assertRaises(CommandError):
+            call_command('purge_site_trash', 'tests.person', stdout=StringIO())
+
+    def test_partial_index_suggestions(self):
+        suggestions = {tuple(s.fields): s for s in suggest_indexes(self.modelsite)}
+        self.assertEqual(suggestions[('status',)].condition, Q(is_trash=False))
+        self.assertEqual(suggestions[('trashed_at',)].condition, Q(is_trash=True))
+        self.assertIn('condition=models.Q(is_trash=True)', repr(suggestions[('trashed_at',)]))
+
+
+class TestAutocomplete(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.people = [Person.objects.create(name=name) for name in ('Adam', 'Ada', 'Bob')]
+        Working.objects.create(
+            person=cls.people[0], name='Work', institution='-', department='-', position='-')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.modelsite = registry.get_modelsite(WorkingSite, 'people')
+
+    def test_prefix_search(self):
+        response = self.client.get('/people/working/autocomplete/', {'field': 'person', 'q': 'Ad'})
+        self.assertEqual(response.json(), {
+            'results': [
+                {'id': str(self.people[1].pk), 'text': 'Ada'},
+                {'id': str(self.people[0].pk), 'text': 'Adam'},
+            ],
+            'more': False,
+        })
+        with mock.patch.object(self.modelsite, 'autocomplete_limit', 1):
+            first = self.client.get('/people/working/autocomplete/', {'field': 'person'}).json()
+            last = self.client.get(
+                '/people/working/autocomplete/', {'field': 'person', 'page': 3}).json()
+        self.assertEqual((first['results'][0]['text'], first['more']), ('Ada', True))
+        self.assertEqual((last['results'][0]['text'], last['more']), ('Bob', False))
+
+    def test_unknown_field(self):
+        response = self.client.get('/people/working/autocomplete/', {'field': 'name', 'q': 'W'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_related_site_permission_required(self):
+        user = get_user_model().objects.create_user('clerk', 'clerk@example.com', 'clerk')
+        user.user_permissions.add(Permission.objects.get(codename='view_working'))
+        self.client.force_login(user)
+        params = {'field': 'person', 'q': 'A'}
+        self.assertEqual(self.client.get('/people/working/autocomplete/', params).status_code, 403)
+        user.user_permissions.add(Permission.objects.get(codename='view_person'))
+        self.assertEqual(self.client.get('/people/working/autocomplete/', params).status_code, 200)
+
+    def test_trashed_rows_are_not_searched(self):
+        person_site = registry.get_modelsite(PersonSite, 'people')
+        Person.objects.filter(pk=self.people[1].pk).update(is_trash=True)
+        with mock.patch.object(person_site, 'trash_enabled', True):
+            response = self.client.get('/people/working/autocomplete/', {'field': 'person', 'q': 'Ad'})
+        self.assertEqual([r['text'] for r in response.json()['results']], ['Adam'])
+
+    def test_filter_renders_selected_option_only(self):
+        response = self.client.get('/people/working/', {'person': str(self.people[0].pk)})
+        self.assertEqual(response.context['result_count'], 1)
+        self.assertContains(response, 'data-autocomplete-url="/people/working/autocomplete/?field=person"')
+        self.assertContains(response, '>Adam</option>')
+        self.assertNotContains(response, '>Bob</option>')
+        self.assertContains(response, 'django_websites/js/autocomplete.js')
+
+    def test_form_field_renders_selected_option_only(self):
+        modelsite = registry.get_modelsite(VolunteerSite, 'people')
+        form = CreateView(modelsite=modelsite).get_form_class()(data={'person': str(self.people[2].pk)})
+        with self.assertNumQueries(1):
+            self.assertEqual(form.fields['person'].clean(form.data['person']), self.people[2])
+        with self.assertNumQueries(1):
+            html = str(form['person'])
+        self.assertIn('>Bob</option>', html)
+        self.assertNotIn('>Ada</option>', html)
+        self.assertIn('/people/volunteer/autocomplete/?field=person', html)
+        response = self.client.get('/people/volunteer/autocomplete/', {'field': 'person', 'q': 'B'})
+        self.assertEqual(response.json()['results'], [{'id': str(self.people[2].pk), 'text': 'Bob'}])
+
+
+class TestFacets(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        for name, gender, privacy in [('A', 'L', 'me'), ('B', 'L', 'anyone'), ('C', 'P', 'me')]:
+            Person.objects.create(name=name, gender=gender, privacy=privacy)
+
+    def setUp(self):
+        cache.clear()
+        self.filterset_class = registry.get_modelsite(PersonSite, 'people').get_filterset_class()
+
+    def get_counts(self, query):
+        filterset = self.filterset_class(data=QueryDict(query), queryset=Person.objects.all())
+        return {
+            facet.name: {value: count for value, label, count, url in facet}
+            for facet in filterset.facets
+        }
+
+    def test_counts_in_one_cached_query(self):
+        with self.assertNumQueries(1):
+            counts = self.get_counts('privacy=me')
+        self.assertEqual(counts['gender'], {'L': 1, 'P': 1})
+        self.assertEqual(counts['privacy']['me'], 2)
+        self.assertEqual(counts['privacy']['anyone'], 0)
+        self.assertNotIn('nation', counts)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.get_counts('privacy=me'), counts)
+        Person.objects.create(name='D', gender='P', privacy='me')
+        self.assertEqual(self.get_counts('privacy=me')['gender'], {'L': 1, 'P': 2})
+
+    def test_sidebar_links(self):
+        self.client.force_login(self.user)
+        response = self.client.get('/people/person/', {'privacy': 'me', 'page': 1})
+        self.assertContains(response, '<a href="?privacy=me&amp;gender=P">Female</a> (1)', html=True)
+
+
+@override_settings(DATABASE_ROUTERS=[routing.ROUTER])
+class TestDatabaseRouting(TestCase):
+    databases = {'default', 'replica'}
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.primary = Person.objects.create(name='Primary')
+        cls.replica = Person.objects.using('replica').create(name='Replica')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        modelsite = registry.get_modelsite(PersonSite, 'people')
+        patcher = mock.patch.multiple(modelsite, read_using='replica', write_using='default')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_names(self):
+        response = self.client.get('/people/person/')
+        return [person.name for person in response.context['object_list']]
+
+    def test_reads_from_replica_and_sticks_to_primary_after_write(self):
+        self.assertEqual(self.get_names(), ['Replica'])
+        response = self.client.get('/people/person/inspect/%s/' % self.replica.pk)
+        self.assertContains(response, 'Replica')
+        response = self.client.post('/people/person/create/', {
+            'name': 'Someone', 'gender': 'L', 'privacy': 'anyone'})
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Person.objects.using('default').filter(name='Someone').exists())
+        self.assertFalse(Person.objects.using('replica').filter(name='Someone').exists())
+        self.assertIn(routing.get_cookie_name(), response.cookies)
+        self.assertEqual(self.get_names(), ['Primary', 'Someone'])
+        del self.client.cookies[routing.get_cookie_name()]
+        self.assertEqual(self.get_names(), ['Replica'])
+
+    @override_settings(DATABASE_ROUTERS=[])
+    def test_router_required(self):
+        with self.assertRaises(ImproperlyConfigured):
+            self.client.get('/people/person/')
+
+
+class TestAssetBundles(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    def setUp(self):
+        self.modelsite = registry.get_modelsite(PersonSite, 'people')
+
+    def test_bundles_are_fingerprinted_and_cached(self):
+        media = self.modelsite.get_media('index')
+        self.assertIs(self.modelsite.get_media('index'), media)
+        self.assertEqual(media._js[0], 'https://cdn.example.com/lib.js')
+        js_url = media._js[1]
+        css_url = media._css['all'][0]
+        self.assertRegex(css_url, r'^/_assets/\w{20}\.css$')
+        self.client.force_login(self.user)
+        response = self.client.get('/people/person/')
+        self.assertContains(response, css_url)
+        self.assertContains(response, js_url)
+
+        response = self.client.get(js_url)
+        self.assertEqual(response['Content-Type'], 'application/javascript; charset=utf-8')
+        self.assertIn(b"className += ' js'", response.content)
+        self.assertIn('immutable', response['Cache-Control'])
+        self.assertIn('max-age=31536000', response['Cache-Control'])
+        response = self.client.get(js_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_bundle_built_by_another_process(self):
+        css_url = self.modelsite.get_media('index')._css['all'][0]
+        assets.clear()
+        self.assertEqual(self.client.get(css_url).status_code, 200)
+        self.assertEqual(self.client.get('/_assets/%s.css' % ('0' * 20)).status_code, 404)
+
+    def test_views_without_assets(self):
+        self.assertEqual(str(self.modelsite.get_media('inspect')), '')
+
+    def test_css_references_point_to_static_files(self):
+        bundle = assets.build_bundle('css', ['tests/site.css'])
+        content = bundle.content.decode()
+        self.assertIn('url(/static/tests/fonts/site.woff2?v=1#site)', content)
+        self.assertIn('url("/static/tests/img/sort.png")', content)
+        self.assertIn("url('data:font/woff2;base64,AAAA')", content)
+
+    def test_declared_order_is_kept(self):
+        urls = assets.build_urls('js', ['tests/site.js', 'https://cdn.example.com/lib.js', 'tests/site.js'])
+        self.assertEqual(urls[1], 'https://cdn.example.com/lib.js')
+        self.assertRegex(urls[0], r'^/_assets/\w{20}\.js$')
+        self.assertEqual(urls[2], urls[0])
+
+    def test_media_per_script_prefix(self):
+        self.addCleanup(set_script_prefix, '/')
+        self.modelsite.get_media('index')
+        set_script_prefix('/mounted/')
+        self.assertTrue(self.modelsite.get_media('index')._js[1].startswith('/mounted/_assets/'))
+
+    def test_namespaced_urls_are_rejected(self):
+        bundle = assets.Bundle('css', b'body {}')
+        urlconf = type('urlconf', (), {'urlpatterns': [
+            path('', include((registry.urls, 'sites'), namespace='sites'))]})
+        with override_settings(ROOT_URLCONF=urlconf):
+            with self.assertRaises(ImproperlyConfigured):
+                bundle.url
+
+
+class TestWarmUp(TestCase):
+
+    def test_warm_site(self):
+        modelsite = WorkingSite(namespace='people')
+        result = warmup.warm_site(modelsite)
+        self.assertGreater(result.duration, 0)
+        self.assertEqual(
+            [step for step, err in result.errors if not step.endswith('fieldset.html')], [])
+        self.assertIsNotNone(modelsite._filterset_class)
+        self.assertIsNotNone(modelsite._result_columns)
+        self.assertEqual({action for action, prefix in modelsite._media}, {'index', 'form', 'inspect'})
+        self.assertIn(tuple(modelsite.fields), modelsite._modelform_classes)
+        self.assertEqual(len(modelsite.url_helper.url_templates), 6)
+        with self.assertNumQueries(0):
+            codenames = modelsite.permission_helper.get_all_model_permission_codenames()
+        self.assertIn('add_working', codenames)
+
+    def test_permission_codenames_expire(self):
+        helper = registry.get_modelsite(WorkingSite, 'people').permission_helper
+        helper.get_all_model_permission_codenames()
+        # Created without signals, like another process or create_permissions() would
+        Permission.objects.bulk_create([Permission(
+            codename='export_working', name='Can export',
+            content_type=ContentType.objects.get_for_model(Working))])
+        self.assertNotIn('export_working', helper.get_all_model_permission_codenames())
+        later = time.monotonic() + 61
+        with mock.patch('django_websites.helpers.permission.time.monotonic', return_value=later):
+            self.assertIn('export_working', helper.get_all_model_permission_codenames())
+
+    def test_wsgi_application_is_warmed_up(self):
+        with mock.patch.object(warmup, 'warm_up') as warm_up:
+            application = warmup.get_wsgi_application()
+        self.assertTrue(callable(application))
+        self.assertEqual(warm_up.call_count, 1)
+
+    def test_command_reports_time_per_site(self):
+        out = StringIO()
+        call_command('warm_sites', stdout=out, stderr=StringIO())
+        lines = out.getvalue().splitlines()
+        self.assertRegex(lines[0], r'^people\.PersonSite: [\d.]+ ms$')
+        self.assertTrue(lines[-1].startswith('Total: '))
+
+
+class TestIndexFragments(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_sites_data', 30, related=0, verbosity=0)
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def test_fragment_renders_results_only(self):
+        with CaptureQueriesContext(connection) as full:
+            page = self.client.get('/people/person/', {'page': 2})
+        with CaptureQueriesContext(connection) as partial:
+            fragment = self.client.get('/people/person/', {'page': 2, 'fragment': 1})
+        self.assertNotIn('all_count', fragment.context)
+        self.assertLess(len(partial), len(full))
+        self.assertLess(len(fragment.content), len(page.content))
+        self.assertNotContains(fragment, '<form')
+        self.assertContains(fragment, '<div id="site-results">')
+        self.assertContains(fragment, 'href="?page=3"')
+        self.assertIn('HX-Request', fragment['Vary'])
+
+    def test_htmx_header(self):
+        response = self.client.get('/people/person/', HTTP_HX_REQUEST='true')
+        self.assertEqual(
+            [t.name for t in response.templates][0], 'sites/index_fragment.html')
+        response = self.client.get('/people/volunteer/trash/', HTTP_HX_REQUEST='true')
+        self.assertIn('all_count', response.context)
+
+
+@skipUnless(jinja2, 'Jinja2 is not installed')
+class TestJinja2Templates(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('generate_sites_data', 30, related=1, verbosity=0)
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    def setUp(self):
+        self.client.force_login(self.user)
+        self.person = Person.objects.order_by('name')[0]
+
+    def use_jinja2(self, site_class):
+        modelsite = registry.get_modelsite(site_class, 'people')
+        patcher = mock.patch.object(modelsite, 'template_engine', 'jinja2')
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def get_parts(self, response):
+        content = response.content.decode()
+        return (
+            re.findall(r'<tr>.*?</tr>', content, re.S),
+            re.findall(r'href="([^"]*)"', content),
+            re.findall(r'<option[^>]*>[^<]*</option>', content),
+        )
+
+    def test_index_renders_like_django_templates(self):
+        params = {'gender': 'L', 'page': 2, 'person': ''}
+        expected = self.get_parts(self.client.get('/people/working/', params))
+        self.use_jinja2(WorkingSite)
+        response = self.client.get('/people/working/', params)
+        # Only the form widgets are rendered by the Django templates
+        self.assertFalse([t.name for t in response.templates if t.name.startswith('sites/')])
+        self.assertEqual(self.get_parts(response), expected)
+        fragment = self.client.get('/people/working/', dict(params, fragment=1))
+        self.assertContains(fragment, '<div id="site-results">')
+        self.assertNotContains(fragment, '<form')
+
+    def test_other_views(self):
+        self.use_jinja2(PersonSite)
+        self.assertContains(
+            self.client.get('/people/person/inspect/%s/' % self.person.pk), self.person.name)
+        response = self.client.get('/people/person/create/')
+        self.assertContains(response, '<input type="text" name="name" maxlength="50" class="form-control" required id="id_name">', html=True)
+        self.assertContains(response, 'csrfmiddlewaretoken')
+        self.use_jinja2(VolunteerSite)
+        self.assertContains(self.client.get('/people/volunteer/trash/'), 'The trash is empty.')
+
+
+class TestColumnSorting(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = get_user_model().objects.create_superuser('admin', 'admin@example.com', 'admin')
+        cls.people = [Person.objects.create(name=name) for name in ('Cid', 'Ada', 'Bob')]
+        for day in (3, 1, 3, 2):
+            Working.objects.create(
+                person=cls.people[0], name='Work %s' % day, institution='-', department='-',
+                position='-', date_start=date(2020, 1, day))
+
+    def setUp(self):
+        self.client.force_login(self.user)
+
+    def use_sortable_by(self, site_class, sortable_by, **kwargs):
+        modelsite = registry.get_modelsite(site_class, 'people')
+        patcher = mock.patch.multiple(modelsite, sortable_by=sortable_by, **kwargs)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        modelsite.__dict__.pop('_sort_columns', None)
+        self.addCleanup(modelsite.__dict__.pop, '_sort_columns', None)
+        return modelsite
+
+    def test_tiebreaker(self):
+        self.assertEqual(add_tiebreaker(Person, ['-name']), ['-name', '-id'])
+        self.assertEqual(add_tiebreaker(Person, ['name', 'pk']), ['name', 'pk'])
+        self.assertEqual(add_tiebreaker(Person, []), ['id'])
+        self.assertEqual(PersonSite('people').get_ordering(), ['name', 'id'])
+
+    def test_indexed_columns_are_sortable_by_default(self):
+        self.assertEqual(list(WorkingSite('people').get_sort_columns()), ['date_start'])
+        self.assertEqual(PersonSite('people').get_sort_columns(), {})
+
+    def test_sort(self):
+        response = self.client.get('/people/working/', {'sort': '-date_start', 'page': 1})
+        objects = list(response.context['object_list'])
+        self.assertEqual([w.date_start.day for w in objects], [3, 3, 2, 1])
+        # Equal dates in descending primary key order
+        self.assertGreater(objects[0].pk, objects[1].pk)
+        headers = {h['label']: h for h in response.context['result_headers']}
+        self.assertEqual(headers['Date start']['sorted'], 'desc')
+        self.assertEqual(headers['Date start']['url'], '?sort=date_start')
+        self.assertIsNone(headers['Name']['url'])
+        self.assertContains(response, 'aria-sort="descending"')
+        # Columns not sortable are ignored
+        response = self.client.get('/people/working/', {'sort': 'name'})
+        self.assertEqual(response.context['view'].get_ordering(), ['id'])
+
+    def test_unindexed_sort_refused_over_limit(self):
+        with self.assertLogs('django_websites.sorting', 'WARNING'):
+            self.use_sortable_by(PersonSite, ['name', 'nation'], unindexed_sort_limit=2)
+            response = self.client.get('/people/person/', {'sort': '-name'})
+        self.assertTrue(response.context['sort_refused'])
+        self.assertEqual([p.name for p in response.context['object_list']], ['Ada', 'Bob', 'Cid'])
+        Person.objects.filter(name='Ada').delete()
+        response = self.client.get('/people/person/', {'sort': '-name'})
+        self.assertFalse(response.context['sort_refused'])
+        self.assertEqual([p.name for p in response.context['object_list']], ['Cid', 'Bob'])
+        reasons = [s.reasons for s in suggest_indexes(registry.get_modelsite(PersonSite, 'people'))]
+        self.assertIn(['sort by nation', 'filter nation then ordering'], reasons)
+
+    def test_method_column_with_order_field(self):
+        def upper_name(obj):
+            return obj.name.upper()
+        upper_name.admin_order_field = 'name'
+        modelsite = registry.get_modelsite(PersonSite, 'people')
+        patcher = mock.patch.multiple(
+            modelsite, upper_name=upper_name, list_display=['upper_name', 'nation'], create=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        modelsite.__dict__.pop('_result_columns', None)
+        self.addCleanup(modelsite.__dict__.pop, '_result_columns', None)
+        with self.assertLogs('django_websites.sorting', 'WARNING'):
+            self.use_sortable_by(PersonSite, ['upper_name'])
+            response = self.client.get('/people/person/', {'sort': 'upper_name'})
+        header = response.context['result_headers'][0]
+        self.assertEqual((header['sorted'], header['url']), ('asc', '?sort=-upper_name'))
+        response = self.client.get('/people/person/' + header['url'])
+        self.assertEqual([p.name for p in response.context['object_list']], ['Cid', 'Bob', 'Ada'])
+        self.assertContains(response, 'aria-sort="descending"')
+
+    def test_invalid_sortable_by(self):
+        modelsite = PersonSite('people')
+        modelsite.sortable_by = ['pid']
+        with self.assertRaises(ImproperlyConfigured):
+            modelsite.get_sort_columns()
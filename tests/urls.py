@@ -1,3 +1,10 @@
-from django.conf.urls import url
+from django.conf.urls import url, include
 
-urlpatterns = []
\ No newline at end of file
+from django_websites.registry import registry
+from django_websites.views import stats_view, slow_queries_view
+
+urlpatterns = [
+    url(r'^', include(registry.urls)),
+    url(r'^stats/$', stats_view, name='sites_stats'),
+    url(r'^slow-queries/$', slow_queries_view, name='sites_slow_queries'),
+]